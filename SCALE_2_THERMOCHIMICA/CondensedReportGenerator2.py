@@ -167,6 +167,34 @@ class CondensedReportGenerator:
         return sorted(list(salt_phases))
 
 
+def generate_sweep_reports(sweep_data: Dict[str, Dict[str, Any]], output_directory: str) -> OrderedDict:
+    """
+    Generate one condensed report per grid point of a temperature/pressure sweep.
+    
+    Each report is saved to output_directory/<grid point>/Condensed_Thermochimica_Report.json.
+    
+    Args:
+        sweep_data (Dict[str, Dict[str, Any]]): Grid points as returned by DataLoaderParser.load_sweep_outputs
+        output_directory (str): Directory holding one subdirectory per grid point
+        
+    Returns:
+        OrderedDict: For each grid point, its temperature, pressure and condensed report
+    """
+    sweep_reports = OrderedDict()
+    
+    for name, point in sweep_data.items():
+        report_generator = CondensedReportGenerator(point["thermochimica_data"])
+        sweep_reports[name] = {
+            "temperature": point["temperature"],
+            "pressure": point["pressure"],
+            "condensed_report": report_generator.generate_condensed_report()
+        }
+        report_generator.save_condensed_report(os.path.join(output_directory, name))
+    
+    logger.info(f"Generated condensed reports for {len(sweep_reports)} grid points")
+    return sweep_reports
+
+
 def main():
     """
     Main function to demonstrate the usage of the CondensedReportGenerator.
@@ -177,10 +205,17 @@ def main():
     parser = argparse.ArgumentParser(description='Condensed Report Generator')
     parser.add_argument('input_dir', help='Directory containing input files')
     parser.add_argument('--output-dir', default='output', help='Directory to save output files')
+    parser.add_argument('--sweep', action='store_true',
+                        help='Generate one report per grid point of a temperature/pressure sweep')
     args = parser.parse_args()
     
     # Load the data using DataLoaderParser from Component 1
     loader = DataLoaderParser(args.input_dir)
+    
+    if args.sweep:
+        generate_sweep_reports(loader.load_sweep_outputs(args.input_dir), args.output_dir)
+        return
+    
     _, _, thermochimica_data = loader.load_all_data()
     
     # Create an instance of the CondensedReportGenerator
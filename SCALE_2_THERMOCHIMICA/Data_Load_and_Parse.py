@@ -1,8 +1,11 @@
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Tuple, List, Optional, Set
 
+from Thermochimica_Output_Manifest import OutputManifest, scan_timestep_dir, validate_thermochimica_json
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,14 +24,20 @@ class DataLoaderParser:
     - Thermochimica output files: Contains thermodynamic calculation results for each timestep
     """
     
-    def __init__(self, base_directory: str):
+    def __init__(self, base_directory: str, max_workers: Optional[int] = None, use_manifest: bool = True):
         """
         Initialize the Data Loader and Parser.
         
         Args:
             base_directory (str): Base directory containing all input files
+            max_workers (Optional[int]): Threads loading timestep directories at once (None for
+                the ThreadPoolExecutor default, 1 to load them one after the other)
+            use_manifest (bool): Take the files and validation status of unchanged timestep
+                directories from tc_outputs_manifest.json, and update it for the others
         """
         self.base_directory = base_directory
+        self.max_workers = max_workers
+        self.use_manifest = use_manifest
         self.fuel_salt_data = None
         self.surrogate_vector = None
         self.thermochimica_data = None
@@ -238,7 +247,8 @@ class DataLoaderParser:
         
         return True
     
-    def load_thermochimica_outputs(self, base_directory: str) -> Dict[int, Dict[str, Any]]:
+    def load_thermochimica_outputs(self, base_directory: str,
+                                   tc_inputs_dir: Optional[str] = None) -> Dict[int, Dict[str, Any]]:
         """
         Load all Thermochimica output files from the directory structure.
         
@@ -257,6 +267,8 @@ class DataLoaderParser:
         
         Args:
             base_directory (str): Base directory containing tc_inputs/timestep_X folders
+            tc_inputs_dir (Optional[str]): Directory holding the timestep_X folders, if not
+                base_directory/tc_inputs (e.g. a grid point directory of a sweep)
             
         Returns:
             Dict[int, Dict[str, Any]]: Dictionary mapping timesteps to their respective output data
@@ -265,58 +277,164 @@ class DataLoaderParser:
         thermochimica_data = {}
         
         # Define the expected directory structure
-        tc_inputs_dir = os.path.join(base_directory, "tc_inputs")
+        if tc_inputs_dir is None:
+            tc_inputs_dir = os.path.join(base_directory, "tc_inputs")
         
         if not os.path.exists(tc_inputs_dir):
             logger.error(f"tc_inputs directory not found: {tc_inputs_dir}")
             return thermochimica_data
         
-        # Iterate through all subdirectories
-        for subdir in os.listdir(tc_inputs_dir):
-            if not subdir.startswith("timestep_"):
-                continue
-            
-            # Extract timestep number
-            try:
-                timestep = int(subdir.split("_")[1])
-            except (IndexError, ValueError):
-                logger.warning(f"Could not parse timestep from directory name: {subdir}")
+        timestep_dirs = self._find_timestep_dirs(tc_inputs_dir)
+        manifest = OutputManifest(tc_inputs_dir) if self.use_manifest else None
+        
+        def load(timestep_dir):
+            return self._load_timestep_dir(timestep_dir, manifest)
+        
+        # Listing and reading the timestep directories overlap on a thread pool; results keep the directory order
+        if self.max_workers == 1 or len(timestep_dirs) < 2:
+            loaded = map(load, timestep_dirs)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                loaded = list(executor.map(load, timestep_dirs))
+        
+        for (timestep, _), (timestep_data, valid) in zip(timestep_dirs, loaded):
+            if timestep_data is None:
                 continue
+            thermochimica_data[timestep] = timestep_data
             
-            timestep_dir = os.path.join(tc_inputs_dir, subdir)
-            
-            # Find relevant files in this timestep directory
-            json_file = None
-            log_file = None
-            input_file = None
+            # Validate the JSON structure if it exists
+            if timestep_data["json_data"]:
+                if not valid:
+                    logger.warning(f"Thermochimica JSON at timestep {timestep} has an unexpected structure")
+        
+        if manifest is not None:
+            present = {os.path.basename(path) for _, path in timestep_dirs}
+            for name in list(manifest.entries):
+                if name not in present:
+                    manifest.discard(name)
+            if manifest.changed:
+                try:
+                    manifest.save()
+                except OSError as e:
+                    logger.warning(f"Could not update the output manifest of {tc_inputs_dir}: {str(e)}")
+        
+        logger.info(f"Loaded data for {len(thermochimica_data)} timesteps")
+        return thermochimica_data
+    
+    def _find_timestep_dirs(self, tc_inputs_dir: str) -> List[Tuple[int, str]]:
+        """
+        Find the timestep_X directories of a tc_inputs directory.
+        
+        Args:
+            tc_inputs_dir (str): Directory holding the timestep_X folders
             
-            for file in os.listdir(timestep_dir):
-                if file.endswith(".json"):
-                    json_file = os.path.join(timestep_dir, file)
-                elif file.endswith(".log"):
-                    log_file = os.path.join(timestep_dir, file)
-                elif file.endswith(".ti"):
-                    input_file = os.path.join(timestep_dir, file)
+        Returns:
+            List[Tuple[int, str]]: Timestep and path of each directory, in directory listing order
+        """
+        timestep_dirs = []
+        with os.scandir(tc_inputs_dir) as entries:
+            for entry in entries:
+                if not entry.name.startswith("timestep_") or not entry.is_dir():
+                    continue
+                
+                # Extract timestep number
+                try:
+                    timestep = int(entry.name.split("_")[1])
+                except (IndexError, ValueError):
+                    logger.warning(f"Could not parse timestep from directory name: {entry.name}")
+                    continue
+                timestep_dirs.append((timestep, entry.path))
+        return timestep_dirs
+    
+    def _load_timestep_dir(self, timestep_dir: Tuple[int, str],
+                           manifest: Optional[OutputManifest] = None) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Load the output, log and input files of one timestep directory.
+        
+        With a manifest, a directory whose files are unchanged is not listed and its output
+        not revalidated; any other directory is scanned and recorded in the manifest.
+        
+        Args:
+            timestep_dir (Tuple[int, str]): Timestep and path of the directory
+            manifest (Optional[OutputManifest]): Output manifest of the tc_inputs directory
             
-            # Load data from the files
-            json_data = self._load_json_file(json_file) if json_file else None
-            log_data = self._load_log_file(log_file) if log_file else None
-            input_data = self._load_log_file(input_file) if input_file else None
+        Returns:
+            Tuple[Optional[Dict[str, Any]], bool]: The json_data, log_data and input_data of the
+                timestep (None if it has neither an output nor a log), and whether its output
+                has the structure of a Thermochimica output
+        """
+        _, path = timestep_dir
+        name = os.path.basename(path)
+        
+        # Find relevant files in this timestep directory
+        entry = manifest.current(name) if manifest is not None else None
+        if entry is not None:
+            files = {kind: os.path.join(manifest.tc_inputs_dir, record["path"])
+                     for kind, record in entry["files"].items()}
+        else:
+            files = scan_timestep_dir(path)
+        json_file = files.get("json")
+        log_file = files.get("log")
+        input_file = files.get("input")
+        
+        # Load data from the files
+        content, json_data = self._load_json_content(json_file) if json_file else (None, None)
+        log_data = self._load_log_file(log_file) if log_file else None
+        input_data = self._load_log_file(input_file) if input_file else None
+        
+        if entry is not None:
+            valid = entry["valid"]
+        else:
+            valid = self._validate_thermochimica_json(json_data)
+            if manifest is not None and (content is not None or not json_file):
+                manifest.record(name, files, content, json_data)
+        
+        if not (json_data or log_data):
+            return None, valid
+        return {
+            "json_data": json_data,
+            "log_data": log_data,
+            "input_data": input_data
+        }, valid
+    
+    def load_sweep_outputs(self, base_directory: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the Thermochimica outputs of a temperature/pressure sweep.
+        
+        File structure:
+        base_directory/
+        └── tc_inputs/
+            ├── sweep_index.json              # Grid points and their directories
+            ├── T800_P1/
+            │   ├── timestep_0/ ...           # Same layout as a regular tc_inputs directory
+            │   └── timestep_1/ ...
+            └── T900_P1/ ...
+        
+        Args:
+            base_directory (str): Base directory containing tc_inputs/sweep_index.json
             
-            if json_data or log_data:
-                thermochimica_data[timestep] = {
-                    "json_data": json_data,
-                    "log_data": log_data,
-                    "input_data": input_data
-                }
-                
-                # Validate the JSON structure if it exists
-                if json_data:
-                    if not self._validate_thermochimica_json(json_data):
-                        logger.warning(f"Thermochimica JSON at timestep {timestep} has an unexpected structure")
+        Returns:
+            Dict[str, Dict[str, Any]]: For each grid point (e.g. "T900_P1"), its temperature,
+                pressure and thermochimica data as returned by load_thermochimica_outputs
+        """
+        tc_inputs_dir = os.path.join(base_directory, "tc_inputs")
+        index = self._load_json_file(os.path.join(tc_inputs_dir, "sweep_index.json"))
+        if not index:
+            logger.error(f"No sweep index found in {tc_inputs_dir}")
+            return {}
         
-        logger.info(f"Loaded data for {len(thermochimica_data)} timesteps")
-        return thermochimica_data
+        sweep_data = {}
+        for name, point in index.get("grid_points", {}).items():
+            logger.info(f"Loading grid point {name} (T = {point['temperature']} K, P = {point['pressure']} atm)")
+            sweep_data[name] = {
+                "temperature": point["temperature"],
+                "pressure": point["pressure"],
+                "thermochimica_data": self.load_thermochimica_outputs(
+                    base_directory, os.path.join(tc_inputs_dir, point["directory"]))
+            }
+        
+        logger.info(f"Loaded data for {len(sweep_data)} grid points")
+        return sweep_data
     
     def _validate_thermochimica_json(self, data: Dict) -> bool:
         """
@@ -328,31 +446,7 @@ class DataLoaderParser:
         Returns:
             bool: True if the structure is valid, False otherwise
         """
-        # Check if the data is a dictionary
-        if not isinstance(data, dict):
-            return False
-        
-        # Thermochimica JSON files have numeric keys for each data point
-        # Check if at least one key is a numeric string
-        has_numeric_key = False
-        for key in data.keys():
-            if key.isdigit():
-                has_numeric_key = True
-                
-                # Check the structure of this data point
-                data_point = data[key]
-                if not isinstance(data_point, dict):
-                    return False
-                
-                # Check for required sections in the data point
-                required_sections = ["solution phases", "pure condensed phases", "elements"]
-                if not all(section in data_point for section in required_sections):
-                    return False
-                
-                # If we found at least one valid data point, break
-                break
-        
-        return has_numeric_key
+        return validate_thermochimica_json(data)
     
     def _load_json_file(self, file_path: str) -> Optional[Dict]:
         """
@@ -364,16 +458,30 @@ class DataLoaderParser:
         Returns:
             Optional[Dict]: Parsed JSON data or None if there was an error
         """
+        return self._load_json_content(file_path)[1]
+    
+    def _load_json_content(self, file_path: str) -> Tuple[Optional[bytes], Optional[Dict]]:
+        """
+        Read and parse a JSON file.
+        
+        Args:
+            file_path (str): Path to the JSON file
+            
+        Returns:
+            Tuple[Optional[bytes], Optional[Dict]]: Raw content (None if the file could not be
+                read) and parsed JSON data (None if there was an error)
+        """
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-            return data
+            with open(file_path, 'rb') as f:
+                content = f.read()
         except FileNotFoundError:
             logger.error(f"JSON file not found: {file_path}")
-            return None
-        except json.JSONDecodeError:
+            return None, None
+        try:
+            return content, json.loads(content)
+        except ValueError:
             logger.error(f"Error parsing JSON file: {file_path}")
-            return None
+            return content, None
     
     def _load_log_file(self, file_path: str) -> Optional[str]:
         """
@@ -480,10 +588,12 @@ def main():
     parser = argparse.ArgumentParser(description='Post-Processor Data Loader and Parser')
     parser.add_argument('input_dir', help='Directory containing input files')
     parser.add_argument('--output-dir', default='output', help='Directory to save output files')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Threads loading timestep directories at once (default: ThreadPoolExecutor default)')
     args = parser.parse_args()
     
     # Create an instance of the DataLoaderParser
-    loader = DataLoaderParser(args.input_dir)
+    loader = DataLoaderParser(args.input_dir, max_workers=args.workers)
     
     # Load all data
     fuel_salt_data, surrogate_vector, thermochimica_data = loader.load_all_data()
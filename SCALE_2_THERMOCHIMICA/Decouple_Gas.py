@@ -62,7 +62,27 @@ def decouple_gas(gas_path, surrogate_vector_path, output_path):
     
     with open(surrogate_vector_path, 'r') as f:
         surrogate_data = json.load(f)
-        
+    
+    decoupled_gas = decouple_gas_data(gas_data, surrogate_data)
+    
+    # Write the decoupled gas to the output file
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(decoupled_gas, f, indent=2)
+    
+    print(f"Decoupled gas written to {output_path}")
+
+def decouple_gas_data(gas_data, surrogate_data):
+    """
+    Decouples species mole percentages in already loaded gas data.
+    
+    Args:
+        gas_data: Contents of a Gas.json file
+        surrogate_data: Contents of a surrogate_vector.json file
+    
+    Returns:
+        The decoupled gas data, keyed by timestep
+    """
     surrogate_percentages = surrogate_data.get('surrogate_percentages', {})
     
     # Create a new structure for the decoupled gas
@@ -183,12 +203,7 @@ def decouple_gas(gas_path, surrogate_vector_path, output_path):
             # Add the decoupled phase to the result
             decoupled_gas[timestep][phase_name] = decoupled_phase
     
-    # Write the decoupled gas to the output file
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w') as f:
-        json.dump(decoupled_gas, f, indent=2)
-    
-    print(f"Decoupled gas written to {output_path}")
+    return decoupled_gas
 
 if __name__ == "__main__":
     # Default paths
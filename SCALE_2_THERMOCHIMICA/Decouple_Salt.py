@@ -41,7 +41,43 @@ def decouple_salt(salt_path, surrogate_vector_path, output_path):
     
     with open(surrogate_vector_path, 'r') as f:
         surrogate_data = json.load(f)
-        
+    
+    decoupled_salt, decoupling_stats = decouple_salt_data(salt_data, surrogate_data)
+    
+    # Write the decoupled salt to the output file
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(decoupled_salt, f, indent=2)
+    
+    # Print statistics
+    print(f"Decoupled salt written to {output_path}")
+    print_decoupling_stats(decoupling_stats)
+
+def print_decoupling_stats(decoupling_stats):
+    """
+    Print the ion statistics collected by decouple_salt_data.
+    
+    Args:
+        decoupling_stats: Statistics dictionary returned by decouple_salt_data
+    """
+    print(f"Processed {decoupling_stats['processed_ions']} ions")
+    print(f"Decoupled {decoupling_stats['decoupled_ions']} ions")
+    print(f"Skipped {decoupling_stats['skipped_ions']} ions (no element found)")
+    print(f"Elements not found in surrogate data: {', '.join(decoupling_stats['elements_not_found'])}")
+    print(f"Elements decoupled: {', '.join(decoupling_stats['elements_decoupled'])}")
+    print(f"Elements not decoupled (only one surrogate): {', '.join(decoupling_stats['elements_not_decoupled'])}")
+
+def decouple_salt_data(salt_data, surrogate_data):
+    """
+    Decouples ion mole percentages in already loaded salt data.
+    
+    Args:
+        salt_data: Contents of a Salt.json file
+        surrogate_data: Contents of a surrogate_vector.json file
+    
+    Returns:
+        Tuple of the decoupled salt data (keyed by timestep) and the decoupling statistics
+    """
     surrogate_percentages = surrogate_data.get('surrogate_percentages', {})
     
     # Create a new structure for the decoupled salt
@@ -228,19 +264,7 @@ def decouple_salt(salt_path, surrogate_vector_path, output_path):
             # Add the decoupled phase to the result
             decoupled_salt[timestep][phase_name] = decoupled_phase
     
-    # Write the decoupled salt to the output file
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w') as f:
-        json.dump(decoupled_salt, f, indent=2)
-    
-    # Print statistics
-    print(f"Decoupled salt written to {output_path}")
-    print(f"Processed {decoupling_stats['processed_ions']} ions")
-    print(f"Decoupled {decoupling_stats['decoupled_ions']} ions")
-    print(f"Skipped {decoupling_stats['skipped_ions']} ions (no element found)")
-    print(f"Elements not found in surrogate data: {', '.join(decoupling_stats['elements_not_found'])}")
-    print(f"Elements decoupled: {', '.join(decoupling_stats['elements_decoupled'])}")
-    print(f"Elements not decoupled (only one surrogate): {', '.join(decoupling_stats['elements_not_decoupled'])}")
+    return decoupled_salt, decoupling_stats
 
 if __name__ == "__main__":
     # Default paths
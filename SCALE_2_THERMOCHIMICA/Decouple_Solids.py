@@ -17,7 +17,27 @@ def decouple_solids(solids_path, surrogate_vector_path, output_path):
     
     with open(surrogate_vector_path, 'r') as f:
         surrogate_data = json.load(f)
-        
+    
+    decoupled_solids = decouple_solids_data(solids_data, surrogate_data)
+    
+    # Write the decoupled solids to the output file
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(decoupled_solids, f, indent=2)
+    
+    print(f"Decoupled solids written to {output_path}")
+
+def decouple_solids_data(solids_data, surrogate_data):
+    """
+    Decouples species mole percentages in already loaded solids data.
+    
+    Args:
+        solids_data: Contents of a Solids.json file
+        surrogate_data: Contents of a surrogate_vector.json file
+    
+    Returns:
+        The decoupled solids data, keyed by timestep
+    """
     surrogate_percentages = surrogate_data.get('surrogate_percentages', {})
     
     # Create a new structure for the decoupled solids
@@ -83,12 +103,7 @@ def decouple_solids(solids_path, surrogate_vector_path, output_path):
             # Add the decoupled phase to the result
             decoupled_solids[timestep][phase_name] = decoupled_phase
     
-    # Write the decoupled solids to the output file
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w') as f:
-        json.dump(decoupled_solids, f, indent=2)
-    
-    print(f"Decoupled solids written to {output_path}")
+    return decoupled_solids
 
 if __name__ == "__main__":
     # Default paths
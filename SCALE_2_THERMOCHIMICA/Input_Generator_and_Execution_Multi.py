@@ -2,90 +2,374 @@
 """
 Thermochimica input file generator from surrogate vector JSON.
 This module generates Thermochimica input files for each time step in a surrogate vector JSON file.
+With several temperatures or pressures it generates the time step x temperature x pressure
+grid instead, one tc_inputs-style directory per grid point.
 """
 
 import os
 import json
+import time
 import argparse
+import asyncio
+import statistics
 import subprocess
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, Callable, Iterable, List
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
 import sys
+import copy
 import shutil
+import tempfile
+import threading
 import multiprocessing
+from collections import OrderedDict
+import numpy as np
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
 
 # Import ELEMENTS from tcflibe
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from tcflibe import ELEMENTS
+from Thermochimica_Result_Cache import ThermochimicaResultCache, DEFAULT_MAX_BYTES, relative_difference
+from Thermochimica_Work_Queue import WorkQueueExecutor
+from Thermochimica_Output_Manifest import OutputManifest
+
+# Atomic number of each element symbol (lower case), i.e. its index in ELEMENTS
+ATOMIC_NUMBERS = {}
+for _z, _element in enumerate(ELEMENTS):
+    ATOMIC_NUMBERS.setdefault(_element, _z)
+
+# Where the original installation wrote its results, tried if the binary-derived location does not exist
+LEGACY_OUTPUT_PATH = "/home/bclayto4/thermochimica/outputs/thermoout.json"
+
+# Grid points of a sweep, written next to their directories
+SWEEP_INDEX_FILE = "sweep_index.json"
+
+# Time steps computed and interpolated by adaptive sampling, written to the output directory
+ADAPTIVE_SUMMARY_FILE = "adaptive_sampling.json"
+
+# Time steps answered by a near-duplicate composition, written to the output directory
+DEDUP_PROVENANCE_FILE = "dedup_provenance.json"
+
+# Wall time of every computed time step, kept in the output directory to order later runs
+RUNTIME_HISTORY_FILE = "tc_runtimes.json"
+
+# Seconds between saves of the output manifests while calculations complete
+MANIFEST_SAVE_INTERVAL = 10.0
+
+
+@contextmanager
+def _exclusive_lock(path):
+    """Hold an exclusive lock on path + '.lock' across processes (no-op without fcntl)."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
 
 class ThermochimicaWrapper:
     """Simplified wrapper for Thermochimica that doesn't require file assertions"""
 
-    def __init__(self, datafile_path=None, binary_path=None):
-        """Initialize with optional paths that can be set later"""
+    def __init__(self, datafile_path=None, binary_path=None, output_path=None, scratch_dir=None, cache=None,
+                 calc_list_binary_path=None):
+        """
+        Initialize with optional paths that can be set later
+        
+        Args:
+            datafile_path: Thermochimica data file
+            binary_path: Thermochimica InputScriptMode binary
+            calc_list_binary_path: Thermochimica RunCalculationList binary used for batches
+                                   (defaults to RunCalculationList next to binary_path)
+            output_path: Where the binary writes thermoout.json. A relative path is taken
+                         relative to the scratch directory of each run. Defaults to
+                         $THERMOCHIMICA_OUTPUT, else <install>/outputs/thermoout.json
+            scratch_dir: Parent of the per-run scratch directories (defaults to the system temp dir)
+            cache: Optional ThermochimicaResultCache consulted before running the binary
+        """
         self.datafile_path = datafile_path or os.path.expanduser('~/thermochimica/data/MSTDB-TC_V3.1_Fluorides_No_Func.dat')
         self.binary_path = binary_path or os.path.expanduser('~/thermochimica/bin/InputScriptMode')
+        self.calc_list_binary_path = calc_list_binary_path or os.path.join(os.path.dirname(self.binary_path),
+                                                                            'RunCalculationList')
+        self.output_path = output_path or os.environ.get("THERMOCHIMICA_OUTPUT") or self._discover_output_path()
+        self.scratch_dir = scratch_dir
+        self.cache = cache
+        self.last_cache_hit = False  # Whether the last run_tc call was served from the cache
+        self.dedup_rtol = 0.0  # Relative mass tolerance for answering a deck with a similar cached one
+        self.last_similar = None  # (key, relative difference) of the last similar-composition hit
+        self._cache_decks = {}  # Deck text of each cache key looked up but not yet stored
+        self.timeout = None  # Seconds a single calculation may take before the binary is killed
+        self.retries = 0  # Further attempts after a timeout
+        self.last_attempts = 0  # Attempts made by the last run of the binary
+        self.last_timed_out = False  # Whether every attempt of the last run timed out
+        # Callable (command, cwd, timeout) -> CompletedProcess running the binary; subprocess.run if None
+        self.process_runner = None
         self.deck_name = 'my_tc.ti'  # Thermochimica input file name
         self.thermo_output_name = self.deck_name.replace('.ti', '.json')
         self.header = ''  # Run header
         self.temps_k = '900'  # Default temperature
+        self.pressure = '1'  # Default pressure (atm)
         self.elements = {}  # Molar amounts of elements
 
-    def run_tc(self):
-        """Run a Thermochimica deck"""
+    def _discover_output_path(self):
+        """Locate thermoout.json: <install>/outputs next to the bin directory of the binary."""
+        install_dir = os.path.dirname(os.path.dirname(os.path.abspath(self.binary_path)))
+        candidates = [os.path.join(install_dir, "outputs", "thermoout.json"), LEGACY_OUTPUT_PATH]
+        for candidate in candidates:
+            if os.path.isdir(os.path.dirname(candidate)):
+                return candidate
+        return candidates[0]
+
+    def run_tc(self, work_dir="."):
+        """
+        Run a Thermochimica deck
+        
+        The deck is read from work_dir and the log and output JSON are written there.
+        The binary itself runs in a private scratch directory. When its output file
+        lives outside that directory (a single location shared by every run), the
+        run and the collection of its output hold an exclusive lock on that file so
+        concurrent runs cannot pick up each other's results.
+        """
         # Check if binary exists
         if not os.path.isfile(self.binary_path):
             print(f"WARNING: Thermochimica binary not found at {self.binary_path}")
             print("Input file was generated but calculations cannot be run.")
             return False
 
-        # Thermochimica writes output to a specific location
-        expected_output = "/home/bclayto4/thermochimica/outputs/thermoout.json"
-        log_file = self.deck_name.replace('.ti', '.log')
+        log_file = os.path.join(work_dir, self.deck_name.replace('.ti', '.log'))
+        output_file = os.path.join(work_dir, self.thermo_output_name)
+        
+        # Identical problems are answered from the result cache
+        cache_key, self.last_cache_hit = self.restore_cached(work_dir, self.deck_name, output_file)
+        if self.last_cache_hit:
+            return True
+        
+        def collect(expected_output):
+            # Move it to the desired output filename
+            shutil.move(expected_output, output_file)
+            print(f"Successfully created output file: {output_file}")
+            self._store_cached(cache_key, output_file)
+            return True
+        
+        return self._execute(self.binary_path, work_dir, self.deck_name, log_file, collect, self.timeout)
+
+    def restore_cached(self, work_dir, deck_name, output_file):
+        """
+        Answer the deck work_dir/deck_name from the result cache.
         
+        With a dedup_rtol, a deck without an exact match is answered by the cached deck
+        whose masses all agree within that relative tolerance (last_similar tells which).
+        
+        Returns:
+            Tuple of the cache key (None if there is no cache or the deck cannot be keyed)
+            and whether output_file was restored from the cache
+        """
+        self.last_similar = None
+        self.last_attempts = 0
+        self.last_timed_out = False
+        if self.cache is None:
+            return None, False
         try:
-            # Run Thermochimica in the current directory
-            tchem_process = subprocess.run([self.binary_path, self.deck_name], 
-                                        capture_output=True, text=True, check=False)
-            
-            # Always save the stdout/stderr to a log file
+            with open(os.path.join(work_dir, deck_name), 'r') as f:
+                deck_text = f.read()
+        except OSError:
+            return None, False
+        cache_key = self.cache.key(deck_text, self.datafile_path)
+        if cache_key is None:
+            return None, False
+        
+        log_file = os.path.join(work_dir, deck_name.replace('.ti', '.log'))
+        if self.cache.restore(cache_key, output_file):
             with open(log_file, 'w') as f:
-                f.write("STDOUT:\n")
-                f.write(tchem_process.stdout)
-                f.write("\nSTDERR:\n")
-                f.write(tchem_process.stderr)
+                f.write(f"Restored from Thermochimica result cache (key {cache_key})\n")
+            print(f"Restored output file from cache: {output_file}")
+            return cache_key, True
+        
+        if self.dedup_rtol > 0:
+            similar = self.cache.find_similar(deck_text, self.datafile_path, self.dedup_rtol)
+            if similar is not None and self.cache.restore(similar[0], output_file):
+                with open(log_file, 'w') as f:
+                    f.write(f"Restored from Thermochimica result cache: composition within {similar[1]:.3e} "
+                            f"(relative) of cached entry {similar[0]}\n")
+                print(f"Restored output file from a similar cached composition: {output_file}")
+                self.last_similar = similar
+                return cache_key, True
+        
+        self._cache_decks[cache_key] = deck_text
+        return cache_key, False
+
+    def _store_cached(self, cache_key, output_file):
+        """Store a computed result under the key looked up by restore_cached."""
+        if cache_key is not None:
+            self.cache.store(cache_key, output_file, self._cache_decks.pop(cache_key, None), self.datafile_path)
+
+    def run_calculation_list(self, work_dir, deck_name, output_files, cache_keys=None):
+        """
+        Run a calculation list deck, made by calculation_list_input, in one Thermochimica process
+        
+        The data file is parsed once for all calculations of the list. The combined
+        output is split into one JSON file per calculation, in the single
+        calculation layout of InputScriptMode ({"1": {...}}).
+        
+        Args:
+            work_dir: Directory holding the deck; its log is written there
+            deck_name: File name of the deck
+            output_files: Output JSON path of each calculation, in list order
+            cache_keys: Optional result cache key of each calculation
+        
+        Returns:
+            List of bools telling which calculations produced an output file
+        """
+        if not os.path.isfile(self.calc_list_binary_path):
+            print(f"WARNING: Thermochimica calculation list binary not found at {self.calc_list_binary_path}")
+            return [False] * len(output_files)
+        
+        log_file = os.path.join(work_dir, deck_name.replace('.ti', '.log'))
+        cache_keys = cache_keys or [None] * len(output_files)
+        
+        def collect(expected_output):
+            with open(expected_output, 'r') as f:
+                combined = json.load(f)
+            successes = []
+            for index, (output_file, cache_key) in enumerate(zip(output_files, cache_keys)):
+                calculation = combined.get(str(index + 1))
+                if calculation is None:
+                    print(f"Thermochimica produced no result for calculation {index + 1} of {deck_name}")
+                    successes.append(False)
+                    continue
+                with open(output_file, 'w') as f:
+                    json.dump({"1": calculation}, f)
+                self._store_cached(cache_key, output_file)
+                successes.append(True)
+            print(f"Split {sum(successes)} results of {deck_name} into per-calculation output files")
+            return successes
+        
+        # The time limit applies to each calculation of the list
+        timeout = self.timeout * len(output_files) if self.timeout else None
+        successes = self._execute(self.calc_list_binary_path, work_dir, deck_name, log_file, collect, timeout)
+        return successes or [False] * len(output_files)
+
+    def _execute(self, binary_path, work_dir, deck_name, log_file, collect, timeout=None):
+        """
+        Run binary_path on work_dir/deck_name in a private scratch directory
+        
+        stdout/stderr are saved to log_file. collect is called with the path of the
+        output file while its location is still locked and its return value is
+        returned; False is returned if the run produced no output. A run exceeding
+        timeout seconds is killed and retried up to self.retries times.
+        """
+        self.last_attempts = 0
+        self.last_timed_out = False
+        try:
+            scratch = tempfile.mkdtemp(prefix=f"tc_{os.getpid()}_", dir=self.scratch_dir)
+        except Exception as e:
+            print(f"Error creating scratch directory for Thermochimica: {e}")
+            return False
+        
+        try:
+            shutil.copy(os.path.join(work_dir, deck_name), scratch)
             
-            # Check if thermoout.json was created at the expected location
-            if os.path.exists(expected_output):
-                # Move it to the desired output filename
-                shutil.move(expected_output, self.thermo_output_name)
-                print(f"Successfully created output file: {self.thermo_output_name}")
-                return True
-            else:
-                print(f"Thermochimica execution finished but no output file was created.")
-                print(f"Command output: {tchem_process.stdout}")
-                if tchem_process.stderr:
-                    print(f"Command errors: {tchem_process.stderr}")
-                return False
+            # Thermochimica writes output to a specific location
+            shared_output = os.path.isabs(self.output_path)
+            expected_output = self.output_path if shared_output else os.path.join(scratch, self.output_path)
+            if shared_output:
+                os.makedirs(os.path.dirname(expected_output), exist_ok=True)
+            
+            with _exclusive_lock(expected_output) if shared_output else nullcontext():
+                # A leftover from an interrupted run must not be taken for this one
+                if os.path.exists(expected_output):
+                    os.remove(expected_output)
+                
+                # Run Thermochimica in its scratch directory; a hung minimization is killed and retried
+                for attempt in range(1, self.retries + 2):
+                    self.last_attempts = attempt
+                    try:
+                        tchem_process = self._run_process([binary_path, deck_name], scratch, timeout)
+                        break
+                    except subprocess.TimeoutExpired:
+                        print(f"Thermochimica timed out after {timeout:g} s on {deck_name} and was killed "
+                              f"(attempt {attempt} of {self.retries + 1})")
+                else:
+                    self.last_timed_out = True
+                    with open(log_file, 'w') as f:
+                        f.write(f"Timed out after {timeout:g} s in each of {self.retries + 1} attempts\n")
+                    return False
+                
+                # Always save the stdout/stderr to a log file
+                with open(log_file, 'w') as f:
+                    f.write("STDOUT:\n")
+                    f.write(tchem_process.stdout)
+                    f.write("\nSTDERR:\n")
+                    f.write(tchem_process.stderr)
+                
+                # Check if thermoout.json was created at the expected location
+                if os.path.exists(expected_output):
+                    return collect(expected_output)
+                else:
+                    print(f"Thermochimica execution finished but no output file was created.")
+                    print(f"Command output: {tchem_process.stdout}")
+                    if tchem_process.stderr:
+                        print(f"Command errors: {tchem_process.stderr}")
+                    return False
         except Exception as e:
             print(f"Error running Thermochimica: {e}")
             return False
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    def _run_process(self, command, cwd, timeout):
+        """Run the binary through process_runner, or subprocess.run without one; TimeoutExpired on timeout."""
+        if self.process_runner is not None:
+            return self.process_runner(command, cwd, timeout)
+        return subprocess.run(command, cwd=cwd, capture_output=True, text=True, check=False, timeout=timeout)
 
     def tc_input(self):
         """Makes Thermochimica input file based on fuel salt object"""
-        output = f'''! {self.header}
+        template, kept = self.deck_template(list(self.elements))
+        amounts = list(self.elements.values())
+        return template.format(self.header, *[amounts[position] for position in kept])
+
+    def deck_template(self, elements):
+        """
+        Compile the deck of tc_input for a fixed element order into a str.format template
+        
+        The template takes the header, then the amount of each kept element. Elements
+        unknown to ELEMENTS are skipped with a warning.
+        
+        Returns:
+            Tuple of the template and the positions in elements of the kept elements
+        """
+        def literal(text):
+            return str(text).replace('{', '{{').replace('}', '}}')
+        
+        kept = []
+        output = f'''! {{0}}
 
 ! Initialize variables:
-pressure          = 1
-temperature       = {self.temps_k}
+pressure          = {literal(self.pressure)}
+temperature       = {literal(self.temps_k)}
 '''
-        for e, v in self.elements.items():
-            if e.lower() in ELEMENTS:
-                z = ELEMENTS.index(e.lower())
-                output += f'mass({z})           = {v}     !{e}\n'
+        for position, e in enumerate(elements):
+            z = ATOMIC_NUMBERS.get(e.lower())
+            if z is not None:
+                kept.append(position)
+                output += f'mass({z})           = {{{len(kept)}}}     !{literal(e)}\n'
             else:
                 print(f"WARNING: Element {e} not found in ELEMENTS list, skipping")
         
-        output += f'''temperature unit  = K
+        output += literal(f'''temperature unit  = K
 pressure unit     = atm
 mass unit         = moles
 data file         = {self.datafile_path}
@@ -102,7 +386,54 @@ write json        = .TRUE.
 reinitialization  = .FALSE.
 fuzzy             = .FALSE.
 gibbs min         = .FALSE.
+''')
+        return output, kept
+
+    def calculation_list_input(self, calculations, warm_start=False):
+        """
+        Makes a Thermochimica calculation list input file (RunCalculationList)
+        
+        Args:
+            calculations: Molar amounts of elements of each calculation; all calculations
+                          share the temperature and pressure of the wrapper
+            warm_start: Seed each calculation with the phase assemblage and chemical
+                        potentials of the previous one (Thermochimica reinitialization)
+        """
+        atomic_numbers = {}
+        unknown = set()
+        for elements in calculations:
+            for e in elements:
+                if e.lower() in ATOMIC_NUMBERS:
+                    atomic_numbers[e.lower()] = ATOMIC_NUMBERS[e.lower()]
+                else:
+                    unknown.add(e)
+        for e in sorted(unknown):
+            print(f"WARNING: Element {e} not found in ELEMENTS list, skipping")
+        columns = sorted(atomic_numbers, key=atomic_numbers.get)
+        
+        output = f'''! {self.header}
+
+! Initialize variables:
+temperature unit  = K
+pressure unit     = atm
+mass unit         = moles
+data file         = {self.datafile_path}
+
+! Specify output and debug modes:
+print mode        = 1
+debug mode        = .FALSE.
+write json        = .TRUE.
+reinitialization  = {'.TRUE.' if warm_start else '.FALSE.'}
+
+! Calculations, one per row: temperature, pressure, then the mass of each element in iEl:
+nEl               = {len(columns)}
+iEl               = {' '.join(str(atomic_numbers[e]) for e in columns)}
+nCalc             = {len(calculations)}
 '''
+        for elements in calculations:
+            amounts = {e.lower(): v for e, v in elements.items()}
+            output += ' '.join([str(self.temps_k), str(self.pressure)] +
+                               [str(amounts.get(e, 0.0)) for e in columns]) + '\n'
         return output
 
 
@@ -117,8 +448,22 @@ class ThermochimicaInputGenerator:
                 pressure: str = "1",
                 datafile_path: str = None,
                 binary_path: str = None,
+                output_path: str = None,
+                cache_dir: str = None,
+                cache_max_bytes: int = DEFAULT_MAX_BYTES,
+                batch_size: int = 0,
+                warm_start: bool = False,
+                chains: int = 0,
+                adaptive_stride: int = 0,
+                adaptive_rtol: float = 0.05,
+                dedup_rtol: float = 0.0,
+                timeout: Optional[float] = None,
+                retries: int = 0,
+                max_concurrency: int = 0,
+                queue_dir: Optional[str] = None,
                 scale_factor: float = 1.0,
-                time_step_dir_template: str = "timestep_{time_step}"):
+                time_step_dir_template: str = "timestep_{time_step}",
+                surrogate_data: Optional[Dict[str, Any]] = None):
         """
         Initialize the Thermochimica input generator.
         
@@ -130,8 +475,34 @@ class ThermochimicaInputGenerator:
             pressure: Pressure for the Thermochimica calculation (atm)
             datafile_path: Path to Thermochimica data file (optional)
             binary_path: Path to Thermochimica binary (optional)
+            output_path: Where the binary writes thermoout.json (optional, discovered if omitted)
+            cache_dir: Directory of the persistent result cache (optional, no caching if omitted)
+            cache_max_bytes: Size bound of the result cache
+            batch_size: Time steps solved per Thermochimica process with a calculation list
+                        deck, sharing one parse of the data file (0 runs one process per time step)
+            warm_start: Run the time steps as ordered chains, each in one Thermochimica process
+                        that seeds every time step with the solution of the previous one
+                        (overrides batch_size)
+            chains: Number of warm start chains (0 uses one chain per CPU)
+            adaptive_stride: Spacing of the coarse time steps computed first in adaptive mode;
+                             intervals whose ends differ are bisected, the rest are interpolated
+                             (0 computes every time step)
+            adaptive_rtol: Relative change of the UF3/UF4 or Cr2+/Cr3+ ratio across an interval
+                           above which adaptive mode bisects it
+            dedup_rtol: Relative tolerance per element within which compositions (at the same
+                        temperature and pressure) are solved only once and the result is copied
+                        to the others; provenance goes to dedup_provenance.json (0 disables)
+            timeout: Seconds after which a Thermochimica run is killed (per calculation in
+                     batch and warm start mode; None waits indefinitely)
+            retries: Further attempts of a run that timed out
+            max_concurrency: Thermochimica processes run at once when run_calculations
+                             creates its own pool (0 uses one per CPU)
+            queue_dir: Work queue directory shared with Thermochimica_Work_Queue.py workers,
+                       possibly on other hosts; if given, the calculations run on those
+                       workers and their outputs are sent back through the queue
             scale_factor: Factor to multiply mole percentages by
             time_step_dir_template: Template for time step directory naming
+            surrogate_data: Already loaded surrogate vector data (skips reading json_file_path)
         """
         self.json_file_path = json_file_path
         self.output_dir = output_dir
@@ -139,17 +510,44 @@ class ThermochimicaInputGenerator:
         self.temperature = temperature
         self.pressure = pressure
         self.scale_factor = scale_factor
+        self.batch_size = batch_size
+        self.warm_start = warm_start
+        self.chains = chains
+        self.adaptive_stride = adaptive_stride
+        self.adaptive_rtol = adaptive_rtol
+        self.dedup_rtol = dedup_rtol
+        self.max_concurrency = max_concurrency
+        self.queue_dir = queue_dir
+        # Child CPU time is per process, so it cannot be attributed to runs sharing one process
+        self.measure_child_cpu = True
+        # Representative of each time step answered by a near-duplicate composition
+        self.dedup_provenance = OrderedDict()
         self.time_step_dir_template = time_step_dir_template
         
+        # Wall and Thermochimica CPU time per time step, filled by run_calculations
+        self.time_step_timings = {}
+        # Result cache hits, misses and evictions of the last run_calculations call
+        self.cache_stats = {}
+        
         # Initialize wrapper with optional custom paths
         self.tc = ThermochimicaWrapper(
             datafile_path=datafile_path,
-            binary_path=binary_path
+            binary_path=binary_path,
+            output_path=output_path,
+            cache=ThermochimicaResultCache(cache_dir, cache_max_bytes) if cache_dir else None
         )
+        self.tc.dedup_rtol = dedup_rtol
+        self.tc.timeout = timeout
+        self.tc.retries = retries
         
         # Create output directory if it doesn't exist
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
+        
+        # Use the in-memory surrogate vector when the caller already has it
+        if surrogate_data is not None:
+            self.surrogate_data = surrogate_data
+            return
             
         # Check if json file exists
         if not os.path.isfile(json_file_path):
@@ -167,28 +565,74 @@ class ThermochimicaInputGenerator:
         return os.path.join(self.output_dir, self.time_step_dir_template.format(time_step=time_step))
             
     def generate_input_files(self) -> None:
-        """Generate Thermochimica input files for each time step"""
+        """
+        Generate Thermochimica input files for each time step
+        
+        All decks are rendered at once: the compositions become a time step x element
+        array, each distinct element order is compiled into one deck template, and the
+        files are written by a thread pool. The decks are the same as those of
+        _generate_input_file.
+        """
         if "surrogate_vector" not in self.surrogate_data:
             raise ValueError("Invalid surrogate vector JSON format. Expected 'surrogate_vector' key.")
         
-        time_steps = self.surrogate_data["surrogate_vector"]
-        for time_step, composition in time_steps.items():
-            # Create directory for this time step
-            time_step_dir = self.get_time_step_dir(time_step)
-            if not os.path.exists(time_step_dir):
-                os.makedirs(time_step_dir)
-            
-            # Generate input file name
-            input_file_name = f"{self.main_file_name}_t{time_step}.ti"
-            input_file_path = os.path.join(time_step_dir, input_file_name)
-            
-            # Extract elements and mole percentages
-            elements_dict = self._extract_elements_mole_percent(composition)
-            
-            # Generate and write the input file
-            self._generate_input_file(input_file_path, elements_dict, time_step)
-            
-            print(f"Generated input file for time step {time_step}: {input_file_path}")
+        time_steps = list(self.surrogate_data["surrogate_vector"])
+        decks = self.render_input_files(time_steps)
+        paths = [os.path.join(self.get_time_step_dir(time_step), f"{self.main_file_name}_t{time_step}.ti")
+                 for time_step in time_steps]
+        
+        def write(item):
+            path, deck = item
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(deck)
+        
+        with ThreadPoolExecutor(max_workers=min(32, 4 * multiprocessing.cpu_count())) as threads:
+            list(threads.map(write, zip(paths, decks)))
+        
+        print(f"Generated {len(decks)} input files in {self.output_dir}")
+    
+    def composition_matrix(self, time_steps: List[str]) -> Tuple[List[str], List[Tuple[int, ...]], np.ndarray]:
+        """
+        Element amounts of the time steps as one array, as _extract_elements_mole_percent gives them.
+        
+        Returns:
+            The element symbols (lower case) of the columns, for each time step the columns
+            of its elements in the order of its composition, and the time step x element
+            array of scaled amounts (0 where a time step lacks an element)
+        """
+        columns = {}
+        layouts = []
+        rows = []
+        for time_step in time_steps:
+            row = {}
+            for element, data in self.surrogate_data["surrogate_vector"][time_step].items():
+                if "mole_percent" in data:
+                    row[columns.setdefault(element.lower(), len(columns))] = data["mole_percent"]
+            layouts.append(tuple(row))
+            rows.append(row)
+        
+        matrix = np.zeros((len(time_steps), len(columns)))
+        for index, row in enumerate(rows):
+            matrix[index, list(row)] = list(row.values())
+        return list(columns), layouts, matrix * self.scale_factor / 100.0
+    
+    def render_input_files(self, time_steps: List[str]) -> List[str]:
+        """Render the input decks of several time steps without touching the file system."""
+        elements, layouts, amounts = self.composition_matrix(time_steps)
+        self.tc.temps_k = self.temperature
+        self.tc.pressure = self.pressure
+        
+        templates = {}
+        decks = []
+        for time_step, layout, row in zip(time_steps, layouts, amounts.tolist()):
+            if layout not in templates:
+                template, kept = self.tc.deck_template([elements[column] for column in layout])
+                templates[layout] = (template, [layout[position] for position in kept])
+            template, kept = templates[layout]
+            header = f"Surrogate Vector Calculation for Time Step {time_step} (Scale Factor: {self.scale_factor})"
+            decks.append(template.format(header, *[row[column] for column in kept]))
+        return decks
     
     def _extract_elements_mole_percent(self, composition: Dict[str, Dict[str, float]]) -> Dict[str, float]:
         """
@@ -221,6 +665,7 @@ class ThermochimicaInputGenerator:
         # Set up Thermochimica object
         self.tc.header = f"Surrogate Vector Calculation for Time Step {time_step} (Scale Factor: {self.scale_factor})"
         self.tc.temps_k = self.temperature
+        self.tc.pressure = self.pressure
         self.tc.elements = elements
         self.tc.deck_name = os.path.basename(file_path)
         self.tc.thermo_output_name = os.path.join(os.path.dirname(file_path), 
@@ -230,16 +675,10 @@ class ThermochimicaInputGenerator:
         with open(file_path, 'w') as f:
             f.write(self.tc.tc_input())
 
-    def _run_tc_for_time_step(self, time_step: str) -> None:
+    def _run_tc_for_time_step(self, time_step: str) -> bool:
         """Helper function to run Thermochimica for a single time step."""
         time_step_dir = self.get_time_step_dir(time_step)
         input_file_name = f"{self.main_file_name}_t{time_step}.ti"
-        
-        # Save current directory to return to it later
-        current_dir = os.getcwd()
-
-        # Change to the time step directory
-        os.chdir(time_step_dir)
 
         # Set the deck name and output name
         self.tc.deck_name = input_file_name
@@ -247,23 +686,886 @@ class ThermochimicaInputGenerator:
 
         print(f"Running Thermochimica for time step {time_step}...")
 
-        success = self.tc.run_tc()
+        success = self.tc.run_tc(time_step_dir)
 
         if success:
             print(f"Successfully ran Thermochimica for time step {time_step}")
         else:
             print(f"Failed to run Thermochimica for time step {time_step}")
 
-        # Return to original directory
-        os.chdir(current_dir)
+        return success
+
+    def get_output_file(self, time_step: str) -> str:
+        """Path of the Thermochimica output JSON of a time step."""
+        return os.path.join(self.get_time_step_dir(time_step), f"{self.main_file_name}_t{time_step}.json")
+
+    def _timed_run_tc_for_time_step(self, time_step: str) -> Tuple[str, bool, Dict[str, float]]:
+        """Run a single time step and measure its wall time and the CPU time of Thermochimica."""
+        start_time = time.time()
+        start_cpu = self._child_cpu_time()
+
+        success = self._run_tc_for_time_step(time_step)
+
+        timing = {"wall_time": round(time.time() - start_time, 3)}
+        if self.tc.cache is not None:
+            timing["cache_hit"] = self.tc.last_cache_hit
+        if self.tc.last_similar is not None:
+            timing["deduplicated_from"] = f"cache:{self.tc.last_similar[0]}"
+            timing["relative_difference"] = self.tc.last_similar[1]
+        if self.tc.last_attempts > 1:
+            timing["attempts"] = self.tc.last_attempts
+        if self.tc.last_timed_out:
+            timing["timed_out"] = True
+        if start_cpu is not None:
+            timing["tc_cpu_time"] = round(self._child_cpu_time() - start_cpu, 3)
+        return time_step, success, timing
+
+    def _timed_run_tc_for_batch(self, batch: Tuple[int, List[str]]) -> List[Tuple[str, bool, Dict[str, float]]]:
+        """
+        Run a batch of time steps in a single Thermochimica process.
+        
+        Time steps found in the result cache are restored individually; the others are
+        written to one calculation list deck in <output_dir>/batches, so the data file
+        is parsed once per batch. In warm start mode the batch is a chain of consecutive
+        time steps and each calculation starts from the solution of the one before.
+        Without the calculation list binary every time step runs cold in its own process.
+        
+        Args:
+            batch: Batch number and the time steps of the batch
+        
+        Returns:
+            Time step, success and timing of each time step of the batch
+        """
+        batch_number, time_steps = batch
+        if not os.path.isfile(self.tc.calc_list_binary_path):
+            print(f"WARNING: {self.tc.calc_list_binary_path} not found, running batch {batch_number} "
+                  f"one time step at a time")
+            return [self._timed_run_tc_for_time_step(time_step) for time_step in time_steps]
+
+        start_time = time.time()
+        start_cpu = self._child_cpu_time()
+
+        success = {}
+        similar = {}
+        pending = []
+        attempts, timed_out = 0, False
+        for time_step in time_steps:
+            cache_key, hit = self.tc.restore_cached(self.get_time_step_dir(time_step),
+                                                    f"{self.main_file_name}_t{time_step}.ti",
+                                                    self.get_output_file(time_step))
+            if hit:
+                success[time_step] = True
+                if self.tc.last_similar is not None:
+                    similar[time_step] = self.tc.last_similar
+            else:
+                pending.append((time_step, cache_key))
+
+        if pending:
+            batch_dir = os.path.join(self.output_dir, "batches")
+            os.makedirs(batch_dir, exist_ok=True)
+            kind = 'chain' if self.warm_start else 'batch'
+            deck_name = f"{self.main_file_name}_{kind}{batch_number}.ti"
+
+            self.tc.header = (f"Calculation List for Time Steps {', '.join(ts for ts, _ in pending)} "
+                              f"(Scale Factor: {self.scale_factor})")
+            self.tc.temps_k = self.temperature
+            self.tc.pressure = self.pressure
+            calculations = [self._extract_elements_mole_percent(self.surrogate_data["surrogate_vector"][ts])
+                            for ts, _ in pending]
+            with open(os.path.join(batch_dir, deck_name), 'w') as f:
+                f.write(self.tc.calculation_list_input(calculations, warm_start=self.warm_start))
+
+            print(f"Running Thermochimica for {len(pending)} time steps in {kind} {batch_number}...")
+            successes = self.tc.run_calculation_list(batch_dir, deck_name,
+                                                     [self.get_output_file(ts) for ts, _ in pending],
+                                                     [cache_key for _, cache_key in pending])
+            attempts, timed_out = self.tc.last_attempts, self.tc.last_timed_out
+            for (time_step, _), ok in zip(pending, successes):
+                success[time_step] = ok
+                if ok:
+                    print(f"Successfully ran Thermochimica for time step {time_step}")
+                else:
+                    print(f"Failed to run Thermochimica for time step {time_step}")
+
+        # The process is shared, so its wall and CPU time are split evenly over the batch
+        timing = {"batch": batch_number,
+                  "wall_time": round((time.time() - start_time) / len(time_steps), 3)}
+        if start_cpu is not None:
+            timing["tc_cpu_time"] = round((self._child_cpu_time() - start_cpu) / len(time_steps), 3)
+
+        computed = {time_step for time_step, _ in pending}
+        results = []
+        for time_step in time_steps:
+            step_timing = dict(timing)
+            if self.tc.cache is not None:
+                step_timing["cache_hit"] = time_step not in computed
+            if time_step in computed and attempts > 1:
+                step_timing["attempts"] = attempts
+            if time_step in computed and timed_out:
+                step_timing["timed_out"] = True
+            if time_step in similar:
+                step_timing["deduplicated_from"] = f"cache:{similar[time_step][0]}"
+                step_timing["relative_difference"] = similar[time_step][1]
+            results.append((time_step, success[time_step], step_timing))
+        return results
 
-    def run_calculations(self) -> None:
-        """Run Thermochimica calculations in parallel."""
-        time_steps = list(self.surrogate_data["surrogate_vector"].keys())
+    def _child_cpu_time(self) -> Optional[float]:
+        """CPU time used by finished child processes, i.e. the Thermochimica binary."""
+        if resource is None or not self.measure_child_cpu:
+            return None
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
 
-        # Use multiprocessing to run calculations in parallel
-        with multiprocessing.Pool(processes=multiprocessing.cpu_count()) as pool:
-            pool.map(self._run_tc_for_time_step, time_steps)
+    def run_calculations(self,
+                         executor: Optional[Executor] = None,
+                         completed: Optional[Iterable[str]] = None,
+                         on_complete: Optional[Callable[[str], None]] = None,
+                         process_slots: Optional[threading.Semaphore] = None) -> Dict[str, bool]:
+        """
+        Run Thermochimica calculations in parallel.
+        
+        Args:
+            executor: Worker pool to submit the time steps to; if None up to
+                      max_concurrency Thermochimica processes are run for this call
+            completed: Time steps finished by an earlier, interrupted run; they are
+                       skipped if their output file still exists
+            on_complete: Called with each time step as soon as it succeeds
+            process_slots: Process budget shared with other calls (see run_calculation_set)
+        
+        Returns:
+            Dictionary mapping each time step to whether its calculation succeeded
+        """
+        if self.adaptive_stride > 0:
+            return self._run_adaptive(executor, completed, on_complete, process_slots)
+        return run_calculation_set({"": self}, executor, completed, on_complete, process_slots=process_slots)[""]
+
+    def _sampling_signature(self, time_step: str) -> Optional[Tuple[frozenset, Optional[float], Optional[float]]]:
+        """Stable phases and UF3/UF4 and Cr2+/Cr3+ ratios of a computed time step (None if unreadable)."""
+        from Phase_Analysis_and_Report_Gen2 import PhaseAnalysisReportGenerator
+        from RedoxAnalyzer4 import RedoxAnalyzer
+
+        try:
+            with open(self.get_output_file(time_step), 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        analyzer = RedoxAnalyzer({})
+        return (frozenset(PhaseAnalysisReportGenerator.present_phases(data)),
+                analyzer.calculate_uf3_uf4_ratio(data),
+                analyzer.calculate_cr2_cr3_ratio(data))
+
+    def _signatures_differ(self, first, second) -> bool:
+        """Whether the phase assemblage or a redox ratio changes between two sampled time steps."""
+        if first[0] != second[0]:
+            return True
+        for a, b in zip(first[1:], second[1:]):
+            if (a is None) != (b is None):
+                return True
+            if a is not None and abs(b - a) > self.adaptive_rtol * max(abs(a), abs(b)):
+                return True
+        return False
+
+    @staticmethod
+    def _interpolate(first: Any, second: Any, weight: float) -> Any:
+        """Linear interpolation of every number in two Thermochimica outputs of the same structure."""
+        if isinstance(first, dict) and isinstance(second, dict):
+            merged = OrderedDict()
+            for key in list(first) + [key for key in second if key not in first]:
+                if key in first and key in second:
+                    merged[key] = ThermochimicaInputGenerator._interpolate(first[key], second[key], weight)
+                else:
+                    merged[key] = first[key] if key in first else second[key]
+            return merged
+        numbers = (int, float)
+        if (isinstance(first, numbers) and isinstance(second, numbers)
+                and not isinstance(first, bool) and not isinstance(second, bool)):
+            return first + weight * (second - first)
+        return first if weight < 0.5 else second
+
+    def _run_adaptive(self,
+                      executor: Optional[Executor] = None,
+                      completed: Optional[Iterable[str]] = None,
+                      on_complete: Optional[Callable[[str], None]] = None,
+                      process_slots: Optional[threading.Semaphore] = None,
+                      label: str = "") -> Dict[str, bool]:
+        """
+        Run Thermochimica only where the phase assemblage or the redox state changes.
+        
+        Every adaptive_stride-th time step (and the last one) is computed first. Each
+        interval whose ends differ in their stable phases (the presence criterion of
+        Phase_Analysis_and_Report_Gen2) or whose UF3/UF4 or Cr2+/Cr3+ ratio changes by
+        more than adaptive_rtol is bisected, and the new midpoints are computed in the
+        next round, until no interval changes. The remaining time steps are filled by
+        linear interpolation between their computed neighbours; their output is marked
+        with an "interpolated" entry and listed in adaptive_sampling.json.
+        
+        With a label (the name of a sweep grid point), time steps are reported to
+        on_complete and looked up in completed as "<label>/<time step>".
+        """
+        def position(time_step):
+            return float(time_step) if time_step.replace('.', '', 1).isdigit() else float(index[time_step])
+
+        index = {time_step: i for i, time_step in enumerate(self.surrogate_data["surrogate_vector"].keys())}
+        ordered = sorted(index, key=position)
+        
+        success = {}
+        timings = {}
+        signatures = {}
+        cache_stats = {}
+        rounds = 0
+        to_run = sorted(set(ordered[::self.adaptive_stride]) | {ordered[-1]}, key=ordered.index) if ordered else []
+        
+        while to_run:
+            rounds += 1
+            print(f"Adaptive sampling round {rounds}: computing {len(to_run)} time steps")
+            success.update(run_calculation_set({label: self}, executor, completed, on_complete,
+                                               time_steps={label: to_run}, process_slots=process_slots)[label])
+            timings.update(self.time_step_timings)
+            for key, value in self.cache_stats.items():
+                cache_stats[key] = cache_stats.get(key, 0) + value if key in ("hits", "misses", "evictions") else value
+            for time_step in to_run:
+                if success[time_step]:
+                    signatures[time_step] = self._sampling_signature(time_step)
+            
+            # Bisect every interval between neighbouring computed time steps whose ends differ
+            anchors = [i for i, time_step in enumerate(ordered) if signatures.get(time_step) is not None]
+            to_run = []
+            for left, right in zip(anchors, anchors[1:]):
+                candidates = [ordered[i] for i in range(left + 1, right) if ordered[i] not in success]
+                if candidates and self._signatures_differ(signatures[ordered[left]], signatures[ordered[right]]):
+                    to_run.append(candidates[len(candidates) // 2])
+        
+        # Fill the time steps that were never computed
+        anchors = [i for i, time_step in enumerate(ordered) if signatures.get(time_step) is not None]
+        interpolated = OrderedDict()
+        for left, right in zip(anchors, anchors[1:]):
+            if right - left <= 1:
+                continue
+            first_step, second_step = ordered[left], ordered[right]
+            with open(self.get_output_file(first_step), 'r') as f:
+                first = json.load(f, object_pairs_hook=OrderedDict)
+            with open(self.get_output_file(second_step), 'r') as f:
+                second = json.load(f, object_pairs_hook=OrderedDict)
+            
+            for i in range(left + 1, right):
+                time_step = ordered[i]
+                if time_step in success:
+                    continue  # Computed but failed: left as a failure, not papered over
+                weight = (position(time_step) - position(first_step)) / (position(second_step) - position(first_step))
+                data = self._interpolate(first, second, weight)
+                for point in data.values():
+                    if isinstance(point, dict):
+                        point["interpolated"] = {"from": [first_step, second_step], "weight": round(weight, 6)}
+                with open(self.get_output_file(time_step), 'w') as f:
+                    json.dump(data, f)
+                log_file = self.get_output_file(time_step).replace('.json', '.log')
+                with open(log_file, 'w') as f:
+                    f.write(f"Not computed: interpolated between time steps {first_step} and {second_step} "
+                            f"(weight {weight:.6f}) by adaptive sampling\n")
+                success[time_step] = True
+                timings[time_step] = {"interpolated": True, "success": True}
+                interpolated[time_step] = [first_step, second_step]
+        
+        for time_step in ordered:
+            if time_step not in success:
+                success[time_step] = False
+                timings[time_step] = {"success": False}
+        
+        self.time_step_timings = {time_step: timings[time_step] for time_step in index}
+        self.cache_stats = cache_stats
+        
+        computed = [time_step for time_step in ordered if time_step in signatures]
+        summary = {
+            "stride": self.adaptive_stride,
+            "rtol": self.adaptive_rtol,
+            "rounds": rounds,
+            "computed": computed,
+            "interpolated": interpolated,
+            "failed": [time_step for time_step in ordered if not success[time_step]]
+        }
+        with open(os.path.join(self.output_dir, ADAPTIVE_SUMMARY_FILE), 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Adaptive sampling: computed {len(computed)} of {len(ordered)} time steps in {rounds} rounds, "
+              f"interpolated {len(interpolated)}")
+        
+        return {time_step: success[time_step] for time_step in index}
+
+    def _tasks(self, time_steps: List[str]) -> List[Any]:
+        """
+        Split time steps into tasks: single time steps, numbered batches in batch mode,
+        or in warm start mode one numbered chain of consecutive time steps per worker.
+        """
+        if self.warm_start:
+            # Numeric time steps first, in numeric order, then any others by name
+            ordered = sorted(time_steps, key=lambda time_step: (not time_step.isdigit(),
+                                                                int(time_step) if time_step.isdigit() else 0,
+                                                                time_step))
+            chains = max(1, min(self.chains or multiprocessing.cpu_count(), len(ordered)))
+            size = -(-len(ordered) // chains) if ordered else 1
+            return [(number, ordered[start:start + size])
+                    for number, start in enumerate(range(0, len(ordered), size))]
+        if self.batch_size > 0:
+            return [(number, time_steps[start:start + self.batch_size])
+                    for number, start in enumerate(range(0, len(time_steps), self.batch_size))]
+        return list(time_steps)
+
+    def _run_task(self, task: Any) -> List[Tuple[str, bool, Dict[str, float]]]:
+        """Run one task made by _tasks and return the result of each of its time steps."""
+        if self.warm_start or self.batch_size > 0:
+            return self._timed_run_tc_for_batch(task)
+        return [self._timed_run_tc_for_time_step(task)]
+
+    def task_payload(self, task: Any) -> Dict[str, Any]:
+        """
+        Everything a worker process needs to run one task made by _tasks.
+        
+        Only the compositions of the task's time steps go with the deck settings and
+        paths, so submitting a task never copies the whole surrogate vector;
+        task_generator rebuilds a generator from the payload on the worker side.
+        """
+        vector = self.surrogate_data["surrogate_vector"]
+        cache = self.tc.cache
+        return {
+            "task": task,
+            "surrogate_vector": {time_step: vector[time_step] for time_step in _task_time_steps(task)},
+            "options": {
+                "output_dir": self.output_dir,
+                "main_file_name": self.main_file_name,
+                "temperature": self.temperature,
+                "pressure": self.pressure,
+                "datafile_path": self.tc.datafile_path,
+                "binary_path": self.tc.binary_path,
+                "output_path": self.tc.output_path,
+                "cache_dir": cache.cache_dir if cache is not None else None,
+                "cache_max_bytes": cache.max_bytes if cache is not None else DEFAULT_MAX_BYTES,
+                "batch_size": self.batch_size,
+                "warm_start": self.warm_start,
+                "dedup_rtol": self.dedup_rtol,
+                "timeout": self.tc.timeout,
+                "retries": self.tc.retries,
+                "scale_factor": self.scale_factor,
+                "time_step_dir_template": self.time_step_dir_template,
+            },
+            "calc_list_binary_path": self.tc.calc_list_binary_path,
+            "scratch_dir": self.tc.scratch_dir,
+        }
+
+
+def _task_time_steps(task: Any) -> List[str]:
+    """Time steps of a task made by ThermochimicaInputGenerator._tasks."""
+    return task[1] if isinstance(task, tuple) else [task]
+
+
+def task_generator(payload: Dict[str, Any], **overrides) -> ThermochimicaInputGenerator:
+    """
+    Rebuild the generator of a task from its task_payload, in the worker running it.
+    
+    Args:
+        payload: Made by ThermochimicaInputGenerator.task_payload
+        overrides: ThermochimicaInputGenerator arguments replacing those of the payload
+    """
+    generator = ThermochimicaInputGenerator("", surrogate_data={"surrogate_vector": payload["surrogate_vector"]},
+                                            **dict(payload["options"], **overrides))
+    if "binary_path" not in overrides:
+        generator.tc.calc_list_binary_path = payload["calc_list_binary_path"]
+    generator.tc.scratch_dir = payload["scratch_dir"]
+    return generator
+
+
+def grid_point_name(temperature: str, pressure: str) -> str:
+    """Directory name of a temperature/pressure grid point, e.g. T900_P1."""
+    return f"T{temperature}_P{pressure}"
+
+
+def _deduplicate(label: str, generator: ThermochimicaInputGenerator, time_steps: List[str],
+                 clusters: Dict[Tuple, List], members: Dict[Tuple[str, str], Tuple[str, str, float]]) -> List[str]:
+    """
+    Keep one representative time step per cluster of near-duplicate compositions.
+    
+    A time step joins the closest representative (same temperature, pressure and data
+    file) whose composition agrees within generator.dedup_rtol for every element, and
+    is recorded in members; otherwise it becomes a representative itself.
+    
+    Returns:
+        The time steps to compute
+    """
+    representatives = clusters.setdefault((generator.temperature, generator.pressure, generator.tc.datafile_path), [])
+    kept = []
+    for time_step in time_steps:
+        composition = generator._extract_elements_mole_percent(generator.surrogate_data["surrogate_vector"][time_step])
+        match = None
+        for rep_label, rep_step, rep_composition in representatives:
+            difference = relative_difference(composition, rep_composition)
+            if difference <= generator.dedup_rtol and (match is None or difference < match[2]):
+                match = (rep_label, rep_step, difference)
+        if match is None:
+            representatives.append((label, time_step, composition))
+            kept.append(time_step)
+        else:
+            members[(label, time_step)] = match
+    return kept
+
+
+def _run_job(label: str, payload: Dict[str, Any]) -> Tuple[str, List[Tuple[str, bool, Dict[str, float]]]]:
+    """Run one task, sent as its task_payload, in a worker process."""
+    return label, task_generator(payload)._run_task(payload["task"])
+
+
+def _run_job_in_thread(job: Tuple[str, ThermochimicaInputGenerator, Any],
+                       processes: Optional["_EventLoopProcesses"] = None) -> Tuple[str, List[Tuple[str, bool, Dict[str, float]]]]:
+    """
+    Run one task of a generator in a worker thread, on copies that keep its per-run state private.
+    
+    With processes, the Thermochimica binary is run by that event loop instead of the thread.
+    """
+    label, generator, task = job
+    generator = copy.copy(generator)
+    generator.tc = copy.copy(generator.tc)
+    generator.tc._cache_decks = {}
+    generator.tc.process_runner = processes
+    generator.measure_child_cpu = False
+    return label, generator._run_task(task)
+
+
+def _run_job_remote(label: str, payload: Dict[str, Any]) -> Tuple[str, List[Tuple[str, bool, Dict[str, float]]], Dict[str, bytes]]:
+    """
+    Run one task, sent as its task_payload, on a queue worker, in a private directory of that host.
+    
+    The decks are written again there, with the binary and data file of the worker host
+    if $THERMOCHIMICA_BINARY / $THERMOCHIMICA_DATAFILE are set, and the files produced
+    (output JSON and logs) are returned by their path relative to the output directory.
+    """
+    task = payload["task"]
+    overrides = {}
+    if os.environ.get("THERMOCHIMICA_BINARY"):
+        overrides["binary_path"] = os.environ["THERMOCHIMICA_BINARY"]
+        overrides["output_path"] = os.environ.get("THERMOCHIMICA_OUTPUT")
+    elif os.environ.get("THERMOCHIMICA_OUTPUT"):
+        overrides["output_path"] = os.environ["THERMOCHIMICA_OUTPUT"]
+    if os.environ.get("THERMOCHIMICA_DATAFILE"):
+        overrides["datafile_path"] = os.environ["THERMOCHIMICA_DATAFILE"]
+    # The result cache is used only where the worker can reach it
+    cache_dir = payload["options"]["cache_dir"]
+    if cache_dir is not None and not os.path.isdir(cache_dir):
+        overrides["cache_dir"] = None
+
+    with tempfile.TemporaryDirectory(prefix="tc_worker_") as work_dir:
+        generator = task_generator(payload, output_dir=work_dir, **overrides)
+        for time_step in _task_time_steps(task):
+            time_step_dir = generator.get_time_step_dir(time_step)
+            os.makedirs(time_step_dir, exist_ok=True)
+            composition = generator.surrogate_data["surrogate_vector"][time_step]
+            generator._generate_input_file(os.path.join(time_step_dir, f"{generator.main_file_name}_t{time_step}.ti"),
+                                           generator._extract_elements_mole_percent(composition), time_step)
+        task_results = generator._run_task(task)
+
+        files = {}
+        for root, _, names in os.walk(work_dir):
+            for name in names:
+                if not name.endswith(".ti"):
+                    path = os.path.join(root, name)
+                    with open(path, 'rb') as f:
+                        files[os.path.relpath(path, work_dir)] = f.read()
+    return label, task_results, files
+
+
+class _EventLoopProcesses:
+    """
+    Process runner of ThermochimicaWrapper that starts the binary as an asyncio subprocess.
+    
+    Called from worker threads, it hands each run to the event loop and waits for its
+    result. The loop runs at most concurrency processes at once and kills a process
+    that exceeds its timeout. With shared_slots, the calling thread also holds one of
+    those slots while its process runs, so event loops sharing them stay within one budget.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, concurrency: int,
+                 shared_slots: Optional[threading.Semaphore] = None):
+        self.loop = loop
+        self.slots = asyncio.Semaphore(concurrency)
+        self.shared_slots = shared_slots
+
+    async def run(self, command: List[str], cwd: str, timeout: Optional[float]) -> subprocess.CompletedProcess:
+        """Run command in cwd, raising subprocess.TimeoutExpired after timeout seconds."""
+        async with self.slots:
+            process = await asyncio.create_subprocess_exec(*command, cwd=cwd, stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.PIPE)
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise subprocess.TimeoutExpired(command, timeout)
+        return subprocess.CompletedProcess(command, process.returncode, stdout.decode(errors="replace"),
+                                           stderr.decode(errors="replace"))
+
+    def __call__(self, command: List[str], cwd: str, timeout: Optional[float]) -> subprocess.CompletedProcess:
+        with self.shared_slots if self.shared_slots is not None else nullcontext():
+            return asyncio.run_coroutine_threadsafe(self.run(command, cwd, timeout), self.loop).result()
+
+
+async def _run_jobs_async(jobs: List[Tuple[str, ThermochimicaInputGenerator, Any]], concurrency: int,
+                          record: Callable[[str, List[Tuple[str, bool, Dict[str, float]]]], None],
+                          process_slots: Optional[threading.Semaphore] = None) -> None:
+    """
+    Run jobs with at most concurrency Thermochimica processes at once, in the given order.
+    
+    The processes are asyncio subprocesses of this event loop. The file work of each
+    job (decks, result cache, collecting outputs) is blocking and runs on a thread, and
+    there are more threads than process slots so that cache restores and output
+    collection go on while the slots are busy. record is called on the event loop as
+    each job finishes. process_slots bounds the processes together with other job sets.
+    """
+    loop = asyncio.get_running_loop()
+    processes = _EventLoopProcesses(loop, concurrency, process_slots)
+    # Threads pick jobs in submission order and wait for slots in arrival order, so the longest jobs start first
+    with ThreadPoolExecutor(max_workers=min(len(jobs), 2 * concurrency)) as threads:
+        futures = [loop.run_in_executor(threads, _run_job_in_thread, job, processes) for job in jobs]
+        for finished in asyncio.as_completed(futures):
+            record(*(await finished))
+
+
+def _load_runtimes(generator: ThermochimicaInputGenerator) -> Dict[str, float]:
+    """Wall time per time step measured by earlier runs of a generator."""
+    try:
+        with open(os.path.join(generator.output_dir, RUNTIME_HISTORY_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_runtimes(generator: ThermochimicaInputGenerator, runtimes: Dict[str, float]) -> None:
+    """Add the wall time of each time step computed by the last run to the runtime history."""
+    for time_step, timing in generator.time_step_timings.items():
+        if timing.get("success") and timing.get("cache_hit") is not True and "wall_time" in timing:
+            runtimes[time_step] = timing["wall_time"]
+    with open(os.path.join(generator.output_dir, RUNTIME_HISTORY_FILE), 'w') as f:
+        json.dump(runtimes, f, indent=2)
+
+
+class _Progress:
+    """Progress line with an ETA weighted by the expected runtime of each time step."""
+
+    def __init__(self, total_steps: int, expected_total: float, interval: float = 1.0):
+        self.total_steps = total_steps
+        self.expected_total = expected_total
+        self.interval = interval
+        self.done_steps = 0
+        self.expected_done = 0.0
+        self.start = time.time()
+        self.last_print = 0.0
+
+    def update(self, steps: int, expected: float) -> None:
+        """Count a finished job and print the progress line at most once per interval (and at the end)."""
+        self.done_steps += steps
+        self.expected_done += expected
+        now = time.time()
+        if now - self.last_print < self.interval and self.done_steps < self.total_steps:
+            return
+        self.last_print = now
+        elapsed = now - self.start
+        if self.expected_done > 0:
+            eta = f"{elapsed * (self.expected_total - self.expected_done) / self.expected_done:.0f} s"
+        else:
+            eta = "unknown"
+        print(f"Progress: {self.done_steps}/{self.total_steps} time steps "
+              f"({100.0 * self.done_steps / max(1, self.total_steps):.0f}%), "
+              f"{elapsed:.0f} s elapsed, ETA {eta}", flush=True)
+
+
+def run_calculation_set(generators: Dict[str, ThermochimicaInputGenerator],
+                        executor: Optional[Executor] = None,
+                        completed: Optional[Iterable[str]] = None,
+                        on_complete: Optional[Callable[[str], None]] = None,
+                        time_steps: Optional[Dict[str, List[str]]] = None,
+                        process_slots: Optional[threading.Semaphore] = None) -> Dict[str, Dict[str, bool]]:
+    """
+    Run the Thermochimica calculations of several generators as one job set.
+    
+    The tasks of all generators are submitted to the same pool, so the workers stay
+    busy until the last calculation of the whole set (e.g. a sweep grid) is done.
+    Tasks start longest-expected first, using the wall times of earlier runs kept in
+    each output directory, so a slow time step does not end up alone at the tail.
+    
+    Args:
+        generators: Generators by label. Time steps are reported to on_complete and looked
+                    up in completed as "<label>/<time step>", or as is for an empty label
+        executor: Worker pool of a caller that runs the tasks elsewhere (e.g. on remote
+                  hosts); if None the tasks run as Thermochimica subprocesses awaited by an
+                  event loop, at most max_concurrency at a time. Ignored if a generator has
+                  a queue_dir: the tasks then go to the workers of that queue
+        completed: Time steps finished by an earlier, interrupted run; they are
+                   skipped if their output file still exists
+        on_complete: Called with each time step as soon as it succeeds
+        time_steps: Time steps to run per label (default: all time steps of the generator)
+        process_slots: Semaphore shared by job sets running at the same time (e.g. the stages
+                       of a workflow campaign); each Thermochimica process holds one slot
+    
+    Returns:
+        For each label, a dictionary mapping each time step to whether its calculation succeeded
+    """
+    def unit(label, time_step):
+        return f"{label}/{time_step}" if label else time_step
+
+    completed = set(completed or [])
+    all_time_steps = {}
+    skipped = {}
+    clusters = {}
+    members = {}
+    jobs = []
+    runtimes = {}
+    for label, generator in generators.items():
+        runtimes[label] = _load_runtimes(generator)
+        if time_steps is not None and label in time_steps:
+            selected = list(time_steps[label])
+        else:
+            selected = list(generator.surrogate_data["surrogate_vector"].keys())
+        all_time_steps[label] = selected
+        skipped[label] = {time_step for time_step in selected
+                          if unit(label, time_step) in completed
+                          and os.path.isfile(generator.get_output_file(time_step))}
+        to_run = [time_step for time_step in selected if time_step not in skipped[label]]
+        if generator.dedup_rtol > 0:
+            to_run = _deduplicate(label, generator, to_run, clusters, members)
+        jobs.extend((label, generator, task) for task in generator._tasks(to_run))
+
+    resumed = sum(len(time_steps) for time_steps in skipped.values())
+    if resumed:
+        print(f"Skipping {resumed} time steps completed by an earlier run")
+    if members:
+        print(f"Deduplicated {len(members)} time steps with near-identical compositions")
+
+    # Steps never timed are expected to take as long as a typical step
+    known = [seconds for history in runtimes.values() for seconds in history.values()]
+    typical = statistics.median(known) if known else 1.0
+
+    def expected(label, steps):
+        return sum(runtimes[label].get(time_step, typical) for time_step in steps)
+
+    jobs.sort(key=lambda job: expected(job[0], _task_time_steps(job[2])), reverse=True)
+    progress = _Progress(sum(len(_task_time_steps(task)) for _, _, task in jobs),
+                         sum(expected(label, _task_time_steps(task)) for label, _, task in jobs))
+
+    results = {label: {} for label in generators}
+    manifests = {label: OutputManifest(generator.output_dir) for label, generator in generators.items()}
+    manifest_saved = time.monotonic()
+
+    def save_manifests():
+        nonlocal manifest_saved
+        for manifest in manifests.values():
+            if manifest.changed:
+                try:
+                    manifest.save()
+                except OSError as e:
+                    print(f"Warning: could not save the output manifest {manifest.path}: {e}")
+        manifest_saved = time.monotonic()
+
+    def record(label, task_results):
+        for time_step, success, timing in task_results:
+            results[label][time_step] = (success, timing)
+            manifests[label].record(os.path.basename(generators[label].get_time_step_dir(time_step)))
+            if success and on_complete is not None:
+                on_complete(unit(label, time_step))
+        steps = [time_step for time_step, _, _ in task_results]
+        progress.update(len(steps), expected(label, steps))
+        if time.monotonic() - manifest_saved >= MANIFEST_SAVE_INTERVAL:
+            save_manifests()
+
+    queue_dir = next((generator.queue_dir for generator in generators.values() if generator.queue_dir), None)
+    if queue_dir is not None and jobs:
+        with WorkQueueExecutor(queue_dir) as queue:
+            futures = {queue.submit(_run_job_remote, label, generator.task_payload(task)): (label, task)
+                       for label, generator, task in jobs}
+
+            def collect(future):
+                label, task = futures.pop(future)
+                try:
+                    label, task_results, files = future.result()
+                except Exception as e:
+                    # A task lost by its workers (or failing on them) fails its time steps only
+                    print(f"Work queue task of {unit(label, _task_time_steps(task)[0])} failed: {e}")
+                    record(label, [(time_step, False, {"error": str(e)}) for time_step in _task_time_steps(task)])
+                    return
+                for relative_path, content in files.items():
+                    path = os.path.join(generators[label].output_dir, relative_path)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, 'wb') as f:
+                        f.write(content)
+                record(label, task_results)
+
+            try:
+                for future in as_completed(list(futures)):
+                    collect(future)
+            except BaseException:
+                # Withdraw the unclaimed tasks, so leaving the block does not wait for them, and
+                # keep the results that arrived in the meantime
+                queue.shutdown(cancel_futures=True)
+                for future in [future for future in futures if future.done() and not future.cancelled()]:
+                    collect(future)
+                save_manifests()
+                raise
+    elif executor is not None:
+        futures = [executor.submit(_run_job, label, generator.task_payload(task)) for label, generator, task in jobs]
+        for future in as_completed(futures):
+            record(*future.result())
+    elif jobs:
+        concurrency = max(generator.max_concurrency for generator in generators.values()) \
+            or multiprocessing.cpu_count()
+        asyncio.run(_run_jobs_async(jobs, min(concurrency, len(jobs)), record, process_slots))
+
+    # Fan the result of each representative out to the members of its cluster
+    for (label, time_step), (rep_label, rep_step, difference) in members.items():
+        generator = generators[label]
+        success = results[rep_label][rep_step][0]
+        if success:
+            shutil.copyfile(generators[rep_label].get_output_file(rep_step), generator.get_output_file(time_step))
+            with open(generator.get_output_file(time_step).replace('.json', '.log'), 'w') as f:
+                f.write(f"Not computed: copied from time step {unit(rep_label, rep_step)}, whose composition "
+                        f"agrees within {difference:.3e} (relative)\n")
+            if on_complete is not None:
+                on_complete(unit(label, time_step))
+        results[label][time_step] = (success, {"deduplicated_from": unit(rep_label, rep_step),
+                                               "relative_difference": difference})
+
+    # Time steps not run here (resumed, deduplicated) are recorded unless their entries are still current
+    for label, generator in generators.items():
+        for time_step in all_time_steps[label]:
+            name = os.path.basename(generator.get_time_step_dir(time_step))
+            if manifests[label].current(name) is None:
+                manifests[label].record(name)
+    save_manifests()
+
+    for label, generator in generators.items():
+        for time_step in skipped[label]:
+            results[label][time_step] = (True, {"resumed": True})
+        generator.time_step_timings = {time_step: dict(results[label][time_step][1],
+                                                       success=results[label][time_step][0])
+                                       for time_step in all_time_steps[label]}
+        _save_runtimes(generator, runtimes[label])
+
+        if generator.dedup_rtol > 0:
+            for time_step, timing in generator.time_step_timings.items():
+                if "deduplicated_from" in timing:
+                    generator.dedup_provenance[time_step] = {"representative": timing["deduplicated_from"],
+                                                             "relative_difference": timing["relative_difference"]}
+            with open(os.path.join(generator.output_dir, DEDUP_PROVENANCE_FILE), 'w') as f:
+                json.dump({"rtol": generator.dedup_rtol, "members": generator.dedup_provenance}, f, indent=2)
+
+    # Workers keep their own counters, so the statistics are rebuilt from the per-step results
+    cached = [generator for generator in generators.values() if generator.tc.cache is not None]
+    if cached:
+        evictions = cached[0].tc.cache.evict()
+        usage = cached[0].tc.cache.usage()
+        for generator in cached:
+            timings = generator.time_step_timings.values()
+            generator.cache_stats = {"hits": sum(1 for timing in timings if timing.get("cache_hit")),
+                                     "misses": sum(1 for timing in timings if timing.get("cache_hit") is False),
+                                     "evictions": evictions}
+            generator.cache_stats.update(usage)
+        print(f"Thermochimica result cache: {sum(g.cache_stats['hits'] for g in cached)} hits, "
+              f"{sum(g.cache_stats['misses'] for g in cached)} misses, {evictions} evictions")
+
+    return {label: {time_step: results[label][time_step][0] for time_step in all_time_steps[label]}
+            for label in generators}
+
+
+class ThermochimicaSweep:
+    """Time step x temperature x pressure grid of Thermochimica calculations"""
+
+    def __init__(self,
+                 json_file_path: str,
+                 output_dir: str = "tc_inputs",
+                 temperatures: Iterable[str] = ("900",),
+                 pressures: Iterable[str] = ("1",),
+                 surrogate_data: Optional[Dict[str, Any]] = None,
+                 **generator_options):
+        """
+        Initialize one input generator per grid point.
+        
+        Every grid point gets its own directory, <output_dir>/T<temperature>_P<pressure>,
+        laid out like a regular tc_inputs directory (timestep_N subdirectories).
+        
+        Args:
+            json_file_path: Path to the surrogate_vector.json file
+            output_dir: Directory holding the grid point directories and the sweep index
+            temperatures: Temperatures of the grid (K)
+            pressures: Pressures of the grid (atm)
+            surrogate_data: Already loaded surrogate vector data (skips reading json_file_path)
+            generator_options: Further ThermochimicaInputGenerator arguments shared by all grid points
+        """
+        self.output_dir = output_dir
+        self.temperatures = [str(temperature) for temperature in temperatures]
+        self.pressures = [str(pressure) for pressure in pressures]
+        self.generators = OrderedDict()
+        
+        # Wall and Thermochimica CPU time per grid point and time step, filled by run_calculations
+        self.time_step_timings = {}
+        # Result cache statistics of the whole grid, filled by run_calculations
+        self.cache_stats = {}
+        
+        for temperature in self.temperatures:
+            for pressure in self.pressures:
+                name = grid_point_name(temperature, pressure)
+                generator = ThermochimicaInputGenerator(json_file_path,
+                                                        output_dir=os.path.join(output_dir, name),
+                                                        temperature=temperature,
+                                                        pressure=pressure,
+                                                        surrogate_data=surrogate_data,
+                                                        **generator_options)
+                # The surrogate vector is read once and shared by all grid points
+                surrogate_data = generator.surrogate_data
+                self.generators[name] = generator
+
+    def generate_input_files(self) -> None:
+        """Generate the input files of every grid point and write the sweep index"""
+        for generator in self.generators.values():
+            generator.generate_input_files()
+        
+        index = {
+            "temperatures": [float(temperature) for temperature in self.temperatures],
+            "pressures": [float(pressure) for pressure in self.pressures],
+            "grid_points": OrderedDict(
+                (name, {"temperature": float(generator.temperature),
+                        "pressure": float(generator.pressure),
+                        "directory": name})
+                for name, generator in self.generators.items())
+        }
+        index_path = os.path.join(self.output_dir, SWEEP_INDEX_FILE)
+        with open(index_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        print(f"Generated {len(self.generators)} grid points, index written to {index_path}")
+
+    def run_calculations(self,
+                         executor: Optional[Executor] = None,
+                         completed: Optional[Iterable[str]] = None,
+                         on_complete: Optional[Callable[[str], None]] = None,
+                         process_slots: Optional[threading.Semaphore] = None) -> Dict[str, Dict[str, bool]]:
+        """
+        Run the calculations of all grid points as one job set.
+        
+        With adaptive sampling, each grid point is sampled on its own instead, one grid
+        point after the other, as the time steps to compute depend on its own results.
+        
+        Args:
+            executor, completed, on_complete, process_slots: As in run_calculation_set; time
+                steps are named "<grid point>/<time step>", e.g. "T900_P1/12"
+        
+        Returns:
+            For each grid point, a dictionary mapping each time step to whether its calculation succeeded
+        """
+        if any(generator.adaptive_stride > 0 for generator in self.generators.values()):
+            results = {name: generator._run_adaptive(executor, completed, on_complete, process_slots, label=name)
+                       for name, generator in self.generators.items()}
+        else:
+            results = run_calculation_set(self.generators, executor, completed, on_complete,
+                                          process_slots=process_slots)
+        
+        self.time_step_timings = {name: generator.time_step_timings for name, generator in self.generators.items()}
+        cached = [generator.cache_stats for generator in self.generators.values() if generator.cache_stats]
+        if cached:
+            self.cache_stats = dict(cached[0], hits=sum(stats["hits"] for stats in cached),
+                                    misses=sum(stats["misses"] for stats in cached))
+        return results
 
 
 def main():
@@ -274,16 +1576,47 @@ def main():
                         help="Directory to store the generated input files")
     parser.add_argument("-n", "--name", default="ThEIRNE_Cycle", 
                         help="Base name for the input files")
-    parser.add_argument("-t", "--temperature", default="900", 
-                        help="Temperature for the Thermochimica calculation (K)")
-    parser.add_argument("-p", "--pressure", default="1", 
-                        help="Pressure for the Thermochimica calculation (atm)")
+    parser.add_argument("-t", "--temperature", nargs="+", default=["900"],
+                        help="Temperature for the Thermochimica calculation (K); several values sweep a grid")
+    parser.add_argument("-p", "--pressure", nargs="+", default=["1"],
+                        help="Pressure for the Thermochimica calculation (atm); several values sweep a grid")
     parser.add_argument("-r", "--run", action="store_true", 
                         help="Run Thermochimica calculations after generating input files")
     parser.add_argument("--datafile", 
                         help="Path to Thermochimica data file")
     parser.add_argument("--binary", 
                         help="Path to Thermochimica binary")
+    parser.add_argument("--tc-output",
+                        help="Where the binary writes thermoout.json (default: discovered from the binary location)")
+    parser.add_argument("--cache-dir",
+                        help="Directory of the persistent Thermochimica result cache (default: no caching)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help="Size bound of the result cache in MB (default: 1024)")
+    parser.add_argument("-b", "--batch-size", type=int, default=0,
+                        help="Time steps per Thermochimica process using a calculation list deck "
+                             "(default: 0, one process per time step)")
+    parser.add_argument("-w", "--warm-start", action="store_true",
+                        help="Run the time steps as ordered chains, seeding each from the previous solution")
+    parser.add_argument("--chains", type=int, default=0,
+                        help="Number of warm start chains (default: one per CPU)")
+    parser.add_argument("-a", "--adaptive", type=int, default=0, metavar="STRIDE",
+                        help="Adaptive sampling: compute every STRIDE-th time step, bisect intervals where the "
+                             "phases or redox ratios change and interpolate the rest (default: 0, off)")
+    parser.add_argument("--adaptive-rtol", type=float, default=0.05,
+                        help="Relative redox ratio change that triggers bisection (default: 0.05)")
+    parser.add_argument("--dedup-rtol", type=float, default=0.0,
+                        help="Solve compositions agreeing within this relative tolerance per element only once "
+                             "(default: 0, off)")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Thermochimica processes run at once (default: one per CPU)")
+    parser.add_argument("--timeout", type=float,
+                        help="Seconds after which a Thermochimica run is killed (per calculation in batch "
+                             "and warm start mode; default: no limit)")
+    parser.add_argument("--retries", type=int, default=0,
+                        help="Further attempts of a run that timed out (default: 0)")
+    parser.add_argument("--queue-dir",
+                        help="Run the calculations on the Thermochimica_Work_Queue.py workers serving this "
+                             "shared directory (default: run them on this host)")
     parser.add_argument("-s", "--scale", type=float, default=1.0,
                         help="Scale factor to multiply mole percentages (default: 1.0)")
     parser.add_argument("-d", "--dir-template", default="timestep_{time_step}",
@@ -292,17 +1625,37 @@ def main():
     args = parser.parse_args()
     
     try:
-        generator = ThermochimicaInputGenerator(
-            json_file_path=args.json_file,
-            output_dir=args.output_dir,
+        options = dict(
             main_file_name=args.name,
-            temperature=args.temperature,
-            pressure=args.pressure,
             datafile_path=args.datafile,
             binary_path=args.binary,
+            output_path=args.tc_output,
+            cache_dir=args.cache_dir,
+            cache_max_bytes=args.cache_size * 1024 ** 2,
+            batch_size=args.batch_size,
+            warm_start=args.warm_start,
+            chains=args.chains,
+            adaptive_stride=args.adaptive,
+            adaptive_rtol=args.adaptive_rtol,
+            dedup_rtol=args.dedup_rtol,
+            timeout=args.timeout,
+            retries=args.retries,
+            max_concurrency=args.jobs,
+            queue_dir=args.queue_dir,
             scale_factor=args.scale,
             time_step_dir_template=args.dir_template
         )
+        if len(args.temperature) > 1 or len(args.pressure) > 1:
+            generator = ThermochimicaSweep(args.json_file, args.output_dir,
+                                           temperatures=args.temperature, pressures=args.pressure, **options)
+        else:
+            generator = ThermochimicaInputGenerator(
+                json_file_path=args.json_file,
+                output_dir=args.output_dir,
+                temperature=args.temperature[0],
+                pressure=args.pressure[0],
+                **options
+            )
         
         generator.generate_input_files()
         
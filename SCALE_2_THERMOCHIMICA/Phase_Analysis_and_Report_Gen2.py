@@ -33,6 +33,25 @@ class PhaseAnalysisReportGenerator:
         # Track non-salt phases with moles > 0 for reporting
         self.significant_non_salt_phases = set()
         
+    @staticmethod
+    def present_phases(timestep_data: Dict[str, Any]) -> Set[str]:
+        """
+        Phases counted as present at one timestep, by the same criterion as the presence report.
+        
+        Args:
+            timestep_data (Dict[str, Any]): Thermochimica output of one timestep
+            
+        Returns:
+            Set[str]: "S:<phase>" for solution phases and "P:<phase>" for pure condensed phases with moles > 0
+        """
+        first_key = next(iter(timestep_data))
+        present = set()
+        for prefix, section in (("S", "solution phases"), ("P", "pure condensed phases")):
+            for phase, phase_data in timestep_data[first_key].get(section, {}).items():
+                if "moles" in phase_data and float(phase_data["moles"]) > 0.0:
+                    present.add(f"{prefix}:{phase}")
+        return present
+        
     def generate_phase_presence_report(self) -> Tuple[List[str], List[Dict[str, Any]]]:
         """
         Analyzes the condensed report and creates a report of which phases 
@@ -43,6 +43,9 @@ class PhaseSpecificDataProcessor:
         # Timesteps for easier iteration
         self.timesteps = sorted([int(ts) for ts in self.condensed_report.keys()])
         self.str_timesteps = [str(ts) for ts in self.timesteps]
+        
+        # Phase-specific JSON structures, filled by save_phase_jsons
+        self.phase_jsons = {}
     
     def extract_phase_data(self) -> Dict[str, Dict[str, Dict]]:
         """
@@ -302,6 +305,7 @@ class PhaseSpecificDataProcessor:
         
         # Process all phases
         salt_json, gas_json, solid_json = self.process_all_phases()
+        self.phase_jsons = {"salt": salt_json, "gas": gas_json, "solid": solid_json}
         
         # Save the JSON files
         output_paths = {}
@@ -607,6 +607,40 @@ class RedoxAnalyzer:
         return output_paths
 
 
+def save_sweep_redox_table(sweep_reports: Dict[str, Dict[str, Any]], output_dir: str = "output") -> str:
+    """
+    Tabulate the UF3/UF4 and Cr2+/Cr3+ ratios of every timestep at every grid point of a sweep.
+    
+    Args:
+        sweep_reports (Dict[str, Dict[str, Any]]): Grid points with their temperature, pressure and
+            condensed report, as returned by CondensedReportGenerator2.generate_sweep_reports
+        output_dir (str, optional): Directory to save the table. Defaults to "output".
+        
+    Returns:
+        str: Path to redox_sweep.csv, one row per timestep, temperature and pressure
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    rows = []
+    for name, point in sweep_reports.items():
+        analyzer = RedoxAnalyzer(point["condensed_report"])
+        uf_redox_ratios, cr_redox_ratios = analyzer.process_all_timesteps()
+        for timestep in sorted(set(uf_redox_ratios) | set(cr_redox_ratios)):
+            rows.append([timestep, point["temperature"], point["pressure"],
+                         f"{uf_redox_ratios[timestep]:.10e}" if timestep in uf_redox_ratios else "",
+                         f"{cr_redox_ratios[timestep]:.10e}" if timestep in cr_redox_ratios else ""])
+    
+    csv_path = os.path.join(output_dir, "redox_sweep.csv")
+    with open(csv_path, 'w', newline='') as csvfile:
+        csv_writer = csv.writer(csvfile)
+        csv_writer.writerow(["Timestep", "Temperature (K)", "Pressure (atm)", "UF3/UF4 Ratio", "Cr2+/Cr3+ Ratio"])
+        csv_writer.writerows(sorted(rows, key=lambda row: (row[0], row[1], row[2])))
+    
+    logger.info(f"Saved redox ratios of {len(sweep_reports)} grid points to {csv_path}")
+    return csv_path
+
+
 def main():
     """
     Main function to demonstrate the usage of the RedoxAnalyzer.
@@ -4,6 +4,13 @@ from decimal import Decimal, getcontext
 # Set a very high precision for Decimal operations
 getcontext().prec = 50
 
+# Custom encoder to handle Decimal objects
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)  # Convert Decimal to string to preserve precision
+        return super(DecimalEncoder, self).default(obj)
+
 def process_salt_data():
     # Load the JSON files
     with open('output/Decoupled_Salt.json', 'r') as f:
@@ -12,6 +19,17 @@ def process_salt_data():
     with open('Element_Vector.json', 'r') as f:
         processed_fuel_data = json.load(f)
     
+    salt_nuclides = decouple_salt_nuclides(decoupled_salt, processed_fuel_data)
+    save_salt_nuclides(salt_nuclides, 'Salt_Nuclides.json')
+
+def save_salt_nuclides(salt_nuclides, output_path):
+    # Write the output to a new JSON file with full precision
+    with open(output_path, 'w') as f:
+        json.dump(salt_nuclides, f, indent=2, ensure_ascii=False, cls=DecimalEncoder)
+    
+    print(f"Processing complete. Output written to {output_path}")
+
+def decouple_salt_nuclides(decoupled_salt, processed_fuel_data):
     # Initialize the output dictionary
     salt_nuclides = {}
     
@@ -88,18 +106,7 @@ def process_salt_data():
                     else:
                         salt_nuclides[timestep][phase_name]["anion_nuclide_mole_percent"][nuclide] = nuclide_mole_percent
 
-    # Custom encoder to handle Decimal objects
-    class DecimalEncoder(json.JSONEncoder):
-        def default(self, obj):
-            if isinstance(obj, Decimal):
-                return str(obj)  # Convert Decimal to string to preserve precision
-            return super(DecimalEncoder, self).default(obj)
-    
-    # Write the output to a new JSON file with full precision
-    with open('Salt_Nuclides.json', 'w') as f:
-        json.dump(salt_nuclides, f, indent=2, ensure_ascii=False, cls=DecimalEncoder)
-    
-    print("Processing complete. Output written to Salt_Nuclides.json")
+    return salt_nuclides
 
 if __name__ == "__main__":
     process_salt_data()
\ No newline at end of file
@@ -1,5 +1,41 @@
 import json
-from typing import Dict, List, Any, Tuple
+import argparse
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+
+def _accumulate(values: np.ndarray, entry_elements: np.ndarray, entry_surrogates: np.ndarray,
+                surrogate_count: int) -> np.ndarray:
+    """
+    Sum timestep x element values into timestep x surrogate totals over sparse incidence entries.
+    
+    The entries must be grouped by surrogate. The k-th member of every surrogate is added in
+    one step, so each total is summed in entry order.
+    """
+    totals = np.zeros((values.shape[0], surrogate_count))
+    counts = np.bincount(entry_surrogates, minlength=surrogate_count)
+    starts = np.cumsum(counts) - counts
+    for rank in range(int(counts.max()) if len(entry_surrogates) else 0):
+        has_rank = counts > rank
+        totals[:, has_rank] += values[:, entry_elements[starts[has_rank] + rank]]
+    return totals
+
+
+def surrogate_mapping_from_config(surrogate_config: Dict[str, List[Dict[str, str]]]) -> Dict[str, List[str]]:
+    """Surrogate -> candidate element symbols of a surrogate configuration, all lower case."""
+    return {surrogate.lower(): [candidate["Symbol"].lower() for candidate in candidates]
+            for surrogate, candidates in surrogate_config.items()}
+
+
+def _candidate_index(surrogate_mapping: Dict[str, List[str]]) -> Dict[str, List[int]]:
+    """Inverted candidate index: element -> columns of the surrogates it maps to."""
+    index = {}
+    for column, candidates in enumerate(surrogate_mapping.values()):
+        for candidate in candidates:
+            columns = index.setdefault(candidate, [])
+            if column not in columns:
+                columns.append(column)
+    return index
 
 
 class SurrogateProcessor:
@@ -10,13 +46,14 @@ class SurrogateProcessor:
     and produces a new file with condensed surrogate values and calculated surrogate percentages.
     """
     
-    def __init__(self, surrogate_file: str, element_data_file: str):
+    def __init__(self, surrogate_file: str, element_data_file: str = None, element_data: Dict[str, Any] = None):
         """
         Initialize the SurrogateProcessor with input file paths.
         
         Args:
             surrogate_file: Path to the surrogate_and_candidates.json file
             element_data_file: Path to the ThEIRENE_FuelSalt_processed_elements.json file
+            element_data: Already loaded element data (skips reading element_data_file)
         """
         self.surrogate_file = surrogate_file
         self.element_data_file = element_data_file
@@ -24,10 +61,15 @@ class SurrogateProcessor:
         self.element_data = {}
         self.surrogate_vector = {}
         self.surrogate_percentages = {}
+        self._element_matrix = None
+        self._incidence = {}  # Element names of a timestep layout -> compiled incidence list
         
         # Load the surrogate configuration and element data
         self._load_surrogate_config()
-        self._load_element_data()
+        if element_data is not None:
+            self._set_element_data(element_data)
+        else:
+            self._load_element_data()
         
     def _load_surrogate_config(self):
         """Load and parse the surrogate configuration file."""
@@ -35,79 +77,377 @@ class SurrogateProcessor:
             self.surrogate_config = json.load(f)
         
         # Convert the surrogate mapping to lowercase for consistent comparison
-        self.surrogate_mapping = {}
-        for surrogate, candidates in self.surrogate_config.items():
-            surrogate_lower = surrogate.lower()
-            self.surrogate_mapping[surrogate_lower] = [candidate["Symbol"].lower() for candidate in candidates]
+        self.surrogate_mapping = surrogate_mapping_from_config(self.surrogate_config)
+        self.surrogates = list(self.surrogate_mapping)
+        self.candidate_index = _candidate_index(self.surrogate_mapping)
+        self._incidence = {}
             
     def _load_element_data(self):
         """Load and parse the element data file."""
         with open(self.element_data_file, 'r') as f:
             data = json.load(f)
-            
-            # Handle the new data structure
-            if "surrogate_vector" in data:
-                # New format - extract the element data from surrogate_vector
-                self.element_data = data["surrogate_vector"]
-            else:
-                # Old format - data is already in the expected structure
-                self.element_data = data
+        self._set_element_data(data)
+    
+    def _set_element_data(self, data: Dict[str, Any]):
+        """Accept element data in either the new or the old layout."""
+        # Handle the new data structure
+        if "surrogate_vector" in data:
+            # New format - extract the element data from surrogate_vector
+            self.element_data = data["surrogate_vector"]
+        else:
+            # Old format - data is already in the expected structure
+            self.element_data = data
+        self._element_matrix = None
             
     def process_surrogates(self):
         """
         Process the element data to create surrogate vectors and calculate percentages.
         
-        This method iterates through each timestep in the element data, maps elements to their
-        surrogates, and calculates the corresponding surrogate percentages.
+        Timesteps listing the same elements are mapped together as one timestep x element
+        array (see process_timesteps), and the results are stored in the order of the element data.
         
         Returns:
             Tuple containing the surrogate vector and surrogate percentages
         """
         self.surrogate_vector = {}
         self.surrogate_percentages = {}
+        self.process_timesteps(self.element_data)
+        return self.surrogate_vector, self.surrogate_percentages
+    
+    def process_timesteps(self, steps: Dict[str, Dict[str, Dict[str, float]]]) -> None:
+        """
+        Map the elements of several timesteps to their surrogates and add the results, in the given order.
         
-        # Process each timestep
-        for timestep, elements in self.element_data.items():
-            self.surrogate_vector[timestep] = {}
-            self.surrogate_percentages[timestep] = {}
-            
-            # Initialize the surrogates for this timestep
-            for surrogate in self.surrogate_mapping.keys():
-                self.surrogate_vector[timestep][surrogate] = {
-                    "atom_density": 0.0,
-                    "mole_percent": 0.0
+        Timesteps listing the same elements in the same order are mapped together by one
+        _map_timesteps call, so a whole history costs one array pass per element layout. A
+        timestep alone in its layout is mapped directly, which is cheaper than an array pass.
+        
+        Args:
+            steps: Timestep -> atom density and mole percent of each element at that timestep
+        """
+        groups = {}
+        for timestep, elements in steps.items():
+            groups.setdefault(tuple(elements), {})[timestep] = elements
+        
+        results = {}
+        for group in groups.values():
+            if len(group) > 1:
+                results.update(self._map_timesteps(group))
+        
+        for timestep, elements in steps.items():
+            result = results.get(timestep)
+            if result is None:
+                result = self._map_timestep(elements)
+            self.surrogate_vector[timestep], self.surrogate_percentages[timestep] = result
+    
+    def process_timestep(self, timestep: str, elements: Dict[str, Dict[str, float]]) -> Tuple[Dict, Dict]:
+        """
+        Map the elements of one timestep to their surrogates and add the results.
+        
+        Timesteps mapped this way are not vectorized; use process_timesteps when many
+        of them are at hand.
+        
+        Args:
+            timestep: Timestep key
+            elements: Atom density and mole percent of each element at this timestep
+        
+        Returns:
+            Tuple containing the surrogate vector and surrogate percentages of this timestep
+        """
+        self.process_timesteps({timestep: elements})
+        return self.surrogate_vector[timestep], self.surrogate_percentages[timestep]
+    
+    def _incidence_list(self, element_names: Tuple[str, ...]) -> Optional[Tuple[np.ndarray, np.ndarray, List]]:
+        """
+        Compile the sparse element -> surrogate incidence list of an element layout, once per layout.
+        
+        Returns:
+            The surrogate and element column of each entry (grouped by surrogate, in element
+            order within each surrogate) and the members (entry, element name, element column)
+            of each surrogate, or None if elements differ only in case
+        """
+        if element_names not in self._incidence:
+            if len(set(element_names)) != len(element_names):
+                self._incidence[element_names] = None
+                return None
+            entries = sorted(((column, element) for element, name in enumerate(element_names)
+                              for column in self.candidate_index.get(name, [])), key=lambda entry: entry[0])
+            members = [[] for _ in self.surrogates]
+            for entry, (column, element) in enumerate(entries):
+                members[column].append((entry, element_names[element], element))
+            self._incidence[element_names] = (np.array([column for column, _ in entries], dtype=np.intp),
+                                              np.array([element for _, element in entries], dtype=np.intp),
+                                              members)
+        return self._incidence[element_names]
+    
+    def _map_timesteps(self, steps: Dict[str, Dict[str, Dict[str, float]]]) -> Dict[str, Optional[Tuple[Dict, Dict]]]:
+        """
+        Map timesteps that list the same elements, all at once (see map_element_arrays).
+        
+        Returns:
+            For each timestep, its surrogate vector and surrogate percentages, or None if it has
+            to be mapped one element at a time (non-numeric values, elements differing only in case)
+        """
+        timesteps = list(steps)
+        element_names = list(steps[timesteps[0]])
+        if self._incidence_list(tuple(element.lower() for element in element_names)) is None:
+            return dict.fromkeys(timesteps)
+        
+        results = {}
+        valid_steps = []
+        densities = []
+        mole_percents = []
+        for timestep in timesteps:
+            try:
+                step_densities = [values["atom_density"] for values in steps[timestep].values()]
+                step_mole_percents = [values["mole_percent"] for values in steps[timestep].values()]
+            except (KeyError, TypeError):
+                results[timestep] = None
+                continue
+            if not set(map(type, step_densities + step_mole_percents)) <= {int, float}:
+                results[timestep] = None
+                continue
+            valid_steps.append(timestep)
+            densities.append(step_densities)
+            mole_percents.append(step_mole_percents)
+        if not valid_steps:
+            return results
+        
+        # Element densities are reported as given
+        results.update(self.map_element_arrays(
+            valid_steps, element_names,
+            np.array(densities, dtype=float).reshape(len(valid_steps), len(element_names)),
+            np.array(mole_percents, dtype=float).reshape(len(valid_steps), len(element_names)),
+            reported=densities))
+        return results
+    
+    def map_element_arrays(self, timesteps: List[str], element_names: List[str], densities: np.ndarray,
+                           mole_percents: np.ndarray, reported: Optional[List[List[float]]] = None
+                           ) -> Dict[str, Tuple[Dict, Dict]]:
+        """
+        Map timestep x element arrays of atom densities and mole percents onto the surrogates.
+        
+        The elements are compiled into a sparse element -> surrogate incidence list (one
+        entry per element and surrogate it maps to, see _incidence_list). Surrogate totals are accumulated one
+        member rank at a time for all timesteps and surrogates, so every total is summed in
+        element order, exactly like a running per-element sum. Elements that differ only in
+        case are mapped one timestep at a time instead.
+        
+        Args:
+            timesteps: Timestep of each row
+            element_names: Element of each column
+            densities: Atom density of each element at each timestep
+            mole_percents: Mole percent of each element at each timestep
+            reported: Element densities reported in the surrogate percentages (default: the array values)
+        
+        Returns:
+            For each timestep, its surrogate vector and surrogate percentages
+        """
+        incidence = self._incidence_list(tuple(element.lower() for element in element_names))
+        results = {}
+        if incidence is None:
+            for step, timestep in enumerate(timesteps):
+                elements = {element: {"atom_density": atom_density, "mole_percent": mole_percent}
+                            for element, atom_density, mole_percent in zip(element_names, densities[step].tolist(),
+                                                                           mole_percents[step].tolist())}
+                results[timestep] = self._map_timestep(elements)
+            return results
+        entry_surrogates, entry_elements, members = incidence
+        
+        surrogate_densities = _accumulate(densities, entry_elements, entry_surrogates, len(self.surrogates))
+        surrogate_mole_percents = _accumulate(mole_percents, entry_elements, entry_surrogates, len(self.surrogates))
+        
+        entry_totals = surrogate_densities[:, entry_surrogates]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            contributions = np.where(entry_totals > 0, densities[:, entry_elements] / entry_totals * 100.0, 0.0)
+        
+        for step, timestep in enumerate(timesteps):
+            step_contributions = contributions[step].tolist()
+            step_element_densities = reported[step] if reported is not None else densities[step].tolist()
+            step_vector = {
+                surrogate: {"atom_density": atom_density, "mole_percent": mole_percent}
+                for surrogate, atom_density, mole_percent in zip(self.surrogates, surrogate_densities[step].tolist(),
+                                                                 surrogate_mole_percents[step].tolist())
+            }
+            step_percentages = {
+                surrogate: {
+                    name: {"atom_density": step_element_densities[element],
+                           "contribution_percentage": step_contributions[entry]}
+                    for entry, name, element in surrogate_members
                 }
-                self.surrogate_percentages[timestep][surrogate] = {}
+                for surrogate, surrogate_members in zip(self.surrogates, members)
+            }
+            results[timestep] = (step_vector, step_percentages)
+        return results
+    
+    def _map_timestep(self, elements: Dict[str, Dict[str, float]]) -> Tuple[Dict, Dict]:
+        """Map the elements of one timestep to their surrogates, one element at a time."""
+        step_vector = {}
+        step_percentages = {}
+        
+        # Initialize the surrogates for this timestep
+        for surrogate in self.surrogate_mapping.keys():
+            step_vector[surrogate] = {
+                "atom_density": 0.0,
+                "mole_percent": 0.0
+            }
+            step_percentages[surrogate] = {}
+        
+        # Map elements to surrogates
+        for element, values in elements.items():
+            element_lower = element.lower()
             
-            # Map elements to surrogates
-            for element, values in elements.items():
-                element_lower = element.lower()
-                
-                # Find which surrogate(s) this element maps to
-                for surrogate, candidates in self.surrogate_mapping.items():
-                    if element_lower in candidates:
-                        # Add element values to the surrogate totals
-                        self.surrogate_vector[timestep][surrogate]["atom_density"] += values["atom_density"]
-                        self.surrogate_vector[timestep][surrogate]["mole_percent"] += values["mole_percent"]
-                        
-                        # Record the element's contribution to the surrogate
-                        self.surrogate_percentages[timestep][surrogate][element_lower] = {
-                            "atom_density": values["atom_density"],
-                            "contribution_percentage": 0.0  # Will calculate after summing
-                        }
+            # Find which surrogate(s) this element maps to
+            for surrogate, candidates in self.surrogate_mapping.items():
+                if element_lower in candidates:
+                    # Add element values to the surrogate totals
+                    step_vector[surrogate]["atom_density"] += values["atom_density"]
+                    step_vector[surrogate]["mole_percent"] += values["mole_percent"]
+                    
+                    # Record the element's contribution to the surrogate
+                    step_percentages[surrogate][element_lower] = {
+                        "atom_density": values["atom_density"],
+                        "contribution_percentage": 0.0  # Will calculate after summing
+                    }
+        
+        # Calculate the contribution percentages for each surrogate
+        for surrogate in self.surrogate_mapping.keys():
+            surrogate_atom_density = step_vector[surrogate]["atom_density"]
             
-            # Calculate the contribution percentages for each surrogate
-            for surrogate in self.surrogate_mapping.keys():
-                surrogate_atom_density = self.surrogate_vector[timestep][surrogate]["atom_density"]
-                
-                # Only calculate percentages if there's a non-zero denominator
-                if surrogate_atom_density > 0:
-                    for element in self.surrogate_percentages[timestep][surrogate].keys():
-                        element_atom_density = self.surrogate_percentages[timestep][surrogate][element]["atom_density"]
-                        contribution = element_atom_density / surrogate_atom_density * 100.0
-                        self.surrogate_percentages[timestep][surrogate][element]["contribution_percentage"] = contribution
+            # Only calculate percentages if there's a non-zero denominator
+            if surrogate_atom_density > 0:
+                for element in step_percentages[surrogate].keys():
+                    element_atom_density = step_percentages[surrogate][element]["atom_density"]
+                    contribution = element_atom_density / surrogate_atom_density * 100.0
+                    step_percentages[surrogate][element]["contribution_percentage"] = contribution
         
-        return self.surrogate_vector, self.surrogate_percentages
+        return step_vector, step_percentages
+    
+    def element_matrix(self) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+        """
+        The element data as arrays, built once and shared by every evaluate_surrogate_maps call.
+        
+        Returns:
+            Tuple of the timesteps, the element symbols (lower case, in order of first
+            appearance) and the timestep x element atom densities and mole percents
+            (0 where a timestep lacks an element)
+        """
+        if self._element_matrix is None:
+            timesteps = list(self.element_data)
+            columns = {}
+            for elements in self.element_data.values():
+                for element in elements:
+                    columns.setdefault(element.lower(), len(columns))
+            densities = np.zeros((len(timesteps), len(columns)))
+            mole_percents = np.zeros((len(timesteps), len(columns)))
+            for row, elements in enumerate(self.element_data.values()):
+                for element, values in elements.items():
+                    densities[row, columns[element.lower()]] += values["atom_density"]
+                    mole_percents[row, columns[element.lower()]] += values["mole_percent"]
+            self._element_matrix = (timesteps, list(columns), densities, mole_percents)
+        return self._element_matrix
+    
+    def evaluate_surrogate_maps(self, surrogate_maps: Dict[str, Union[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Apply several alternative surrogate maps to the element data in one vectorized pass.
+        
+        The surrogates of all maps are stacked into one incidence list over the shared
+        element matrix (see element_matrix), so the totals of every map come out of a single
+        accumulation. For timesteps listing the same elements they equal the totals of
+        process_surrogates.
+        
+        Args:
+            surrogate_maps: Map name -> path of a surrogate configuration file, or the loaded
+                            configuration (surrogate -> candidates with a "Symbol")
+        
+        Returns:
+            For each map: "timesteps", "surrogates", the timestep x surrogate "atom_density" and
+            "mole_percent" arrays and "statistics":
+                surrogates: Number of surrogates of the map
+                thermochimica_elements: Surrogates with a non-zero atom density at some timestep
+                max_lumping_fraction: Largest share of a surrogate's atom density contributed by
+                    other elements than the surrogate itself, over all surrogates and timesteps
+                max_lumping_surrogate: The surrogate where it occurs
+                unmapped_elements: Number of elements present in the data that no surrogate lists
+                unmapped: Their symbols
+                max_unmapped_mole_percent: Largest mole percent left out by them at a timestep
+        """
+        timesteps, elements, densities, mole_percents = self.element_matrix()
+        present = (densities != 0).any(axis=0)
+        
+        # Stack the surrogates of all maps as the columns of one incidence list
+        mappings = {}
+        entries = []
+        self_entries = []
+        offset = 0
+        for name, surrogate_map in surrogate_maps.items():
+            if isinstance(surrogate_map, str):
+                with open(surrogate_map, 'r') as f:
+                    surrogate_map = json.load(f)
+            mapping = surrogate_mapping_from_config(surrogate_map)
+            index = _candidate_index(mapping)
+            surrogates = list(mapping)
+            for element, symbol in enumerate(elements):
+                for column in index.get(symbol, []):
+                    entries.append((offset + column, element))
+                    if surrogates[column] == symbol:
+                        self_entries.append((offset + column, element))
+            mappings[name] = (offset, surrogates, [element for element, symbol in enumerate(elements)
+                                                   if symbol not in index])
+            offset += len(surrogates)
+        entries.sort(key=lambda entry: entry[0])
+        
+        entry_surrogates = np.array([column for column, _ in entries], dtype=np.intp)
+        entry_elements = np.array([element for _, element in entries], dtype=np.intp)
+        surrogate_densities = _accumulate(densities, entry_elements, entry_surrogates, offset)
+        surrogate_mole_percents = _accumulate(mole_percents, entry_elements, entry_surrogates, offset)
+        
+        # Share of each surrogate's atom density not contributed by the surrogate element itself
+        own_densities = np.zeros_like(surrogate_densities)
+        for column, element in self_entries:
+            own_densities[:, column] = densities[:, element]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lumping = np.where(surrogate_densities > 0, 1.0 - own_densities / surrogate_densities, 0.0)
+        
+        results = {}
+        for name, (start, surrogates, unmapped) in mappings.items():
+            columns = slice(start, start + len(surrogates))
+            unmapped = [element for element in unmapped if present[element]]
+            map_lumping = lumping[:, columns]
+            if map_lumping.size:
+                _, lumped_column = np.unravel_index(np.argmax(map_lumping), map_lumping.shape)
+                max_lumping = float(map_lumping.max())
+            else:
+                lumped_column, max_lumping = None, 0.0
+            unmapped_mole_percent = mole_percents[:, unmapped].sum(axis=1) if unmapped else np.zeros(1)
+            results[name] = {
+                "timesteps": timesteps,
+                "surrogates": surrogates,
+                "atom_density": surrogate_densities[:, columns],
+                "mole_percent": surrogate_mole_percents[:, columns],
+                "statistics": {
+                    "surrogates": len(surrogates),
+                    "thermochimica_elements": int((surrogate_densities[:, columns] > 0).any(axis=0).sum()),
+                    "max_lumping_fraction": max_lumping,
+                    "max_lumping_surrogate": surrogates[lumped_column] if lumped_column is not None else None,
+                    "unmapped_elements": len(unmapped),
+                    "unmapped": [elements[element] for element in unmapped],
+                    "max_unmapped_mole_percent": float(unmapped_mole_percent.max()) if len(timesteps) else 0.0
+                }
+            }
+        return results
+    
+    def get_results(self) -> Dict[str, Any]:
+        """
+        Return the processed results in the surrogate_vector.json layout.
+        
+        Returns:
+            Dictionary with "surrogate_vector" and "surrogate_percentages" keys
+        """
+        return {
+            "surrogate_vector": self.surrogate_vector,
+            "surrogate_percentages": self.surrogate_percentages
+        }
     
     def save_results(self, output_file: str = "surrogate_vector.json"):
         """
@@ -117,10 +457,7 @@ class SurrogateProcessor:
             output_file: Path to the output JSON file
         """
         # Create the final output structure
-        output_data = {
-            "surrogate_vector": self.surrogate_vector,
-            "surrogate_percentages": self.surrogate_percentages
-        }
+        output_data = self.get_results()
         
         # Save to file
         with open(output_file, 'w') as f:
@@ -129,17 +466,111 @@ class SurrogateProcessor:
         print(f"Results saved to {output_file}")
 
 
+def process_nuclides_to_surrogates(nuclide_file: str, surrogate_file: str,
+                                   element_output_file: Optional[str] = None,
+                                   elements_to_include: Optional[List[str]] = None,
+                                   include_isotopes: bool = True,
+                                   cache: bool = True) -> Tuple[SurrogateProcessor, Optional[Dict[str, Any]]]:
+    """
+    Go from nuclide densities straight to the surrogate vector, without element dictionaries.
+    
+    Each time step x nuclide density array (one per nuclide list, or the memory-mapped
+    density cache) is aggregated into a time step x element array (see
+    nuclide_vector_processor_v2.aggregate_time_steps), which the compiled element ->
+    surrogate incidence maps onto the surrogates (see SurrogateProcessor.map_element_arrays).
+    Isotopes are summed into elements before elements are summed into surrogates, so the
+    results are the same as mapping Element_Vector.json. The element entries are built only
+    when element_output_file is given.
+    
+    Args:
+        nuclide_file: Nuclide density JSON file
+        surrogate_file: Path to the surrogate_and_candidates.json file
+        element_output_file: Where to also save the element data (Element_Vector.json layout);
+                             None to skip it
+        elements_to_include: Element symbols to keep (default: all)
+        include_isotopes: Keep the isotopic contributions in the element data
+        cache: Use the binary nuclide density cache of nuclide_file
+    
+    Returns:
+        Tuple containing the processor holding the surrogate results and the element data
+        (None unless element_output_file is given)
+    """
+    from nuclide_vector_processor_v2 import read_nuclide_groups, aggregate_time_steps, element_entries
+    
+    print(f"Processing file: {nuclide_file}")
+    processor = SurrogateProcessor(surrogate_file, element_data={})
+    timesteps, groups, results = read_nuclide_groups(nuclide_file, cache)
+    entries = {}
+    for nuclides, group_timesteps, densities, rows in groups:
+        group = aggregate_time_steps(densities, nuclides, group_timesteps, elements_to_include)
+        results.update(group["skipped"])
+        results.update(processor.map_element_arrays(group["time_steps"], group["elements"],
+                                                    group["atom_density"], group["mole_percent"]))
+        if element_output_file is not None:
+            entries.update(element_entries(group, include_isotopes, rows))
+    
+    # Results are stored in the order of the input; skipped timesteps hold a message
+    for timestep in timesteps:
+        result = results[timestep]
+        if isinstance(result, str):
+            print(result)
+            continue
+        processor.surrogate_vector[timestep], processor.surrogate_percentages[timestep] = result
+    
+    if not processor.surrogate_vector:
+        raise ValueError("No valid data was processed. Check input file format and content.")
+    if element_output_file is None:
+        return processor, None
+    
+    element_data = {"surrogate_vector": {}, "surrogate_percentages": {}}
+    for timestep in processor.surrogate_vector:
+        element_data["surrogate_vector"][timestep], isotopes = entries[timestep]
+        if include_isotopes:
+            element_data["surrogate_percentages"][timestep] = isotopes
+    with open(element_output_file, 'w') as f:
+        json.dump(element_data, f, indent=4)
+    return processor, element_data
+
+
 def main():
     """Main function to run the surrogate processing."""
-    # File paths
-    surrogate_file = "surrogates_and_candidates.json"
-    element_data_file = "Element_Vector.json"
-    output_file = "surrogate_vector.json"
+    parser = argparse.ArgumentParser(description="Map element data onto surrogate elements")
+    parser.add_argument("-s", "--surrogates", default="surrogates_and_candidates.json",
+                        help="Surrogate configuration (default: surrogates_and_candidates.json)")
+    parser.add_argument("-i", "--input", default="Element_Vector.json",
+                        help="Element data (default: Element_Vector.json)")
+    parser.add_argument("-n", "--nuclides",
+                        help="Start from this nuclide density file instead of element data")
+    parser.add_argument("--element-output",
+                        help="With --nuclides, also save the element data to this file")
+    parser.add_argument("-o", "--output", default="surrogate_vector.json",
+                        help="Output file (default: surrogate_vector.json)")
+    parser.add_argument("--compare", nargs="+", metavar="CONFIG",
+                        help="Compare these surrogate configurations on the element data (-i) instead "
+                             "of writing a surrogate vector")
+    args = parser.parse_args()
+    
+    if args.compare:
+        processor = SurrogateProcessor(args.surrogates, args.input)
+        results = processor.evaluate_surrogate_maps({path: path for path in args.compare})
+        print(f"{'Surrogate map':<40} {'Surrogates':>10} {'TC elements':>11} {'Max lumping':>11} "
+              f"{'Unmapped':>8} {'Unmapped mol%':>13}")
+        for path, result in results.items():
+            stats = result["statistics"]
+            lumping = f"{stats['max_lumping_fraction']:.1%}"
+            print(f"{path:<40} {stats['surrogates']:>10} {stats['thermochimica_elements']:>11} {lumping:>11} "
+                  f"{stats['unmapped_elements']:>8} {stats['max_unmapped_mole_percent']:>13.4g}")
+            if stats["unmapped"]:
+                print(f"    unmapped: {', '.join(stats['unmapped'])}")
+        return
     
     # Create and run the processor
-    processor = SurrogateProcessor(surrogate_file, element_data_file)
-    processor.process_surrogates()
-    processor.save_results(output_file)
+    if args.nuclides:
+        processor, _ = process_nuclides_to_surrogates(args.nuclides, args.surrogates, args.element_output)
+    else:
+        processor = SurrogateProcessor(args.surrogates, args.input)
+        processor.process_surrogates()
+    processor.save_results(args.output)
     
     print("Surrogate processing completed successfully!")
 
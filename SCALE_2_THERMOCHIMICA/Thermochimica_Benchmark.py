@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the Thermochimica harness, run against Thermochimica_Stub.py.
+
+For each problem size a synthetic surrogate vector is generated and pushed
+through Input_Generator_and_Execution_Multi.py with the stub standing in for
+InputScriptMode and RunCalculationList, so the orchestration overhead can be
+measured and tuned on machines without Thermochimica. Phases:
+
+    deck_generation  generate_input_files()
+    scheduling       run_calculations() with no binary: task building, ordering,
+                     dispatch and result bookkeeping, without any process
+    execution        run_calculations() with the stub: processes, output
+                     collection and storing results in the cache
+    collection       run_calculations() again, every output restored from the cache
+    parsing          DataLoaderParser.load_thermochimica_outputs()
+
+Usage:
+    python Thermochimica_Benchmark.py [--sizes 10 1000 10000] [--jobs N] [--batch-size N]
+                                      [--delay SECONDS] [--output benchmark.json]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import contextlib
+from typing import Dict, Any, List
+
+from Input_Generator_and_Execution_Multi import ThermochimicaInputGenerator
+from Data_Load_and_Parse import DataLoaderParser
+
+STUB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Thermochimica_Stub.py")
+
+# Base composition of the synthetic fuel salt (mole percent) and the fission products that build up
+BASE_SALT = {"li": 25.0, "be": 4.0, "f": 64.0, "th": 5.0, "u": 1.6, "cr": 0.01, "zr": 0.3}
+FISSION_PRODUCTS = {"cs": 0.02, "la": 0.02, "nd": 0.03, "zr": 0.03, "mo": 0.02, "ru": 0.015,
+                    "xe": 0.02, "kr": 0.005, "i": 0.002, "te": 0.003, "sr": 0.01, "ba": 0.01}
+
+
+def synthetic_surrogate_vector(time_steps: int) -> Dict[str, Any]:
+    """A surrogate vector in which uranium burns and fission products build up linearly with time."""
+    surrogate_vector = {}
+    for step in range(time_steps):
+        burnup = step / max(1, time_steps - 1)
+        amounts = dict(BASE_SALT)
+        amounts["u"] *= 1 - 0.2 * burnup
+        for element, rate in FISSION_PRODUCTS.items():
+            amounts[element] = amounts.get(element, 0.0) + rate * burnup
+        total = sum(amounts.values())
+        surrogate_vector[str(step)] = {element: {"atom_density": amount / 100.0,
+                                                 "mole_percent": 100.0 * amount / total}
+                                       for element, amount in amounts.items()}
+    return {"surrogate_vector": surrogate_vector}
+
+
+def install_stub(directory: str) -> str:
+    """
+    Lay out a stand-in Thermochimica installation (bin/InputScriptMode and bin/RunCalculationList).
+
+    Returns:
+        str: Path of the InputScriptMode stand-in
+    """
+    bin_dir = os.path.join(directory, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    for name in ("InputScriptMode", "RunCalculationList"):
+        link = os.path.join(bin_dir, name)
+        if not os.path.exists(link):
+            os.symlink(STUB_PATH, link)
+    return os.path.join(bin_dir, "InputScriptMode")
+
+
+def _timed(phase: str, time_steps: int, run) -> Dict[str, float]:
+    """Run one phase with its console output suppressed and measure it."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+    result = {"seconds": round(elapsed, 4),
+              "time_steps_per_second": round(time_steps / elapsed, 1) if elapsed > 0 else None}
+    print(f"  {phase:<16} {elapsed:9.3f} s  {result['time_steps_per_second'] or 0:>10.1f} time steps/s")
+    return result
+
+
+def benchmark(time_steps: int, work_dir: str, binary_path: str, jobs: int = 0,
+              batch_size: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Measure every phase of the harness for one problem size.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Seconds and throughput of each phase
+    """
+    options = dict(surrogate_data=synthetic_surrogate_vector(time_steps),
+                   datafile_path=os.path.join(work_dir, "stub.dat"),
+                   output_path="thermoout.json",
+                   max_concurrency=jobs,
+                   batch_size=batch_size)
+    with open(options["datafile_path"], 'w') as f:
+        f.write("! Data file of the benchmark; read only for the result cache key\n")
+
+    results = {}
+    generator = ThermochimicaInputGenerator("", output_dir=os.path.join(work_dir, "tc_inputs"),
+                                            binary_path=binary_path, cache_dir=os.path.join(work_dir, "tc_cache"),
+                                            **options)
+    results["deck_generation"] = _timed("deck_generation", time_steps, generator.generate_input_files)
+
+    # Without a binary every run returns at once, which leaves the cost of the harness itself
+    dry = ThermochimicaInputGenerator("", output_dir=os.path.join(work_dir, "tc_inputs"),
+                                      binary_path=os.path.join(work_dir, "bin", "missing"), **options)
+    results["scheduling"] = _timed("scheduling", time_steps, dry.run_calculations)
+
+    results["execution"] = _timed("execution", time_steps, generator.run_calculations)
+    failed = [time_step for time_step, timing in generator.time_step_timings.items() if not timing["success"]]
+    if failed:
+        raise RuntimeError(f"The stub failed for {len(failed)} time steps, e.g. {failed[0]}")
+    results["collection"] = _timed("collection", time_steps, generator.run_calculations)
+
+    parser = DataLoaderParser(work_dir)
+    results["parsing"] = _timed("parsing", time_steps, lambda: parser.load_thermochimica_outputs(work_dir))
+    return results
+
+
+def main():
+    """Run the benchmark for every requested size and save the results"""
+    parser = argparse.ArgumentParser(description="Benchmark the Thermochimica harness against the stub binary")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000],
+                        help="Numbers of time steps to benchmark (default: 10 1000 10000)")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Thermochimica processes run at once (default: one per CPU)")
+    parser.add_argument("-b", "--batch-size", type=int, default=0,
+                        help="Time steps per process with a calculation list deck (default: 0, one per time step)")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Synthetic seconds per calculation of the stub (default: 0, harness overhead only)")
+    parser.add_argument("--work-dir",
+                        help="Directory for the generated files (default: a temporary directory, removed afterwards)")
+    parser.add_argument("-o", "--output", default="benchmark.json",
+                        help="Where to save the results (default: benchmark.json)")
+    args = parser.parse_args()
+
+    # The stub reads its settings from the environment; a relative output path keeps runs lock-free
+    os.environ["THERMOCHIMICA_STUB_DELAY"] = str(args.delay)
+    os.environ["THERMOCHIMICA_OUTPUT"] = "thermoout.json"
+    logging.getLogger('Post-Processor').setLevel(logging.WARNING)
+
+    base_dir = args.work_dir or tempfile.mkdtemp(prefix="tc_benchmark_")
+    report = {"jobs": args.jobs or os.cpu_count(), "batch_size": args.batch_size, "delay": args.delay,
+              "python": sys.version.split()[0], "sizes": {}}
+    try:
+        binary_path = install_stub(base_dir)
+        for size in args.sizes:
+            print(f"{size} time steps:")
+            work_dir = os.path.join(base_dir, f"n{size}")
+            shutil.rmtree(work_dir, ignore_errors=True)
+            os.makedirs(work_dir)
+            report["sizes"][str(size)] = benchmark(size, work_dir, binary_path, args.jobs, args.batch_size)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
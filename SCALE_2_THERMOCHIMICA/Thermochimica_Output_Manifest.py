@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Persistent index of the Thermochimica outputs of a tc_inputs directory.
+
+<tc_inputs>/tc_outputs_manifest.json records, for every timestep_X directory,
+the output JSON (path, size, modification time, SHA-256, whether it has the
+structure of a Thermochimica output and its top-level keys) and the path,
+size and modification time of its log and input deck. The executor updates it
+as calculations complete, and DataLoaderParser uses it to skip listing and
+revalidating every directory whose files are still the ones recorded.
+
+An entry is current while the modification time of its directory (which
+changes when files are added, removed or replaced by rename) and the size and
+modification time of each recorded file are unchanged. Anything else is
+scanned again and re-recorded.
+"""
+
+import os
+import json
+import socket
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+MANIFEST_FILE = "tc_outputs_manifest.json"
+MANIFEST_FORMAT = 1  # Version of the manifest layout; manifests of other versions are rebuilt
+
+# File kinds of a timestep directory, by extension
+FILE_KINDS = {".json": "json", ".log": "log", ".ti": "input"}
+
+_UNSET = object()
+
+
+def validate_thermochimica_json(data: Any) -> bool:
+    """
+    Check that parsed JSON has the structure of a Thermochimica output.
+
+    Thermochimica JSON files have numeric keys for each data point; the first one
+    must hold the solution phases, pure condensed phases and elements.
+    """
+    if not isinstance(data, dict):
+        return False
+    for key, data_point in data.items():
+        if key.isdigit():
+            if not isinstance(data_point, dict):
+                return False
+            return all(section in data_point for section in ["solution phases", "pure condensed phases", "elements"])
+    return False
+
+
+def scan_timestep_dir(path: str) -> Dict[str, str]:
+    """
+    Find the output JSON, log and input deck of a timestep directory.
+
+    Returns:
+        Path of each file kind found ("json", "log", "input"); the last one listed wins
+    """
+    files = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            kind = FILE_KINDS.get(os.path.splitext(entry.name)[1])
+            if kind is not None:
+                files[kind] = entry.path
+    return files
+
+
+class OutputManifest:
+    """Index of the timestep outputs of one tc_inputs directory."""
+
+    def __init__(self, tc_inputs_dir: str):
+        """
+        Load the manifest of a tc_inputs directory (empty if there is none yet).
+
+        Args:
+            tc_inputs_dir: Directory holding the timestep_X folders
+        """
+        self.tc_inputs_dir = os.path.abspath(tc_inputs_dir)
+        self.path = os.path.join(self.tc_inputs_dir, MANIFEST_FILE)
+        self.entries = {}  # Directory name -> entry
+        self.changed = False
+        self._lock = threading.Lock()
+
+        try:
+            with open(self.path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get("format") == MANIFEST_FORMAT:
+                self.entries = manifest["timesteps"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    def current(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the entry of a timestep directory if its files are still the recorded ones.
+
+        Args:
+            name: Directory name (e.g. "timestep_3")
+        """
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        try:
+            if os.stat(os.path.join(self.tc_inputs_dir, name)).st_mtime_ns != entry["mtime_ns"]:
+                return None
+            for record in entry["files"].values():
+                stat = os.stat(os.path.join(self.tc_inputs_dir, record["path"]))
+                if stat.st_size != record["size"] or stat.st_mtime_ns != record["mtime_ns"]:
+                    return None
+        except OSError:
+            return None
+        return entry
+
+    def record(self, name: str, files: Optional[Dict[str, str]] = None, content: Optional[bytes] = None,
+               data: Any = _UNSET) -> Optional[Dict[str, Any]]:
+        """
+        Scan a timestep directory and record its files.
+
+        Args:
+            name: Directory name (e.g. "timestep_3")
+            files: Its files as returned by scan_timestep_dir, if already scanned
+            content: Raw content of its output JSON, if already read
+            data: The parsed output JSON (None if it does not parse), if already parsed
+
+        Returns:
+            The new entry, or None if the directory does not exist
+        """
+        directory = os.path.join(self.tc_inputs_dir, name)
+        try:
+            # The directory is stated first, so a file added during the scan makes the entry stale
+            mtime_ns = os.stat(directory).st_mtime_ns
+            if files is None:
+                files = scan_timestep_dir(directory)
+            entry = {"mtime_ns": mtime_ns, "files": {}, "valid": False, "keys": None}
+            for kind, path in files.items():
+                stat = os.stat(path)
+                entry["files"][kind] = {"path": os.path.relpath(path, self.tc_inputs_dir),
+                                        "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            if "json" in files:
+                if content is None:
+                    with open(files["json"], 'rb') as f:
+                        content = f.read()
+                if data is _UNSET:
+                    try:
+                        data = json.loads(content)
+                    except ValueError:
+                        data = None
+                entry["files"]["json"]["sha256"] = hashlib.sha256(content).hexdigest()
+                entry["valid"] = validate_thermochimica_json(data)
+                entry["keys"] = list(data) if isinstance(data, dict) else None
+        except OSError:
+            return None
+
+        with self._lock:
+            self.entries[name] = entry
+            self.changed = True
+        return entry
+
+    def discard(self, name: str) -> None:
+        """Forget a timestep directory."""
+        with self._lock:
+            if self.entries.pop(name, None) is not None:
+                self.changed = True
+
+    def save(self) -> None:
+        """Write the manifest under a temporary name and move it into place."""
+        with self._lock:
+            manifest = {"format": MANIFEST_FORMAT, "timesteps": dict(self.entries)}
+            self.changed = False
+        tmp_path = f"{self.path}.{socket.gethostname()}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
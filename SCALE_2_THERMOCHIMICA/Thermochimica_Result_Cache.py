@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Persistent, content-addressed cache of Thermochimica results.
+
+Identical equilibrium problems come up again and again: reruns, time steps
+shared between enrichment cases, compositions that a surrogate-map edit did
+not touch. The cache key is the canonicalized input deck (settings and masses
+sorted, numbers normalized, comments and the data file path dropped) together
+with the SHA-256 of the data file contents. A hit restores the output JSON
+without running the binary.
+
+Entries are plain files under <cache_dir>/objects; their modification time
+is bumped on every hit, and evict() removes the least recently used entries
+until the cache fits its size bound. Each entry keeps its canonical deck next
+to it (<key>.deck), so find_similar() can also answer compositions that agree
+with a cached one within a relative tolerance.
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+from typing import Dict, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 1024 ** 3  # 1 GB
+
+_MASS_KEY = re.compile(r'^mass\((\d+)\)$')
+
+
+def canonical_deck(deck_text: str) -> str:
+    """
+    Reduce a Thermochimica input deck to the settings that determine its result.
+
+    Comments and blank lines are dropped, keys are lower-cased, numeric values
+    are normalized (900 == 900.0) and the data file path is left out because the
+    data file enters the cache key through its content hash instead.
+    """
+    entries = {}
+    for line in deck_text.splitlines():
+        line = line.split('!', 1)[0].strip()
+        if '=' not in line:
+            continue
+        key, value = (part.strip() for part in line.split('=', 1))
+        key = ' '.join(key.lower().split())
+        if key == 'data file':
+            continue
+        try:
+            value = repr(float(value))
+        except ValueError:
+            value = value.lower()
+        entries[key] = value
+
+    def sort_key(key: str) -> Tuple[int, str, int]:
+        match = _MASS_KEY.match(key)
+        return (1, '', int(match.group(1))) if match else (0, key, 0)
+
+    return '\n'.join(f"{key} = {entries[key]}" for key in sorted(entries, key=sort_key))
+
+
+def relative_difference(first: Dict, second: Dict) -> float:
+    """Largest relative difference between two compositions, element by element (missing = 0)."""
+    worst = 0.0
+    for element in set(first) | set(second):
+        a, b = first.get(element, 0.0), second.get(element, 0.0)
+        scale = max(abs(a), abs(b))
+        if scale > 0:
+            worst = max(worst, abs(a - b) / scale)
+    return worst
+
+
+def _split_payload(payload: str) -> Tuple[Tuple[str, ...], Dict[int, float]]:
+    """Split a keyed deck into its settings (data file hash included) and its masses by atomic number."""
+    settings = []
+    masses = {}
+    for line in payload.splitlines():
+        key, value = line.split(' = ', 1)
+        match = _MASS_KEY.match(key)
+        if match:
+            masses[int(match.group(1))] = float(value)
+        else:
+            settings.append(line)
+    return tuple(settings), masses
+
+
+class ThermochimicaResultCache:
+    """Content-addressed store of Thermochimica output files with LRU eviction."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache (created if needed)
+            max_bytes: Size bound enforced by evict()
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._datafile_hashes = {}
+        self._similarity_index = None  # settings -> [(key, masses)], loaded by find_similar
+
+        os.makedirs(os.path.join(self.cache_dir, "objects"), exist_ok=True)
+
+    def _datafile_hash(self, datafile_path: str) -> str:
+        """SHA-256 of the data file, recomputed only if its size or modification time changed."""
+        stat = os.stat(datafile_path)
+        signature = (os.path.abspath(datafile_path), stat.st_size, stat.st_mtime_ns)
+        if signature not in self._datafile_hashes:
+            digest = hashlib.sha256()
+            with open(datafile_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            self._datafile_hashes[signature] = digest.hexdigest()
+        return self._datafile_hashes[signature]
+
+    def _payload(self, deck_text: str, datafile_path: str) -> Optional[str]:
+        """The text a deck is keyed by, or None if the data file cannot be read."""
+        try:
+            datafile_hash = self._datafile_hash(datafile_path)
+        except OSError:
+            return None
+        return f"datafile = {datafile_hash}\n{canonical_deck(deck_text)}"
+
+    def key(self, deck_text: str, datafile_path: str) -> Optional[str]:
+        """
+        Compute the cache key of a deck.
+
+        Returns:
+            The key, or None if the data file cannot be read (such runs are not cached)
+        """
+        payload = self._payload(deck_text, datafile_path)
+        if payload is None:
+            return None
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def find_similar(self, deck_text: str, datafile_path: str, rtol: float) -> Optional[Tuple[str, float]]:
+        """
+        Find the cached deck closest to deck_text that differs only in its masses, each within rtol.
+
+        Returns:
+            The key of that entry and the largest relative mass difference, or None
+        """
+        payload = self._payload(deck_text, datafile_path)
+        if payload is None:
+            return None
+        settings, masses = _split_payload(payload)
+
+        if self._similarity_index is None:
+            self._similarity_index = {}
+            for root, _, files in os.walk(os.path.join(self.cache_dir, "objects")):
+                for name in files:
+                    if name.endswith(".deck"):
+                        try:
+                            with open(os.path.join(root, name), 'r') as f:
+                                self._index(name[:-len(".deck")], f.read())
+                        except OSError:
+                            continue
+
+        best = None
+        for key, cached_masses in self._similarity_index.get(settings, []):
+            difference = relative_difference(masses, cached_masses)
+            if difference <= rtol and (best is None or difference < best[1]):
+                best = (key, difference)
+        return best
+
+    def _index(self, key: str, payload: str) -> None:
+        """Add a cached deck to the similarity index."""
+        settings, masses = _split_payload(payload)
+        self._similarity_index.setdefault(settings, []).append((key, masses))
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "objects", key[:2], f"{key}.json")
+
+    def restore(self, key: str, output_file: str) -> bool:
+        """
+        Copy a cached result to output_file.
+
+        Returns:
+            bool: True on a hit
+        """
+        entry = self._entry_path(key)
+        try:
+            shutil.copyfile(entry, output_file)
+            # Mark the entry as recently used
+            os.utime(entry)
+        except OSError:
+            self.stats["misses"] += 1
+            return False
+
+        self.stats["hits"] += 1
+        return True
+
+    def store(self, key: str, output_file: str, deck_text: Optional[str] = None,
+              datafile_path: Optional[str] = None) -> None:
+        """Add a freshly computed result to the cache, with its deck for find_similar if given."""
+        entry = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+
+        payload = self._payload(deck_text, datafile_path) if deck_text is not None else None
+        if payload is not None:
+            try:
+                with open(entry[:-len(".json")] + ".deck", 'w') as f:
+                    f.write(payload)
+            except OSError:
+                payload = None
+
+        # Write under a temporary name so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry), suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(output_file, tmp_path)
+            os.replace(tmp_path, entry)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.stats["stores"] += 1
+        if payload is not None and self._similarity_index is not None:
+            self._index(key, payload)
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits max_bytes.
+
+        Returns:
+            int: Number of entries removed
+        """
+        entries = []
+        total = 0
+        for root, _, files in os.walk(os.path.join(self.cache_dir, "objects")):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            try:
+                os.remove(path[:-len(".json")] + ".deck")
+            except OSError:
+                pass
+            total -= size
+            removed += 1
+
+        self.stats["evictions"] += removed
+        return removed
+
+    def usage(self) -> Dict[str, int]:
+        """Number of entries and bytes currently in the cache."""
+        count = 0
+        size = 0
+        for root, _, files in os.walk(os.path.join(self.cache_dir, "objects")):
+            for name in files:
+                if name.endswith(".json"):
+                    count += 1
+                    size += os.path.getsize(os.path.join(root, name))
+        return {"entries": count, "bytes": size}
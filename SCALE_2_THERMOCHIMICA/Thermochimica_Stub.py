@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the Thermochimica binaries, for testing and benchmarking without them.
+
+Invoked like InputScriptMode or RunCalculationList (stub <deck>), it reads the
+.ti deck (single calculation, or a calculation list with nEl/iEl/nCalc rows),
+waits a configurable synthetic delay per calculation and writes a
+thermoout.json with the structure of the real output: an MSFL salt with
+cations, anions and species, an ideal gas, a metallic phase and pure condensed
+phases. The numbers are a deterministic function of the deck, not
+thermodynamics; they vary with the composition so that the downstream reports,
+redox ratios and phase changes have something to show.
+
+The output goes to $THERMOCHIMICA_OUTPUT (relative paths are taken relative to
+the working directory) or, like an installed Thermochimica, to
+<install>/outputs/thermoout.json for a stub at <install>/bin/<name>.
+
+Environment:
+    THERMOCHIMICA_STUB_DELAY   Seconds per calculation (default 0)
+    THERMOCHIMICA_STUB_JITTER  Relative random variation of the delay, seeded by the deck (default 0)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+from typing import Dict, List, Tuple
+
+SYMBOLS = ("e H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn Ga Ge As Se "
+           "Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy "
+           "Ho Er Tm Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf "
+           "Es Fm Md No Lr").split()
+
+# Elements that end up in the metallic phase and in the gas rather than in the salt
+NOBLE_METALS = {"Nb", "Mo", "Tc", "Ru", "Rh", "Pd", "Ag", "Sb", "Te"}
+GASES = {"He", "Ne", "Ar", "Kr", "Xe", "Rn", "I", "H", "N", "O"}
+ANIONS = {"F", "Cl", "Br"}
+
+# Oxidation state of the salt cations (3 if not listed)
+VALENCES = {"Li": 1, "Na": 1, "K": 1, "Rb": 1, "Cs": 1, "Be": 2, "Mg": 2, "Ca": 2, "Sr": 2, "Ba": 2,
+            "Fe": 2, "Ni": 2, "Zr": 4, "Th": 4, "U": 4, "Cr": 3}
+
+_ASSIGNMENT = re.compile(r'^\s*([^=!]+?)\s*=\s*([^!]*?)\s*(?:!.*)?$')
+_MASS = re.compile(r'^mass\((\d+)\)$', re.IGNORECASE)
+
+
+def parse_deck(deck_text: str) -> Tuple[Dict[str, str], List[Tuple[float, float, Dict[str, float]]]]:
+    """
+    Parse a deck into its settings and its calculations.
+
+    Returns:
+        The settings (lower-case keys) and (temperature, pressure, moles by element symbol)
+        of each calculation
+    """
+    settings = {}
+    masses = {}
+    lines = deck_text.splitlines()
+    rows_start = None
+    for number, line in enumerate(lines):
+        match = _ASSIGNMENT.match(line)
+        if not match:
+            continue
+        key = ' '.join(match.group(1).lower().split())
+        mass = _MASS.match(key)
+        if mass:
+            masses[SYMBOLS[int(mass.group(1))]] = float(match.group(2))
+        else:
+            settings[key] = match.group(2)
+        if key == "ncalc":
+            rows_start = number + 1
+            break
+
+    if rows_start is None:
+        return settings, [(float(settings.get("temperature", 300)), float(settings.get("pressure", 1)), masses)]
+
+    # Calculation list: one row per calculation, temperature, pressure, then the masses of iEl
+    columns = [SYMBOLS[int(z)] for z in settings["iel"].split()]
+    calculations = []
+    rows = [line.split('!', 1)[0].split() for line in lines[rows_start:]]
+    for values in [row for row in rows if row][:int(settings["ncalc"])]:
+        calculations.append((float(values[0]), float(values[1]),
+                             {element: float(value) for element, value in zip(columns, values[2:])}))
+    return settings, calculations
+
+
+def _fractions(amounts: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    total = sum(amounts.values())
+    return {name: {"mole fraction": amount / total if total > 0 else 0.0, "moles": amount}
+            for name, amount in amounts.items()}
+
+
+def equilibrium(temperature: float, pressure: float, masses: Dict[str, float]) -> Dict:
+    """A made-up but well-formed Thermochimica result for one calculation."""
+    masses = {element: amount for element, amount in masses.items() if amount > 0}
+    fluorine = sum(masses.get(anion, 0.0) for anion in ANIONS)
+
+    cations = {}
+    metal = {}
+    gas = {}
+    pure = {}
+    for element, amount in masses.items():
+        if element in ANIONS:
+            continue
+        if element in GASES:
+            gas[element] = amount
+        elif element in NOBLE_METALS:
+            metal[element] = amount
+        elif element == "U":
+            # The UF3 share grows as fluorine runs short of the cations' demand
+            demand = sum(VALENCES.get(other, 3) * masses[other] for other in masses
+                         if other not in ANIONS | GASES | NOBLE_METALS)
+            reduced = min(0.5, max(1e-4, 1e-3 * demand / max(fluorine, 1e-30) * temperature / 900.0))
+            cations["U[3+]"] = amount * reduced
+            cations["U[CN=VI]"] = amount * (1 - reduced)
+        elif element == "Cr":
+            reduced = min(0.99, 0.5 * temperature / 900.0)
+            cations["Cr[2+]"] = amount * reduced
+            cations["Cr[3+]"] = amount * (1 - reduced)
+        else:
+            cations[f"{element}[{VALENCES.get(element, 3)}+]"] = amount
+
+    # Beyond a small solubility, molybdenum precipitates as a pure metal
+    if metal.get("Mo", 0.0) > 1e-6:
+        pure["Mo_bcc(s)"] = {"moles": metal["Mo"] - 1e-6}
+        metal["Mo"] = 1e-6
+
+    salt_moles = sum(cations.values()) + fluorine
+    salt_species = {f"{cation.split('[')[0]}F{VALENCES.get(cation.split('[')[0], 3)}": amount
+                    for cation, amount in cations.items()}
+    solution_phases = {
+        "MSFL": {"moles": salt_moles, "driving force": 0.0,
+                 "cations": _fractions(cations),
+                 "anions": _fractions({anion + "[-]": masses[anion] for anion in ANIONS if anion in masses}),
+                 "species": _fractions(salt_species)},
+        "gas_ideal": {"moles": sum(gas.values()), "driving force": 0.0,
+                      "species": _fractions(gas)},
+        "BCCN": {"moles": sum(metal.values()), "driving force": 0.0,
+                 "species": _fractions(metal)},
+    }
+
+    return {
+        "temperature": temperature,
+        "pressure": pressure,
+        "integral Gibbs energy": -1.0e5 * sum(masses.values()) * temperature / 900.0,
+        "solution phases": solution_phases,
+        "pure condensed phases": pure,
+        "elements": {element: {"moles": amount, "element potential": -1.0e4 * (1 + SYMBOLS.index(element) / 100)}
+                     for element, amount in masses.items()},
+    }
+
+
+def output_path(binary_path: str) -> str:
+    """Where the output goes: $THERMOCHIMICA_OUTPUT, else <install>/outputs/thermoout.json."""
+    configured = os.environ.get("THERMOCHIMICA_OUTPUT")
+    if configured:
+        return os.path.abspath(configured)
+    install_dir = os.path.dirname(os.path.dirname(os.path.abspath(binary_path)))
+    return os.path.join(install_dir, "outputs", "thermoout.json")
+
+
+def main():
+    """Solve the deck named on the command line"""
+    if len(sys.argv) != 2:
+        print(f"Usage: {os.path.basename(sys.argv[0])} <input deck>", file=sys.stderr)
+        return 2
+    try:
+        with open(sys.argv[1], 'r') as f:
+            deck_text = f.read()
+        settings, calculations = parse_deck(deck_text)
+    except (OSError, KeyError, ValueError, IndexError) as e:
+        print(f"ERROR: cannot read input deck {sys.argv[1]}: {e}", file=sys.stderr)
+        return 1
+
+    delay = float(os.environ.get("THERMOCHIMICA_STUB_DELAY", "0"))
+    jitter = float(os.environ.get("THERMOCHIMICA_STUB_JITTER", "0"))
+    rng = random.Random(hashlib.sha256(deck_text.encode()).hexdigest())
+
+    results = {}
+    for number, (temperature, pressure, masses) in enumerate(calculations, 1):
+        if delay > 0:
+            time.sleep(max(0.0, delay * (1 + jitter * rng.uniform(-1, 1))))
+        results[str(number)] = equilibrium(temperature, pressure, masses)
+        print(f"Calculation {number}: T = {temperature} K, P = {pressure} atm, {len(masses)} elements")
+
+    path = output_path(sys.argv[0])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if settings.get("write json", ".TRUE.").upper() != ".FALSE.":
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+File-system work queue for running Thermochimica on several hosts.
+
+The coordinator side is WorkQueueExecutor, a concurrent.futures.Executor that
+publishes every submitted call as a pickle in <queue_dir>/tasks. Workers on
+any host that mounts the queue directory (python Thermochimica_Work_Queue.py
+<queue_dir>) claim a task by renaming it into claimed/ under a name of their
+own, <task>.<worker>.pkl. The rename is atomic, so a task goes to exactly one
+worker at a time. The worker runs it and writes the pickled result (or
+exception) to results/, where the coordinator picks it up.
+
+While a task runs, its worker keeps touching a lease file next to its claim.
+A task whose lease has not changed for lease_timeout seconds (measured on the
+coordinator's clock, so the hosts' clocks need not agree) belongs to a dead
+worker and is put back into tasks/ for another worker. Since every claim and
+lease belongs to one worker, a stalled worker that comes back only removes its
+own files, and the coordinator deletes the late duplicate result it writes.
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import uuid
+import pickle
+import socket
+import argparse
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_LEASE_TIMEOUT = 60.0  # Seconds without a lease renewal after which a task is reassigned
+DEFAULT_MAX_ATTEMPTS = 3  # Workers a task may be handed to before it is given up
+
+QUEUE_DIRECTORIES = ["tasks", "claimed", "results"]
+
+
+def _write_atomic(path: str, *payloads: Any) -> None:
+    """Pickle payloads one after the other to path under a temporary name, so readers never see a partial file."""
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            for payload in payloads:
+                pickle.dump(payload, f)
+        os.replace(tmp_path, path)
+    finally:
+        _remove(tmp_path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class _TaskUnpickler(pickle.Unpickler):
+    """Unpickler that resolves objects of the coordinator's __main__ script from that script's module."""
+
+    def __init__(self, file, main_module: Optional[str]):
+        super().__init__(file)
+        self.main_module = main_module
+
+    def find_class(self, module, name):
+        if module == "__main__" and self.main_module:
+            module = self.main_module
+        return super().find_class(module, name)
+
+
+class WorkQueueExecutor(Executor):
+    """Executor that runs submitted calls on queue workers, possibly on other hosts."""
+
+    def __init__(self, queue_dir: str, lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, poll_interval: float = 0.5):
+        """
+        Initialize the executor and start collecting results.
+
+        Args:
+            queue_dir: Queue directory shared with the workers (created if needed)
+            lease_timeout: Seconds without a lease renewal after which a task is reassigned
+            max_attempts: Workers a task may be handed to before its future fails
+            poll_interval: Seconds between scans of the queue directory
+        """
+        self.queue_dir = os.path.abspath(queue_dir)
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._futures = {}  # Task name -> future of the tasks not yet finished
+        self._attempts = {}  # Task name -> workers the task was handed to
+        self._leases = {}  # Task name -> (claim, last lease signature seen, local time it was first seen)
+        self._duplicates = set()  # Finished tasks that a worker they were taken from may still return
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        for directory in QUEUE_DIRECTORIES:
+            os.makedirs(os.path.join(self.queue_dir, directory), exist_ok=True)
+
+        # Objects defined in the coordinator's script are looked up in that module by the workers
+        main_file = getattr(sys.modules["__main__"], "__file__", None)
+        self._main_module = os.path.splitext(os.path.basename(main_file))[0] if main_file else None
+
+        self._collector = threading.Thread(target=self._collect, name="work-queue-collector", daemon=True)
+        self._collector.start()
+
+    def _path(self, directory: str, name: str, suffix: str = ".pkl") -> str:
+        return os.path.join(self.queue_dir, directory, name + suffix)
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        """Publish fn(*args, **kwargs) to the queue; tasks are claimed in submission order."""
+        future = Future()
+        with self._lock:
+            # The sequence number keeps the submission order when workers sort the task names
+            name = f"{self._sequence:08d}-{uuid.uuid4().hex}"
+            self._sequence += 1
+            self._futures[name] = future
+            self._attempts[name] = 1
+        # The header is read before the call, whose unpickling may depend on it
+        _write_atomic(self._path("tasks", name),
+                      {"main_module": self._main_module, "lease_timeout": self.lease_timeout},
+                      (fn, args, kwargs))
+        return future
+
+    def _collect(self) -> None:
+        """Hand finished results to their futures and reassign the tasks of dead workers."""
+        while not self._stop.is_set():
+            with self._lock:
+                names = list(self._futures)
+            claims = self._claims()
+            for name in names:
+                result_path = self._path("results", name)
+                if os.path.isfile(result_path):
+                    self._finish(name, result_path)
+                elif name in claims:
+                    self._check_lease(name, claims[name])
+            for name in self._duplicates:
+                _remove(self._path("results", name))
+            self._stop.wait(self.poll_interval)
+
+    def _claims(self) -> Dict[str, str]:
+        """Current claim (<task>.<worker>) of every claimed task, by task name."""
+        try:
+            entries = os.listdir(os.path.join(self.queue_dir, "claimed"))
+        except OSError:
+            return {}
+        return {entry.split(".", 1)[0]: entry[:-len(".pkl")] for entry in entries if entry.endswith(".pkl")}
+
+    def _finish(self, name: str, result_path: str) -> None:
+        """Resolve the future of a task from its result file."""
+        try:
+            with open(result_path, 'rb') as f:
+                status, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return  # Still being replaced; read it on the next scan
+        _remove(result_path)
+        # A reassigned task may still be queued or running elsewhere; its duplicate result is discarded
+        _remove(self._path("tasks", name))
+        with self._lock:
+            future = self._futures.pop(name, None)
+            self._leases.pop(name, None)
+            if self._attempts[name] > 1:
+                self._duplicates.add(name)
+        if future is None or not future.set_running_or_notify_cancel():
+            return
+        if status == "ok":
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def _check_lease(self, name: str, claim: str) -> None:
+        """Put a claimed task back into the queue if the lease of its claim has not been renewed in time."""
+        try:
+            stat = os.stat(self._path("claimed", claim, ".lease"))
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None  # Claimed, lease not written yet
+
+        now = time.time()
+        seen = self._leases.get(name)
+        if seen is None or seen[:2] != (claim, signature):
+            self._leases[name] = (claim, signature, now)
+            return
+        if now - seen[2] < self.lease_timeout:
+            return
+
+        self._leases.pop(name, None)
+        if self._attempts[name] >= self.max_attempts:
+            _remove(self._path("claimed", claim))
+            with self._lock:
+                future = self._futures.pop(name, None)
+                self._duplicates.add(name)
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError(f"Task {name} was lost by {self.max_attempts} workers"))
+            return
+        try:
+            os.rename(self._path("claimed", claim), self._path("tasks", name))
+        except OSError:
+            return  # Finished or moved in the meantime
+        _remove(self._path("claimed", claim, ".lease"))
+        self._attempts[name] += 1
+        print(f"Work queue: the worker of task {name} stopped renewing its lease, reassigning it "
+              f"(attempt {self._attempts[name]} of {self.max_attempts})")
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """Stop collecting results; with cancel_futures, withdraw the tasks no worker has claimed."""
+        if wait and not cancel_futures:
+            while True:
+                with self._lock:
+                    if not self._futures:
+                        break
+                time.sleep(self.poll_interval)
+        self._stop.set()
+        self._collector.join()
+        with self._lock:
+            for name, future in self._futures.items():
+                try:
+                    os.remove(self._path("tasks", name))
+                except OSError:
+                    continue
+                future.cancel()
+            self._futures.clear()
+
+
+class _LeaseKeeper:
+    """Touches the lease file of a running task until stopped."""
+
+    def __init__(self, path: str, interval: float, worker: str):
+        self.path = path
+        self.interval = interval
+        self.worker = worker
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew, daemon=True)
+
+    def __enter__(self):
+        self._write()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        _remove(self.path)
+
+    def _write(self) -> None:
+        # The content changes on every renewal, so the coordinator sees it even with coarse timestamps
+        with open(self.path, 'w') as f:
+            f.write(f"{self.worker} {time.time():.3f}\n")
+
+    def _renew(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self._write()
+            except OSError:
+                pass
+
+
+def _claim(queue_dir: str, worker: str) -> Optional[Tuple[str, str]]:
+    """Claim the oldest queued task for worker. Returns its name and claimed path, or None if the queue is empty."""
+    try:
+        names = sorted(entry for entry in os.listdir(os.path.join(queue_dir, "tasks")) if entry.endswith(".pkl"))
+    except OSError:
+        return None
+    for entry in names:
+        task_name = entry[:-len(".pkl")]
+        claimed_path = os.path.join(queue_dir, "claimed", f"{task_name}.{worker}.pkl")
+        try:
+            os.rename(os.path.join(queue_dir, "tasks", entry), claimed_path)
+        except OSError:
+            continue  # Another worker was faster
+        return task_name, claimed_path
+    return None
+
+
+def run_worker(queue_dir: str, name: Optional[str] = None, idle_exit: Optional[float] = None,
+               poll_interval: float = 0.5) -> int:
+    """
+    Run queued tasks until the queue has been empty for idle_exit seconds (forever if None).
+
+    Returns:
+        int: Number of tasks run
+    """
+    queue_dir = os.path.abspath(queue_dir)
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    # Part of the claim file names, which must stay unique per worker
+    claim_id = f"{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}-{uuid.uuid4().hex[:8]}"
+    for directory in QUEUE_DIRECTORIES:
+        os.makedirs(os.path.join(queue_dir, directory), exist_ok=True)
+    print(f"Worker {name} serving {queue_dir}")
+
+    done = 0
+    idle_since = time.time()
+    while True:
+        claim = _claim(queue_dir, claim_id)
+        if claim is None:
+            if idle_exit is not None and time.time() - idle_since >= idle_exit:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        task_name, claimed_path = claim
+        try:
+            with open(claimed_path, 'rb') as f:
+                header = pickle.load(f)
+                call = f.read()
+        except (OSError, EOFError, pickle.UnpicklingError):
+            continue  # Reassigned before it could be read
+
+        lease_path = claimed_path[:-len(".pkl")] + ".lease"
+        with _LeaseKeeper(lease_path, header["lease_timeout"] / 4, name):
+            try:
+                fn, args, kwargs = _TaskUnpickler(io.BytesIO(call), header["main_module"]).load()
+                result = ("ok", fn(*args, **kwargs))
+            except Exception as e:
+                result = ("error", e)
+            result_path = os.path.join(queue_dir, "results", task_name + ".pkl")
+            try:
+                _write_atomic(result_path, result)
+            except Exception as e:  # The result or the exception itself cannot be pickled
+                _write_atomic(result_path, ("error", RuntimeError(f"Task {task_name} failed: {e!r}")))
+        _remove(claimed_path)
+        done += 1
+        idle_since = time.time()
+        print(f"Worker {name} finished task {task_name} ({result[0]})")
+
+    print(f"Worker {name} ran {done} tasks")
+    return done
+
+
+def main():
+    """Run a queue worker on this host"""
+    parser = argparse.ArgumentParser(description="Run Thermochimica tasks published to a shared work queue")
+    parser.add_argument("queue_dir", help="Queue directory shared with the coordinator")
+    parser.add_argument("--name", help="Worker name shown in logs and lease files (default: host:pid)")
+    parser.add_argument("--idle-exit", type=float, default=None,
+                        help="Exit after the queue has been empty for this many seconds (default: run forever)")
+    parser.add_argument("--binary", help="Thermochimica binary on this host (default: the coordinator's)")
+    parser.add_argument("--datafile", help="Thermochimica data file on this host (default: the coordinator's)")
+    parser.add_argument("--tc-output", help="Where the binary writes thermoout.json on this host")
+    args = parser.parse_args()
+
+    # Host-specific paths reach the tasks through the environment
+    for variable, value in (("THERMOCHIMICA_BINARY", args.binary), ("THERMOCHIMICA_DATAFILE", args.datafile),
+                            ("THERMOCHIMICA_OUTPUT", args.tc_output)):
+        if value:
+            os.environ[variable] = os.path.abspath(value)
+
+    run_worker(args.queue_dir, args.name, args.idle_exit)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
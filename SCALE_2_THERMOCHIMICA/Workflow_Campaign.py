@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Campaign mode for the SCALE 2 Thermochimica workflow.
+
+A campaign runs the complete workflow for several nuclide density inputs (for
+example the EIRENE enrichment variants and ThEIRENE) as a single stage graph.
+Every case gets its own working directory and a scoped copy of the standard
+stages, so the report stages of one case run while another case is still in
+Thermochimica, and the time steps of all cases share one worker pool.
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Any, List, Tuple
+
+from Workflow_Engine import WorkflowEngine, WorkflowStage
+from Workflow_Stages import build_workflow
+
+logger = logging.getLogger("Thermochimica-Workflow")
+
+CASE_DIRECTORIES = ["output", "msfl_output", "tc_inputs"]
+
+
+def case_name(input_file: str) -> str:
+    """Name a case after its nuclide density file (without directory and extension)."""
+    return os.path.splitext(os.path.basename(input_file))[0]
+
+
+def build_campaign(input_files: List[str],
+                   campaign_dir: str = "campaign",
+                   surrogate_file: str = "surrogates_and_candidates.json",
+                   tc_params: Dict[str, Any] = None,
+                   sweep: Dict[str, Any] = None) -> Tuple[List[WorkflowStage], Dict[str, Dict[str, str]]]:
+    """
+    Build the stages of all cases of a campaign.
+
+    Args:
+        input_files: Nuclide density JSON files, one per case
+        campaign_dir: Directory holding one working directory per case
+        surrogate_file: Surrogate mapping configuration shared by all cases
+        tc_params: Optional Thermochimica settings shared by all cases
+        sweep: Optional temperature/pressure grid computed for every case
+
+    Returns:
+        Tuple of the scoped stages and, per case, its input file and working directory
+    """
+    stages = []
+    cases = {}
+
+    for input_file in input_files:
+        case = case_name(input_file)
+        if case in cases:
+            raise ValueError(f"Two inputs map to the same case name '{case}': "
+                             f"{cases[case]['input_file']} and {input_file}")
+
+        workdir = os.path.join(campaign_dir, case)
+        cases[case] = {"input_file": input_file, "workdir": workdir}
+
+        for stage in build_workflow(input_file, surrogate_file, tc_params, sweep):
+            stage.name = f"{case}/{stage.name}"
+            stage.description = f"[{case}] {stage.description}"
+            stage.workdir = workdir
+            stage.scope = case
+            stages.append(stage)
+
+    return stages, cases
+
+
+def ensure_case_directories(cases: Dict[str, Dict[str, str]]) -> None:
+    """Create the output directories of every case."""
+    for info in cases.values():
+        for directory in CASE_DIRECTORIES:
+            os.makedirs(os.path.join(info["workdir"], directory), exist_ok=True)
+
+
+def summarize_campaign(engine: WorkflowEngine, cases: Dict[str, Dict[str, str]],
+                       total_time: float) -> Dict[str, Any]:
+    """
+    Summarize a finished campaign.
+
+    Returns:
+        Dict[str, Any]: Per-case stage statuses and times plus campaign-wide totals
+    """
+    critical_time, critical_stages = engine.critical_path()
+    summary = {
+        "total_wall_time": round(total_time, 3),
+        "critical_path": {"time": round(critical_time, 3), "stages": critical_stages},
+        "cases": {}
+    }
+
+    for case, info in cases.items():
+        results = {name.split("/", 1)[1]: result for name, result in engine.results.items()
+                   if name.startswith(f"{case}/")}
+        failed = [name for name, result in results.items() if not result.succeeded]
+        summary["cases"][case] = {
+            "input_file": info["input_file"],
+            "workdir": info["workdir"],
+            "succeeded": len(results) - len(failed),
+            "failed": failed,
+            "stage_time": round(sum(result.elapsed for result in results.values()), 3),
+            "stages": {name: result.status for name, result in results.items()}
+        }
+
+    return summary
+
+
+def save_campaign_summary(summary: Dict[str, Any], output_path: str) -> None:
+    """Write the campaign summary and log one line per case."""
+    with open(output_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    for case, info in summary["cases"].items():
+        status = "ok" if not info["failed"] else f"failed: {', '.join(info['failed'])}"
+        logger.info(f"Case {case}: {info['succeeded']} steps succeeded in {info['stage_time']:.2f} "
+                    f"stage-seconds ({status})")
+    logger.info(f"Campaign summary saved to {output_path}")
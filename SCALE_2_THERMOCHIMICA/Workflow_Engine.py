@@ -0,0 +1,959 @@
+#!/usr/bin/env python3
+"""
+In-process pipeline engine for the Thermochimica workflow.
+
+Each stage is a Python callable with declared inputs and outputs. The engine
+orders the stages by their data dependencies and hands results from one stage
+to the next as in-memory objects. Stages still write their files, but only as
+artifacts for the user - no stage has to re-read what an earlier stage already
+produced.
+
+Stages whose dependencies are satisfied run concurrently on a bounded pool of
+worker processes; the critical path through the stage graph is reported once
+the run is over. Stages marked local run on a thread of the main process and
+start their finer-grained work (such as Thermochimica time steps) as
+subprocesses of their own, within a process budget sized separately and shared
+by all local stages, so several workflows scheduled together stay within one
+set of CPUs. Every executed stage is profiled
+(wall time, CPU time, peak RSS and bytes read and written) so runs can be
+compared.
+
+With a build manifest the engine also rebuilds incrementally: a stage whose
+source files, parameters, code and upstream stages are unchanged since its last
+successful run is skipped, and its outputs are reloaded from its artifacts.
+
+A run journal records every completed stage and every completed unit of work
+inside a stage (such as a Thermochimica time step) as it happens, so an
+interrupted run can be resumed at the first unfinished piece of work.
+"""
+
+import os
+import json
+import time
+import hashlib
+import inspect
+import logging
+import threading
+import logging.handlers
+import subprocess
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Tuple, Set
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger("Thermochimica-Workflow")
+
+
+class StageContext:
+    """Runtime information handed to a stage function."""
+
+    def __init__(self, name: str, workdir: str = ".", params: Optional[Dict[str, Any]] = None,
+                 executor: Optional[Executor] = None, journal: Optional["RunJournal"] = None,
+                 completed_units: Optional[Set[str]] = None,
+                 unit_slots: Optional[threading.Semaphore] = None):
+        """
+        Initialize the stage context.
+
+        Args:
+            name: Name of the stage being executed
+            workdir: Directory the stage reads from and writes its artifacts to
+            params: Stage parameters declared in the workflow definition
+            executor: Pool of a caller that runs units of work elsewhere (None runs them locally)
+            journal: Run journal, given to stages running in the main process
+            completed_units: Units of work finished by an interrupted earlier run (when resuming)
+            unit_slots: Process budget shared by the local stages when stages run in parallel;
+                        a unit of work holds one slot while its process runs
+        """
+        self.name = name
+        self.workdir = workdir
+        self.params = params or {}
+        self.executor = executor
+        self.journal = journal
+        self.completed_units = set(completed_units or [])
+        self.unit_slots = unit_slots
+        # Extra measurements the stage wants to add to its profile
+        self.metrics = {}
+
+    def path(self, *parts: str) -> str:
+        """Resolve a path relative to the stage working directory."""
+        return os.path.join(self.workdir, *parts)
+
+    def unit_completed(self, unit: str) -> None:
+        """Record a finished unit of work (such as a time step) in the run journal."""
+        if self.journal is not None:
+            self.journal.unit_completed(self.name, unit)
+
+
+class WorkflowStage:
+    """A single node of the workflow graph."""
+
+    def __init__(self,
+                 name: str,
+                 func: Callable[[StageContext, Dict[str, Any]], Optional[Dict[str, Any]]],
+                 description: str,
+                 inputs: Optional[List[str]] = None,
+                 outputs: Optional[List[str]] = None,
+                 params: Optional[Dict[str, Any]] = None,
+                 check: bool = True,
+                 sources: Optional[List[str]] = None,
+                 code: Optional[List[str]] = None,
+                 artifacts: Optional[List[str]] = None,
+                 loader: Optional[Callable[[StageContext], Dict[str, Any]]] = None,
+                 local: bool = False,
+                 workdir: Optional[str] = None,
+                 scope: Optional[str] = None):
+        """
+        Initialize a workflow stage.
+
+        Args:
+            name: Unique stage name
+            func: Callable taking (context, inputs) and returning a dict of outputs
+            description: Human readable description used in the log
+            inputs: Names of the in-memory objects this stage consumes
+            outputs: Names of the in-memory objects this stage produces
+            params: Static parameters passed to the stage through its context
+            check: If False, errors are logged but do not block downstream stages
+            sources: Files read by the stage that are not produced by another stage
+            code: Module files whose content defines the stage's code version
+            artifacts: Files or directories the stage writes (relative to the working directory)
+            loader: Callable rebuilding the stage outputs from its artifacts, used when the stage is skipped
+            local: Always run in the main process (for stages that start their own process pool
+                   or submit work to context.executor)
+            workdir: Working directory of this stage (defaults to the engine working directory)
+            scope: Namespace of the stage inputs and outputs, so several copies of a workflow
+                   can be registered with one engine
+        """
+        self.name = name
+        self.func = func
+        self.description = description
+        self.inputs = list(inputs or [])
+        self.outputs = list(outputs or [])
+        self.params = dict(params or {})
+        self.check = check
+        self.sources = list(sources or [])
+        self.code = list(code or [])
+        self.artifacts = list(artifacts or [])
+        self.loader = loader
+        self.local = local
+        self.workdir = workdir
+        self.scope = scope
+
+    def key(self, name: str) -> str:
+        """Engine-wide name of one of the stage inputs or outputs."""
+        return f"{self.scope}/{name}" if self.scope else name
+
+
+class StageResult:
+    """Outcome of a single stage execution."""
+
+    def __init__(self, name: str, status: str, elapsed: float = 0.0, error: Optional[str] = None,
+                 profile: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the stage result.
+
+        Args:
+            name: Stage name
+            status: One of "succeeded", "cached", "failed" or "blocked"
+            elapsed: Wall time spent in the stage (seconds)
+            error: Error message if the stage did not succeed
+            profile: Resource usage of the stage (see _profile_since)
+        """
+        self.name = name
+        self.status = status
+        self.elapsed = elapsed
+        self.error = error
+        self.profile = profile or {"wall_time": elapsed}
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status in ("succeeded", "cached")
+
+
+class BuildManifest:
+    """
+    Persistent record of what every stage was last built from.
+
+    For each stage the manifest stores a fingerprint over the content hashes of
+    its source files, its parameters, its code version and the fingerprints of
+    its upstream stages. File hashes are cached together with the file size and
+    modification time so unchanged files are not re-read on every run.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the manifest, loading it from disk if it exists.
+
+        Args:
+            path: Location of the manifest JSON file
+        """
+        self.path = path
+        self.stages = {}
+        self.file_hashes = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                self.stages = data.get("stages", {})
+                self.file_hashes = data.get("file_hashes", {})
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning(f"Ignoring unreadable build manifest {path}: {e}")
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"stages": self.stages, "file_hashes": self.file_hashes}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def file_hash(self, path: str) -> Optional[str]:
+        """
+        Return the SHA-256 of a file, or None if it does not exist.
+
+        The hash is only recomputed when the file size or modification time changed.
+        """
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        cached = self.file_hashes.get(path)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["sha256"]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+
+        self.file_hashes[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                  "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the recorded entry of a stage, if any."""
+        return self.stages.get(name)
+
+    def record(self, name: str, entry: Dict[str, Any]) -> None:
+        """Store the entry of a successfully built stage."""
+        self.stages[name] = entry
+
+    def forget(self, name: str) -> None:
+        """Drop the entry of a stage so it is rebuilt next time."""
+        self.stages.pop(name, None)
+
+
+def _init_worker(log_queue, level: int) -> None:
+    """Send the log records of a worker process to the main process."""
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+
+
+def _read_proc_io() -> Dict[str, int]:
+    """Read the byte counters of the current process from /proc (Linux only)."""
+    counters = {}
+    try:
+        with open("/proc/self/io", 'r') as f:
+            for line in f:
+                key, value = line.split(":")
+                counters[key] = int(value)
+    except (OSError, ValueError):
+        pass
+    return counters
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the peak RSS of the current process so it covers only the next stage (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb(reset: bool) -> Optional[float]:
+    """Peak RSS of the current process in MB, since the last reset if there was one."""
+    if reset:
+        try:
+            with open("/proc/self/status", 'r') as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except (OSError, ValueError, IndexError):
+            pass
+    if resource is not None:
+        # Lifetime peak; ru_maxrss is in kB on Linux
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return None
+
+
+class _RunningStages:
+    """
+    Stages executing in this process, so that profiles can tell which process-wide
+    counters were shared with other stages (local stages run side by side on threads).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._overlaps = {}  # Stage name -> names of the stages that ran alongside it
+
+    def enter(self, name: str) -> bool:
+        """Register a starting stage; returns whether it is the only one running."""
+        with self._lock:
+            alone = not self._overlaps
+            for overlaps in self._overlaps.values():
+                overlaps.add(name)
+            self._overlaps[name] = set(self._overlaps) - {name}
+            return alone
+
+    def leave(self, name: str) -> List[str]:
+        """Unregister a finished stage and return the stages that overlapped it."""
+        with self._lock:
+            return sorted(self._overlaps.pop(name, ()))
+
+
+_running_stages = _RunningStages()
+
+
+def _resource_snapshot() -> Dict[str, Any]:
+    """Capture the counters a stage profile is computed from."""
+    snapshot = {
+        "wall_time": time.time(),
+        "cpu_time": time.process_time(),
+        "thread_cpu_time": time.thread_time(),
+        "io": _read_proc_io()
+    }
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        snapshot["child_cpu_time"] = children.ru_utime + children.ru_stime
+    return snapshot
+
+
+def _profile_since(start: Dict[str, Any], reset_peak: bool, overlapping: List[str]) -> Dict[str, Any]:
+    """
+    Compute the resources used since a snapshot.
+
+    Child CPU time counts finished child processes (such as the Thermochimica
+    binary); child peak RSS is the largest child the process ever waited for.
+    Bytes read and written are the rchar/wchar counters of /proc/self/io.
+
+    These counters belong to the whole process. If other stages ran in the same
+    process meanwhile (overlapping), CPU time is that of the stage's own thread
+    and the remaining fields include the work of the overlapping stages, which
+    the profile lists under "process_wide".
+    """
+    end = _resource_snapshot()
+    cpu_key = "thread_cpu_time" if overlapping else "cpu_time"
+    profile = {
+        "wall_time": round(end["wall_time"] - start["wall_time"], 3),
+        "cpu_time": round(end[cpu_key] - start[cpu_key], 3),
+        "child_cpu_time": None,
+        "peak_rss_mb": _peak_rss_mb(reset_peak),
+        "child_peak_rss_mb": None,
+        "bytes_read": None,
+        "bytes_written": None
+    }
+    if resource is not None:
+        profile["child_cpu_time"] = round(end["child_cpu_time"] - start["child_cpu_time"], 3)
+        profile["child_peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    if "rchar" in start["io"] and "rchar" in end["io"]:
+        profile["bytes_read"] = end["io"]["rchar"] - start["io"]["rchar"]
+        profile["bytes_written"] = end["io"]["wchar"] - start["io"]["wchar"]
+    if overlapping:
+        profile["cpu_time_scope"] = "thread"
+        profile["process_wide"] = {"fields": ["child_cpu_time", "peak_rss_mb", "child_peak_rss_mb",
+                                              "bytes_read", "bytes_written"],
+                                   "shared_with": overlapping}
+    return profile
+
+
+def _execute_stage(func: Callable, context: StageContext,
+                   inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Call a stage function, in the main process or in a worker.
+
+    Returns:
+        Tuple of the stage outputs and the stage profile
+    """
+    # The peak RSS is only reset when no other stage of this process is measuring it
+    reset_peak = _running_stages.enter(context.name) and _reset_peak_rss()
+    start = _resource_snapshot()
+    try:
+        outputs = func(context, inputs) or {}
+    finally:
+        overlapping = _running_stages.leave(context.name)
+
+    profile = _profile_since(start, reset_peak, overlapping)
+    profile.update(context.metrics)
+    return outputs, profile
+
+
+class RunJournal:
+    """
+    Append-only record of the work finished during a run.
+
+    Each event is one JSON line, flushed to disk before the call returns, so
+    the journal survives a killed job or a node reboot. A truncated last line
+    (the write that was interrupted) is ignored when the journal is read back.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the journal.
+
+        Args:
+            path: Location of the journal file (JSON lines)
+        """
+        self.path = path
+        self.completed_stages = set()
+        self.completed_units = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """
+        Read the work recorded by an earlier run.
+
+        Returns:
+            bool: True if a journal was found
+        """
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if event.get("event") == "stage_completed":
+                    self.completed_stages.add(event["stage"])
+                elif event.get("event") == "unit_completed":
+                    self.completed_units.setdefault(event["stage"], set()).add(event["unit"])
+        return True
+
+    def start(self, resume: bool = False) -> None:
+        """Begin a new journal, or continue the existing one when resuming."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not resume:
+            open(self.path, 'w').close()
+        self.append({"event": "run_resumed" if resume else "run_started"})
+
+    def append(self, event: Dict[str, Any]) -> None:
+        """Durably append one event."""
+        event = dict(event, time=datetime.now().isoformat(timespec="seconds"))
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(event) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def stage_completed(self, stage: str) -> None:
+        self.completed_stages.add(stage)
+        self.append({"event": "stage_completed", "stage": stage})
+
+    def unit_completed(self, stage: str, unit: str) -> None:
+        with self._lock:
+            self.completed_units.setdefault(stage, set()).add(unit)
+        self.append({"event": "unit_completed", "stage": stage, "unit": unit})
+
+    def units(self, stage: str) -> Set[str]:
+        """Units of work of a stage recorded as finished."""
+        return set(self.completed_units.get(stage, set()))
+
+
+class WorkflowEngine:
+    """
+    Runs a set of WorkflowStage objects in dependency order.
+
+    Outputs of every stage are kept in memory and passed to the stages that
+    declare them as inputs. A failing stage blocks only the stages that depend
+    on it; independent stages still run, concurrently if workers are available.
+    """
+
+    def __init__(self, stages: Optional[List[WorkflowStage]] = None, workdir: str = ".",
+                 initial_data: Optional[Dict[str, Any]] = None,
+                 manifest_path: Optional[str] = None, force: bool = False,
+                 journal_path: Optional[str] = None, resume: bool = False):
+        """
+        Initialize the workflow engine.
+
+        Args:
+            stages: Stages to register, in their preferred execution order
+            workdir: Working directory handed to every stage
+            initial_data: In-memory objects available before any stage runs
+            manifest_path: Build manifest enabling incremental rebuilds (None disables them)
+            force: Rebuild every stage even if its manifest entry is up to date
+            journal_path: Run journal recording finished stages and units of work (None disables it)
+            resume: Continue the run recorded in the journal instead of starting a new one
+        """
+        self.workdir = workdir
+        self.stages = OrderedDict()
+        self.data = dict(initial_data or {})
+        self.results = OrderedDict()
+        self.manifest = BuildManifest(manifest_path) if manifest_path else None
+        self.force = force
+        self.journal = RunJournal(journal_path) if journal_path else None
+        self.resume = resume
+        # Fingerprints of the stages built or reused during this run
+        self.fingerprints = {}
+        # Fingerprint and manifest entry of every stage that is currently executing
+        self._pending_entries = {}
+
+        for stage in stages or []:
+            self.add_stage(stage)
+
+    def add_stage(self, stage: WorkflowStage) -> None:
+        """Register a stage with the engine."""
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate workflow stage name: {stage.name}")
+        self.stages[stage.name] = stage
+
+    def _producers(self) -> Dict[str, str]:
+        """Map every declared output to the stage producing it."""
+        producers = {}
+        for stage in self.stages.values():
+            for output in map(stage.key, stage.outputs):
+                if output in producers:
+                    raise ValueError(f"Output '{output}' is produced by both "
+                                     f"'{producers[output]}' and '{stage.name}'")
+                producers[output] = stage.name
+        return producers
+
+    def dependencies(self) -> Dict[str, List[str]]:
+        """
+        Compute the upstream stages of every stage.
+
+        Returns:
+            Dict[str, List[str]]: Stage name -> names of the stages it depends on
+        """
+        producers = self._producers()
+        dependencies = {}
+        for stage in self.stages.values():
+            upstream = []
+            for name in map(stage.key, stage.inputs):
+                if name in producers:
+                    if producers[name] not in upstream:
+                        upstream.append(producers[name])
+                elif name not in self.data:
+                    raise ValueError(f"Stage '{stage.name}' needs '{name}', which no stage produces")
+            dependencies[stage.name] = upstream
+        return dependencies
+
+    def execution_order(self) -> List[WorkflowStage]:
+        """
+        Order the stages topologically, keeping registration order among ready stages.
+
+        Returns:
+            List[WorkflowStage]: Stages in an order that satisfies all dependencies
+        """
+        dependencies = self.dependencies()
+        done = set()
+        order = []
+
+        while len(order) < len(self.stages):
+            ready = [name for name in self.stages
+                     if name not in done and all(dep in done for dep in dependencies[name])]
+            if not ready:
+                remaining = [name for name in self.stages if name not in done]
+                raise ValueError(f"Dependency cycle between workflow stages: {remaining}")
+            # Take one stage at a time so registration order is respected
+            done.add(ready[0])
+            order.append(self.stages[ready[0]])
+
+        return order
+
+    def run(self, max_workers: int = 1, unit_workers: int = 0) -> Dict[str, StageResult]:
+        """
+        Execute all stages.
+
+        Args:
+            max_workers: Number of stages allowed to run at the same time; with 1
+                         every stage runs in the current process, in order
+            unit_workers: Processes the units of work of all local stages may run at once
+                          when stages run in parallel (0 uses one per CPU)
+
+        Returns:
+            Dict[str, StageResult]: Results keyed by stage name, in execution order
+        """
+        order = self.execution_order()
+        dependencies = self.dependencies()
+
+        if self.journal is not None:
+            if self.resume and not self.journal.load():
+                logger.warning(f"No run journal found at {self.journal.path}, starting from the beginning")
+                self.resume = False
+            self.journal.start(self.resume)
+            if self.resume:
+                logger.info(f"Resuming: {len(self.journal.completed_stages)} stages and "
+                            f"{sum(len(units) for units in self.journal.completed_units.values())} "
+                            f"units of work already completed")
+
+        if max_workers > 1:
+            self._run_parallel(order, dependencies, max_workers, unit_workers)
+        else:
+            for i, stage in enumerate(order, 1):
+                logger.info(f"Step {i}/{len(order)}: {stage.description}")
+                result = self._start_stage(stage, dependencies[stage.name])
+                if result is None:
+                    result = self._run_inline(stage)
+                self.results[stage.name] = result
+
+        self.results = OrderedDict((stage.name, self.results[stage.name]) for stage in order)
+        return self.results
+
+    def _run_parallel(self, order: List[WorkflowStage], dependencies: Dict[str, List[str]],
+                      max_workers: int, unit_workers: int = 0) -> None:
+        """
+        Run every stage as soon as its dependencies are done, on a pool of worker processes.
+
+        Local stages run on threads and start the processes of their units of work
+        themselves, within a budget of unit_workers shared by all of them, so the stage
+        concurrency limit does not bound, say, the Thermochimica processes.
+        """
+        # Spawned workers do not inherit the locks of the logging thread below
+        mp_context = multiprocessing.get_context("spawn")
+        log_queue = mp_context.Queue()
+        root = logging.getLogger()
+        listener = logging.handlers.QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+        listener.start()
+
+        pending = list(order)
+        running = {}
+        step = 0
+        local_count = sum(1 for stage in order if stage.local)
+
+        unit_slots = threading.BoundedSemaphore(unit_workers or multiprocessing.cpu_count())
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                                     initializer=_init_worker, initargs=(log_queue, root.level)) as pool, \
+                    ThreadPoolExecutor(max_workers=max(1, local_count)) as threads:
+                while pending or running:
+                    launched = True
+                    while launched:
+                        launched = False
+                        for stage in list(pending):
+                            if not all(dep in self.results for dep in dependencies[stage.name]):
+                                continue
+                            pending.remove(stage)
+                            step += 1
+                            logger.info(f"Step {step}/{len(order)}: {stage.description}")
+
+                            result = self._start_stage(stage, dependencies[stage.name])
+                            if result is not None:
+                                self.results[stage.name] = result
+                                # New outputs may have made other stages ready
+                                launched = True
+                                break
+
+                            if stage.local:
+                                # Local stages stay in this process and share the unit budget
+                                future = threads.submit(_execute_stage, stage.func,
+                                                        self._context(stage, unit_slots, in_process=True),
+                                                        self._inputs(stage))
+                            else:
+                                future = pool.submit(_execute_stage, stage.func, self._context(stage),
+                                                     self._inputs(stage))
+                            running[future] = (stage, time.time())
+
+                    if not running:
+                        continue
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, start_time = running.pop(future)
+                        try:
+                            outputs, profile = future.result()
+                        except Exception as e:
+                            self.results[stage.name] = self._finish_stage(
+                                stage, None, {"wall_time": time.time() - start_time}, e)
+                        else:
+                            self.results[stage.name] = self._finish_stage(stage, outputs, profile)
+        finally:
+            listener.stop()
+
+    def critical_path(self) -> Tuple[float, List[str]]:
+        """
+        Find the longest chain of dependent stages of the last run.
+
+        Returns:
+            Tuple of the summed wall time along the critical path and the stage
+            names on it, in execution order
+        """
+        dependencies = self.dependencies()
+        finish = {}
+        previous = {}
+
+        for stage in self.execution_order():
+            result = self.results.get(stage.name)
+            elapsed = result.elapsed if result else 0.0
+            upstream = max(dependencies[stage.name], key=lambda name: finish[name], default=None)
+            finish[stage.name] = elapsed + (finish[upstream] if upstream else 0.0)
+            previous[stage.name] = upstream
+
+        if not finish:
+            return 0.0, []
+
+        name = max(finish, key=finish.get)
+        total = finish[name]
+        path = []
+        while name is not None:
+            path.append(name)
+            name = previous[name]
+
+        return total, path[::-1]
+
+    def profile(self) -> List[Dict[str, Any]]:
+        """
+        Collect the profiles of the stages of the last run.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per stage, in execution order
+        """
+        stages = []
+        for name, result in self.results.items():
+            entry = {
+                "name": name,
+                "description": self.stages[name].description,
+                "status": result.status,
+            }
+            if result.error:
+                entry["error"] = result.error
+            entry.update(result.profile)
+            stages.append(entry)
+        return stages
+
+    def _code_version(self, stage: WorkflowStage) -> str:
+        """Hash the stage function source together with its declared module files."""
+        digest = hashlib.sha256()
+        try:
+            digest.update(inspect.getsource(stage.func).encode())
+        except (OSError, TypeError):
+            digest.update(repr(stage.func).encode())
+        for path in stage.code:
+            digest.update(f"{os.path.basename(path)}:{self.manifest.file_hash(path)}".encode())
+        return digest.hexdigest()
+
+    def _fingerprint(self, stage: WorkflowStage, upstream: List[str]) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Compute the fingerprint of a stage from everything that determines its outputs.
+
+        Returns:
+            Tuple of the fingerprint (None if an upstream stage has no trustworthy
+            fingerprint) and the manifest entry describing it
+        """
+        entry = {
+            "params": stage.params,
+            "sources": {path: self.manifest.file_hash(path) for path in stage.sources},
+            "code": self._code_version(stage),
+            "upstream": {name: self.fingerprints.get(name) for name in upstream},
+        }
+        if any(value is None for value in entry["upstream"].values()):
+            return None, entry
+
+        encoded = json.dumps(entry, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest(), entry
+
+    def _is_up_to_date(self, stage: WorkflowStage, context: StageContext, fingerprint: Optional[str]) -> bool:
+        """Check whether a stage can be skipped and its outputs reloaded."""
+        if self.force or fingerprint is None:
+            return False
+        if stage.outputs and stage.loader is None:
+            return False
+
+        previous = self.manifest.lookup(stage.name)
+        if not previous or previous.get("fingerprint") != fingerprint:
+            return False
+
+        return all(os.path.exists(context.path(artifact)) for artifact in stage.artifacts)
+
+    def _reuse_stage(self, stage: WorkflowStage, context: StageContext, fingerprint: Optional[str],
+                     reason: str = "Up to date") -> Optional[StageResult]:
+        """Reload the outputs of an up-to-date or already completed stage from its artifacts."""
+        start_time = time.time()
+        try:
+            outputs = stage.loader(context) if stage.loader else {}
+            missing = [name for name in stage.outputs if name not in outputs]
+            if missing:
+                raise ValueError(f"Loader did not produce: {', '.join(missing)}")
+        except Exception as e:
+            logger.warning(f"Could not reuse outputs of {stage.description}, rebuilding: {e}")
+            return None
+
+        self._store(stage, outputs)
+        self.fingerprints[stage.name] = fingerprint
+        if self.journal is not None and stage.name not in self.journal.completed_stages:
+            self.journal.stage_completed(stage.name)
+
+        elapsed_time = time.time() - start_time
+        logger.info(f"{reason}: {stage.description} (outputs reused in {elapsed_time:.2f} seconds)")
+        return StageResult(stage.name, "cached", elapsed_time)
+
+    def _start_stage(self, stage: WorkflowStage, upstream: List[str]) -> Optional[StageResult]:
+        """
+        Prepare a stage for execution.
+
+        Returns:
+            The final result if the stage is blocked or up to date, None if it has to run
+        """
+        missing = [name for name in stage.inputs if stage.key(name) not in self.data]
+        if missing:
+            logger.warning(f"Skipping: {stage.description} (missing inputs: {', '.join(missing)})")
+            return StageResult(stage.name, "blocked", error=f"Missing inputs: {', '.join(missing)}")
+
+        context = self._context(stage)
+        fingerprint, entry = None, {}
+        if self.manifest is not None:
+            fingerprint, entry = self._fingerprint(stage, upstream)
+        self._pending_entries[stage.name] = (fingerprint, entry)
+
+        if self.resume and self.journal is not None and stage.name in self.journal.completed_stages \
+                and (stage.loader is not None or not stage.outputs):
+            result = self._reuse_stage(stage, context, fingerprint, "Already completed")
+            if result is not None:
+                return result
+
+        if self.manifest is not None and self._is_up_to_date(stage, context, fingerprint):
+            result = self._reuse_stage(stage, context, fingerprint)
+            if result is not None:
+                return result
+
+        logger.info(f"Starting: {stage.description}")
+        return None
+
+    def _workdir(self, stage: WorkflowStage) -> str:
+        """Working directory of a stage."""
+        return stage.workdir or self.workdir
+
+    def _context(self, stage: WorkflowStage, unit_slots: Optional[threading.Semaphore] = None,
+                 in_process: bool = False) -> StageContext:
+        """Build the context of a stage; only stages in the main process can write to the journal."""
+        context = StageContext(stage.name, self._workdir(stage), stage.params, unit_slots=unit_slots)
+        if in_process and self.journal is not None:
+            context.journal = self.journal
+            if self.resume:
+                context.completed_units = self.journal.units(stage.name)
+        return context
+
+    def _inputs(self, stage: WorkflowStage) -> Dict[str, Any]:
+        """Collect the inputs of a stage under the names the stage declared."""
+        return {name: self.data[stage.key(name)] for name in stage.inputs}
+
+    def _store(self, stage: WorkflowStage, outputs: Dict[str, Any]) -> None:
+        """Keep the outputs of a stage for the stages downstream of it."""
+        for name in stage.outputs:
+            self.data[stage.key(name)] = outputs[name]
+
+    def _run_inline(self, stage: WorkflowStage) -> StageResult:
+        """Run a prepared stage in the current process."""
+        start_time = time.time()
+        try:
+            outputs, profile = _execute_stage(stage.func, self._context(stage, in_process=True),
+                                              self._inputs(stage))
+        except Exception as e:
+            return self._finish_stage(stage, None, {"wall_time": time.time() - start_time}, e)
+        return self._finish_stage(stage, outputs, profile)
+
+    def _finish_stage(self, stage: WorkflowStage, outputs: Optional[Dict[str, Any]], profile: Dict[str, Any],
+                      error: Optional[Exception] = None) -> StageResult:
+        """Store the outputs of an executed stage and record it in the manifest."""
+        fingerprint, entry = self._pending_entries.pop(stage.name, (None, {}))
+        elapsed_time = profile["wall_time"]
+
+        if error is None:
+            missing = [name for name in stage.outputs if name not in outputs]
+            if missing:
+                error = ValueError(f"Stage did not produce declared outputs: {', '.join(missing)}")
+
+        if error is not None:
+            if not stage.check:
+                # Errors in unchecked stages are expected and handled downstream
+                logger.warning(f"Errors in {stage.description} ignored: {error}")
+                self._store(stage, {name: None for name in stage.outputs})
+                # Partial results are never reused, nor are results built on them
+                self.fingerprints[stage.name] = None
+                self._forget(stage)
+                logger.info(f"Completed: {stage.description} in {elapsed_time:.2f} seconds")
+                return StageResult(stage.name, "succeeded", elapsed_time, str(error), profile)
+
+            logger.error(f"Error in {stage.description}: {error}", exc_info=error)
+            logger.error(f"Failed: {stage.description} after {elapsed_time:.2f} seconds")
+            self._forget(stage)
+            return StageResult(stage.name, "failed", elapsed_time, str(error), profile)
+
+        self._store(stage, outputs)
+        if self.journal is not None:
+            self.journal.stage_completed(stage.name)
+
+        self.fingerprints[stage.name] = fingerprint
+        if self.manifest is not None and fingerprint is not None:
+            entry.update({
+                "fingerprint": fingerprint,
+                "artifacts": stage.artifacts,
+                "completed": datetime.now().isoformat(timespec="seconds")
+            })
+            self.manifest.record(stage.name, entry)
+            self.manifest.save()
+
+        logger.info(f"Completed: {stage.description} in {elapsed_time:.2f} seconds")
+        return StageResult(stage.name, "succeeded", elapsed_time, profile=profile)
+
+    def _forget(self, stage: WorkflowStage) -> None:
+        """Remove a stage from the manifest after a failed or partial build."""
+        if self.manifest is not None:
+            self.manifest.forget(stage.name)
+            self.manifest.save()
+
+
+def run_command(command: List[str], description: str, cwd: Optional[str] = None, check: bool = True) -> bool:
+    """
+    Execute an external command and log its output.
+
+    Only used for scripts that have no importable entry point.
+    """
+    logger.info(f"Starting: {description}")
+    start_time = time.time()
+
+    try:
+        result = subprocess.run(
+            command,
+            check=check,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+
+        # Log stdout and stderr
+        if result.stdout:
+            for line in result.stdout.splitlines():
+                logger.info(f"STDOUT: {line}")
+
+        if result.stderr:
+            for line in result.stderr.splitlines():
+                logger.warning(f"STDERR: {line}")
+
+        elapsed_time = time.time() - start_time
+        logger.info(f"Completed: {description} in {elapsed_time:.2f} seconds")
+        return True
+
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Error in {description}: {e}")
+        logger.error(f"STDOUT: {e.stdout}")
+        logger.error(f"STDERR: {e.stderr}")
+        elapsed_time = time.time() - start_time
+        logger.error(f"Failed: {description} after {elapsed_time:.2f} seconds")
+        return False
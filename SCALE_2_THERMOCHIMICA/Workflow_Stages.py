@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Stage definitions for the SCALE 2 Thermochimica workflow.
+
+Every stage wraps one of the workflow modules and runs it in-process through
+the WorkflowEngine. Stages receive the objects produced upstream instead of
+re-parsing the JSON files on disk; the files they write are artifacts only.
+
+Stages also declare their source files, module files and artifacts so the
+engine can skip them when nothing they depend on has changed. The loaders below
+rebuild the in-memory outputs of a skipped stage from its artifacts.
+"""
+
+import os
+import sys
+import json
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List
+
+from Workflow_Engine import StageContext, WorkflowStage, run_command
+
+logger = logging.getLogger("Thermochimica-Workflow")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Same defaults as ThermochimicaWrapper, tracked as sources of the Thermochimica stage
+DEFAULT_TC_DATAFILE = os.path.expanduser('~/thermochimica/data/MSTDB-TC_V3.1_Fluorides_No_Func.dat')
+DEFAULT_TC_BINARY = os.path.expanduser('~/thermochimica/bin/InputScriptMode')
+
+
+def _module(*names: str) -> List[str]:
+    """Paths of workflow modules, used as the code version of a stage."""
+    return [os.path.join(SCRIPT_DIR, name) for name in names]
+
+
+def _read_json(path: str) -> Any:
+    """Read a JSON artifact, keeping the key order it was written with."""
+    with open(path, 'r') as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+
+
+def _write_json(path: str, data: Any, indent: int = 2) -> None:
+    """Write a JSON artifact, creating its directory if needed."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=indent)
+
+
+def nuclide_vector_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Aggregate nuclide densities into elements and map them onto the configured surrogates as arrays."""
+    from nuclide_vector_processor_v2 import generate_plots
+    from Surogate_Processing import process_nuclides_to_surrogates
+
+    processor, element_vector = process_nuclides_to_surrogates(
+        context.params["input_file"],
+        context.params["surrogate_file"],
+        element_output_file=context.path("Element_Vector.json")
+    )
+    processor.save_results(context.path("surrogate_vector.json"))
+
+    plot_type = context.params.get("plot_type", "stackplot")
+    if plot_type != 'none':
+        generate_plots(element_vector, plot_type, context.path("elemental_abundance"))
+
+    return {"element_vector": element_vector, "surrogate_vector": processor.get_results()}
+
+
+def _generator_options(params: Dict[str, Any]) -> Dict[str, Any]:
+    """ThermochimicaInputGenerator arguments taken from the Thermochimica stage parameters."""
+    return {
+        "datafile_path": params.get("datafile"),
+        "binary_path": params.get("binary"),
+        "output_path": params.get("output_path"),
+        "cache_dir": params.get("cache_dir"),
+        "cache_max_bytes": params.get("cache_max_mb", 1024) * 1024 ** 2,
+        "batch_size": params.get("batch_size", 0),
+        "warm_start": params.get("warm_start", False),
+        "chains": params.get("chains", 0),
+        "adaptive_stride": params.get("adaptive_stride", 0),
+        "adaptive_rtol": params.get("adaptive_rtol", 0.05),
+        "dedup_rtol": params.get("dedup_rtol", 0.0),
+        "timeout": params.get("timeout"),
+        "retries": params.get("retries", 0),
+        "max_concurrency": params.get("jobs", 0),
+        "queue_dir": params.get("queue_dir"),
+    }
+
+
+def _log_cache_stats(context: StageContext, cache_stats: Dict[str, Any]) -> None:
+    """Record and log the result cache statistics of a Thermochimica stage."""
+    if not cache_stats:
+        return
+    context.metrics["result_cache"] = cache_stats
+    logger.info(f"Thermochimica result cache: {cache_stats['hits']} hits, "
+                f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions "
+                f"({cache_stats['entries']} entries, {cache_stats['bytes'] / 1024 ** 2:.1f} MB)")
+
+
+def thermochimica_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate the Thermochimica decks and run them."""
+    from Input_Generator_and_Execution_Multi import ThermochimicaInputGenerator
+
+    tc_inputs = context.path("tc_inputs")
+    generator = ThermochimicaInputGenerator(
+        json_file_path=context.path("surrogate_vector.json"),
+        output_dir=tc_inputs,
+        temperature=context.params.get("temperature", "900"),
+        pressure=context.params.get("pressure", "1"),
+        surrogate_data=inputs["surrogate_vector"],
+        **_generator_options(context.params)
+    )
+    generator.generate_input_files()
+    results = generator.run_calculations(executor=context.executor,
+                                         completed=context.completed_units,
+                                         on_complete=context.unit_completed,
+                                         process_slots=context.unit_slots)
+    context.metrics["time_steps"] = generator.time_step_timings
+    _log_cache_stats(context, generator.cache_stats)
+
+    # Partial results are still handed downstream, but must not be reused by later runs
+    failed = [time_step for time_step, success in results.items() if not success]
+    if failed:
+        raise RuntimeError(f"Thermochimica failed for {len(failed)} of {len(results)} time steps: "
+                           f"{', '.join(failed)}")
+
+    return {"tc_inputs": tc_inputs}
+
+
+def thermochimica_sweep_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate and run the time step x temperature x pressure grid as one job set."""
+    from Input_Generator_and_Execution_Multi import ThermochimicaSweep
+
+    sweep = ThermochimicaSweep(
+        context.path("surrogate_vector.json"),
+        output_dir=context.path("tc_inputs"),
+        temperatures=context.params["temperatures"],
+        pressures=context.params["pressures"],
+        surrogate_data=inputs["surrogate_vector"],
+        **_generator_options(context.params)
+    )
+    sweep.generate_input_files()
+    results = sweep.run_calculations(executor=context.executor,
+                                     completed=context.completed_units,
+                                     on_complete=context.unit_completed,
+                                     process_slots=context.unit_slots)
+    context.metrics["time_steps"] = sweep.time_step_timings
+    _log_cache_stats(context, sweep.cache_stats)
+
+    failed = [f"{name}/{time_step}" for name, point in results.items()
+              for time_step, success in point.items() if not success]
+    if failed:
+        total = sum(len(point) for point in results.values())
+        raise RuntimeError(f"Thermochimica failed for {len(failed)} of {total} grid calculations: "
+                           f"{', '.join(failed)}")
+
+    return {"tc_sweep": context.path("tc_inputs")}
+
+
+def condensed_report_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Stitch the per-timestep Thermochimica outputs into one report."""
+    from Data_Load_and_Parse import DataLoaderParser
+    from CondensedReportGenerator2 import CondensedReportGenerator
+
+    loader = DataLoaderParser(context.workdir)
+    thermochimica_data = loader.load_thermochimica_outputs(context.workdir)
+
+    report_generator = CondensedReportGenerator(thermochimica_data)
+    condensed_report = report_generator.generate_condensed_report()
+    logger.info(f"Salt phases detected: {report_generator.get_salt_phases()}")
+    report_generator.save_condensed_report(context.path("output"))
+
+    return {"condensed_report": condensed_report}
+
+
+def sweep_report_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Condensed reports and redox ratios of every grid point of the sweep."""
+    from Data_Load_and_Parse import DataLoaderParser
+    from CondensedReportGenerator2 import generate_sweep_reports
+    from RedoxAnalyzer4 import save_sweep_redox_table
+
+    loader = DataLoaderParser(context.workdir)
+    sweep_reports = generate_sweep_reports(loader.load_sweep_outputs(context.workdir),
+                                           context.path("output", "sweep"))
+    save_sweep_redox_table(sweep_reports, context.path("output"))
+    return {}
+
+
+def phase_analysis_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Phase presence, mole amount and composition reports."""
+    from Phase_Analysis_and_Report_Gen2 import PhaseAnalysisReportGenerator
+
+    outputs = PhaseAnalysisReportGenerator(inputs["condensed_report"]).generate_all_reports_and_plots(
+        context.path("output"))
+    logger.info(f"Generated {len(outputs['reports'])} reports and {len(outputs['plots'])} plots")
+    return {}
+
+
+def msfl_report_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """MSFL (salt) phase reports."""
+    from MSFL_Phase_Report import MSFLPhaseAnalysisReportGenerator
+
+    outputs = MSFLPhaseAnalysisReportGenerator(inputs["condensed_report"]).generate_all_reports_and_plots(
+        context.path("msfl_output"))
+    logger.info(f"Generated {len(outputs['reports'])} reports and {len(outputs['plots'])} plots")
+    return {}
+
+
+def redox_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """UF3/UF4 and Cr2+/Cr3+ redox ratios."""
+    from RedoxAnalyzer4 import RedoxAnalyzer
+
+    output_dir = context.path("output")
+    analyzer = RedoxAnalyzer(inputs["condensed_report"])
+    uf_redox_ratios, cr_redox_ratios, _, _ = analyzer.generate_redox_report(output_dir)
+    analyzer.save_redox_summary(output_dir)
+
+    logger.info(f"Generated UF3/UF4 redox report with {len(uf_redox_ratios)} valid timesteps")
+    logger.info(f"Generated Cr2+/Cr3+ redox report with {len(cr_redox_ratios)} valid timesteps")
+    return {}
+
+
+def phase_specific_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Split the condensed report into salt, gas and solid phase data."""
+    from Phase_Speceific_Data_Processor import PhaseSpecificDataProcessor
+
+    processor = PhaseSpecificDataProcessor(inputs["condensed_report"], inputs["surrogate_vector"])
+    processor.save_phase_jsons(context.path("output"))
+
+    return {
+        "salt_phases": processor.phase_jsons["salt"],
+        "gas_phases": processor.phase_jsons["gas"],
+        "solid_phases": processor.phase_jsons["solid"]
+    }
+
+
+def decouple_gas_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Redistribute gas species over the elements behind each surrogate."""
+    from Decouple_Gas import decouple_gas_data
+
+    decoupled_gas = decouple_gas_data(inputs["gas_phases"], inputs["surrogate_vector"])
+    _write_json(context.path("output", "Decoupled_Gas.json"), decoupled_gas)
+    return {"decoupled_gas": decoupled_gas}
+
+
+def decouple_solids_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Redistribute solid species over the elements behind each surrogate."""
+    from Decouple_Solids import decouple_solids_data
+
+    decoupled_solids = decouple_solids_data(inputs["solid_phases"], inputs["surrogate_vector"])
+    _write_json(context.path("output", "Decoupled_Solids.json"), decoupled_solids)
+    return {"decoupled_solids": decoupled_solids}
+
+
+def decouple_salt_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Redistribute salt ions over the elements behind each surrogate."""
+    from Decouple_Salt import decouple_salt_data, print_decoupling_stats
+
+    decoupled_salt, decoupling_stats = decouple_salt_data(inputs["salt_phases"], inputs["surrogate_vector"])
+    _write_json(context.path("output", "Decoupled_Salt.json"), decoupled_salt)
+    print_decoupling_stats(decoupling_stats)
+    return {"decoupled_salt": decoupled_salt}
+
+
+def salt_nuclide_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Break the decoupled salt composition down to nuclides."""
+    from Salt_Nuclide_Decoupler import decouple_salt_nuclides, save_salt_nuclides
+
+    salt_nuclides = decouple_salt_nuclides(inputs["decoupled_salt"], inputs["element_vector"])
+    save_salt_nuclides(salt_nuclides, context.path("Salt_Nuclides.json"))
+    return {}
+
+
+def decoupled_species_stage(context: StageContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Run Decoupled_Species_Processor.py, which has no importable entry point."""
+    script = os.path.join(SCRIPT_DIR, "Decoupled_Species_Processor.py")
+    if not os.path.isfile(script):
+        raise FileNotFoundError(f"Script not found: {script}")
+
+    if not run_command([sys.executable, script], "Decoupled_Species_Processor.py", cwd=context.workdir):
+        raise RuntimeError("Decoupled_Species_Processor.py failed")
+    return {}
+
+
+def load_nuclide_vector(context: StageContext) -> Dict[str, Any]:
+    return {
+        "element_vector": _read_json(context.path("Element_Vector.json")),
+        "surrogate_vector": _read_json(context.path("surrogate_vector.json"))
+    }
+
+
+def load_tc_inputs(context: StageContext) -> Dict[str, Any]:
+    return {"tc_inputs": context.path("tc_inputs")}
+
+
+def load_tc_sweep(context: StageContext) -> Dict[str, Any]:
+    return {"tc_sweep": context.path("tc_inputs")}
+
+
+def load_condensed_report(context: StageContext) -> Dict[str, Any]:
+    return {"condensed_report": _read_json(context.path("output", "Condensed_Thermochimica_Report.json"))}
+
+
+def load_phase_jsons(context: StageContext) -> Dict[str, Any]:
+    return {
+        "salt_phases": _read_json(context.path("output", "Salt.json")),
+        "gas_phases": _read_json(context.path("output", "Gas.json")),
+        "solid_phases": _read_json(context.path("output", "Solids.json"))
+    }
+
+
+def load_decoupled_gas(context: StageContext) -> Dict[str, Any]:
+    return {"decoupled_gas": _read_json(context.path("output", "Decoupled_Gas.json"))}
+
+
+def load_decoupled_solids(context: StageContext) -> Dict[str, Any]:
+    return {"decoupled_solids": _read_json(context.path("output", "Decoupled_Solids.json"))}
+
+
+def load_decoupled_salt(context: StageContext) -> Dict[str, Any]:
+    return {"decoupled_salt": _read_json(context.path("output", "Decoupled_Salt.json"))}
+
+
+def build_workflow(input_file: str,
+                   surrogate_file: str = "surrogates_and_candidates.json",
+                   tc_params: Dict[str, Any] = None,
+                   sweep: Dict[str, Any] = None) -> List[WorkflowStage]:
+    """
+    Build the stage list of the standard SCALE 2 Thermochimica workflow.
+
+    Args:
+        input_file: Nuclide density JSON file processed by the first stage
+        surrogate_file: Surrogate mapping configuration
+        tc_params: Optional Thermochimica settings (temperature, pressure, datafile, binary, output_path,
+                   cache_dir, cache_max_mb, batch_size, warm_start, chains, adaptive_stride,
+                   adaptive_rtol, dedup_rtol)
+        sweep: Optional temperature/pressure grid (temperatures, pressures); adds a sweep stage
+               computing the grid for every time step and a stage reporting its redox ratios
+
+    Returns:
+        List[WorkflowStage]: The workflow stages in their natural order
+    """
+    tc_params = dict(tc_params or {})
+
+    stages = [
+        WorkflowStage("nuclide_vector", nuclide_vector_stage,
+                      f"Process nuclide vector from {input_file} into the surrogate vector",
+                      outputs=["element_vector", "surrogate_vector"],
+                      params={"input_file": input_file, "surrogate_file": surrogate_file},
+                      sources=[input_file, surrogate_file],
+                      code=_module("nuclide_vector_processor_v2.py", "Surogate_Processing.py"),
+                      artifacts=["Element_Vector.json", "surrogate_vector.json"],
+                      loader=load_nuclide_vector),
+        WorkflowStage("thermochimica", thermochimica_stage, "Generate and execute Thermochimica inputs",
+                      inputs=["surrogate_vector"], outputs=["tc_inputs"],
+                      params=tc_params,
+                      check=False,  # Some errors are expected and handled appropriately as noted in logs
+                      local=True,  # Starts the time step processes itself, within the shared process budget
+                      sources=[tc_params.get("datafile") or DEFAULT_TC_DATAFILE,
+                               tc_params.get("binary") or DEFAULT_TC_BINARY],
+                      code=_module("Input_Generator_and_Execution_Multi.py"),
+                      artifacts=["tc_inputs"],
+                      loader=load_tc_inputs),
+        WorkflowStage("condensed_report", condensed_report_stage, "Generate condensed Thermochimica report",
+                      inputs=["tc_inputs"], outputs=["condensed_report"],
+                      code=_module("Data_Load_and_Parse.py", "CondensedReportGenerator2.py"),
+                      artifacts=[os.path.join("output", "Condensed_Thermochimica_Report.json")],
+                      loader=load_condensed_report),
+        WorkflowStage("phase_analysis", phase_analysis_stage, "Generate phase analysis report",
+                      inputs=["condensed_report"],
+                      code=_module("Phase_Analysis_and_Report_Gen2.py"),
+                      artifacts=[os.path.join("output", "Phase_Presence_Report.csv")]),
+        WorkflowStage("msfl_report", msfl_report_stage, "Generate MSFL phase report",
+                      inputs=["condensed_report"],
+                      code=_module("MSFL_Phase_Report.py"),
+                      artifacts=["msfl_output"]),
+        WorkflowStage("redox", redox_stage, "Analyze redox ratios",
+                      inputs=["condensed_report"],
+                      code=_module("RedoxAnalyzer4.py"),
+                      artifacts=[os.path.join("output", "uf3_uf4_summary.json"),
+                                 os.path.join("output", "cr2_cr3_summary.json")]),
+        WorkflowStage("phase_specific", phase_specific_stage, "Process phase-specific data",
+                      inputs=["condensed_report", "surrogate_vector"],
+                      outputs=["salt_phases", "gas_phases", "solid_phases"],
+                      code=_module("Phase_Speceific_Data_Processor.py"),
+                      artifacts=[os.path.join("output", name) for name in ("Salt.json", "Gas.json", "Solids.json")],
+                      loader=load_phase_jsons),
+        WorkflowStage("decouple_gas", decouple_gas_stage, "Decouple gas phase data",
+                      inputs=["gas_phases", "surrogate_vector"], outputs=["decoupled_gas"],
+                      code=_module("Decouple_Gas.py"),
+                      artifacts=[os.path.join("output", "Decoupled_Gas.json")],
+                      loader=load_decoupled_gas),
+        WorkflowStage("decouple_solids", decouple_solids_stage, "Decouple solids phase data",
+                      inputs=["solid_phases", "surrogate_vector"], outputs=["decoupled_solids"],
+                      code=_module("Decouple_Solids.py"),
+                      artifacts=[os.path.join("output", "Decoupled_Solids.json")],
+                      loader=load_decoupled_solids),
+        WorkflowStage("decouple_salt", decouple_salt_stage, "Decouple salt phase data",
+                      inputs=["salt_phases", "surrogate_vector"], outputs=["decoupled_salt"],
+                      code=_module("Decouple_Salt.py"),
+                      artifacts=[os.path.join("output", "Decoupled_Salt.json")],
+                      loader=load_decoupled_salt),
+        WorkflowStage("salt_nuclides", salt_nuclide_stage, "Decouple salt nuclides",
+                      inputs=["decoupled_salt", "element_vector"],
+                      code=_module("Salt_Nuclide_Decoupler.py"),
+                      artifacts=["Salt_Nuclides.json"]),
+        WorkflowStage("decoupled_species", decoupled_species_stage, "Process decoupled species",
+                      inputs=["decoupled_gas", "decoupled_solids", "decoupled_salt"],
+                      code=_module("Decoupled_Species_Processor.py")),
+    ]
+
+    if sweep:
+        sweep_params = dict(tc_params, temperatures=[str(t) for t in sweep["temperatures"]],
+                            pressures=[str(p) for p in sweep["pressures"]])
+        stages += [
+            WorkflowStage("thermochimica_sweep", thermochimica_sweep_stage,
+                          "Generate and execute the temperature/pressure sweep",
+                          inputs=["surrogate_vector"], outputs=["tc_sweep"],
+                          params=sweep_params,
+                          check=False,
+                          local=True,
+                          sources=[tc_params.get("datafile") or DEFAULT_TC_DATAFILE,
+                                   tc_params.get("binary") or DEFAULT_TC_BINARY],
+                          code=_module("Input_Generator_and_Execution_Multi.py"),
+                          artifacts=[os.path.join("tc_inputs", "sweep_index.json")],
+                          loader=load_tc_sweep),
+            WorkflowStage("sweep_report", sweep_report_stage, "Report redox ratios across the sweep",
+                          inputs=["tc_sweep"],
+                          code=_module("Data_Load_and_Parse.py", "CondensedReportGenerator2.py",
+                                       "RedoxAnalyzer4.py"),
+                          artifacts=[os.path.join("output", "sweep"),
+                                     os.path.join("output", "redox_sweep.csv")]),
+        ]
+
+    return stages
@@ -2,30 +2,445 @@ import json
 import matplotlib.pyplot as plt
 import numpy as np
 from collections import defaultdict
+from functools import lru_cache
 import argparse
+import tempfile
+import hashlib
+import shutil
 import os
 
+NUCLIDE_CACHE_FORMAT = 1  # Version of the binary sidecar layout; older sidecars are rebuilt
+
+def iter_json_object(file_obj, chunk_size=1 << 20):
+    """
+    Yield the (key, value) pairs of a top-level JSON object one at a time.
+    
+    The file is read in chunks and each value is decoded as soon as it is complete, so
+    only the value being read (e.g. one time step) is held in memory.
+    
+    Args:
+        file_obj: Text file positioned at the start of a JSON object
+        chunk_size (int): Characters read at a time
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    
+    def more():
+        nonlocal buffer, position, eof
+        # Read at least as much as is pending, so an incomplete value is re-decoded a bounded number of times
+        chunk = file_obj.read(max(chunk_size, len(buffer) - position))
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+    
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n':
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            more()
+    
+    def expect(characters):
+        nonlocal position
+        skip_whitespace()
+        if position >= len(buffer) or buffer[position] not in characters:
+            found = repr(buffer[position]) if position < len(buffer) else 'end of file'
+            raise ValueError(f"Invalid JSON object: expected one of {characters!r}, found {found}")
+        position += 1
+        return buffer[position - 1]
+    
+    def value():
+        nonlocal position
+        while True:
+            skip_whitespace()
+            try:
+                result, end = decoder.raw_decode(buffer, position)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(buffer) or eof:
+                    position = end
+                    return result
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            more()
+    
+    expect('{')
+    skip_whitespace()
+    if position < len(buffer) and buffer[position] == '}':
+        return
+    while True:
+        key = value()
+        expect(':')
+        yield key, value()
+        if expect(',}') == '}':
+            return
+
+def _json_entry(key, value, indent):
+    """A key and its value as json.dump(indent=4) writes them at the given nesting depth."""
+    padding = ' ' * (4 * indent)
+    return padding + json.dumps(key) + ': ' + json.dumps(value, indent=4).replace('\n', '\n' + padding)
+
+@lru_cache(maxsize=16)
+def nuclide_element_index(nuclides):
+    """
+    Map nuclide names ("element-isotope") to their elements.
+    
+    Args:
+        nuclides (tuple): Nuclide names, one per column of a density array
+    
+    Returns:
+        tuple: Element names in order of first appearance and the element index of each nuclide
+    """
+    element_index = {}
+    nuclide_elements = np.array([element_index.setdefault(nuclide.split('-')[0], len(element_index))
+                                 for nuclide in nuclides], dtype=np.intp)
+    return list(element_index), nuclide_elements
+
+def aggregate_nuclides(densities, nuclide_elements, element_count):
+    """
+    Aggregate a time step x nuclide array of atom densities into elements.
+    
+    Isotopes are added to their element in column order (all elements and time steps at
+    once per isotope rank), so every total is summed in the same order as a running
+    per-nuclide sum and the results do not depend on the vectorization.
+    
+    Args:
+        densities (np.ndarray): Atom density of each nuclide (columns) at each time step (rows)
+        nuclide_elements (np.ndarray): Element index of each nuclide column
+        element_count (int): Number of elements
+    
+    Returns:
+        tuple: Element atom densities (time step x element), total atom density per time step,
+               element mole percents and isotope contribution percentages (time step x nuclide)
+    """
+    time_step_count = densities.shape[0]
+    element_densities = np.zeros((time_step_count, element_count))
+    
+    # Columns grouped by element, in column order within each element
+    order = np.argsort(nuclide_elements, kind='stable')
+    counts = np.bincount(nuclide_elements, minlength=element_count)
+    starts = np.cumsum(counts) - counts
+    for rank in range(int(counts.max()) if element_count else 0):
+        # The rank-th isotope of every element that has that many
+        has_rank = counts > rank
+        columns = order[starts[has_rank] + rank]
+        element_densities[:, has_rank] += densities[:, columns]
+    
+    total_densities = np.zeros(time_step_count)
+    for element in range(element_count):
+        total_densities += element_densities[:, element]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mole_percents = (element_densities / total_densities[:, None]) * 100
+        isotope_totals = element_densities[:, nuclide_elements]
+        contributions = np.where(isotope_totals > 0, (densities / isotope_totals) * 100, 0.0)
+    return element_densities, total_densities, mole_percents, contributions
+
+def _group_densities(data, nuclides, time_steps):
+    """
+    Collect the densities of time steps that list the same nuclides into one array.
+    
+    Returns:
+        tuple: The time steps with numeric densities, their densities as given and as a
+               time step x nuclide array, and the messages of the skipped time steps
+    """
+    skipped = {}
+    valid_steps = []
+    rows = []
+    for time_step in time_steps:
+        # Densities must be numbers; a time step with anything else is skipped
+        invalid = next((nuclide for nuclide, value in data[time_step]['nuclide'].items()
+                        if not isinstance(value, (int, float))), None)
+        if invalid is not None:
+            skipped[time_step] = f"Error processing time step {time_step}: non-numeric density for {invalid!r}"
+            continue
+        valid_steps.append(time_step)
+        rows.append(list(data[time_step]['nuclide'].values()))
+    densities = np.array(rows, dtype=float).reshape(len(rows), len(nuclides))
+    return valid_steps, rows, densities, skipped
+
+def _process_time_step_group(data, nuclides, time_steps, elements_to_include, include_isotopes):
+    """
+    Process time steps that list the same nuclides, as one array.
+    
+    Returns:
+        dict: For each time step, its surrogate_vector and surrogate_percentages entries,
+              or the message explaining why it was skipped
+    """
+    valid_steps, rows, densities, processed_steps = _group_densities(data, nuclides, time_steps)
+    processed_steps.update(_process_densities(densities, nuclides, valid_steps, elements_to_include,
+                                              include_isotopes, rows))
+    return processed_steps
+
+def aggregate_time_steps(densities, nuclides, time_steps, elements_to_include=None):
+    """
+    Aggregate a time step x nuclide array of atom densities into element arrays.
+    
+    Time steps without elements, or whose total atom density is not positive, are skipped.
+    No per-element entries are built; see element_entries for those.
+    
+    Args:
+        densities (np.ndarray): Atom density of each nuclide (columns) at each time step (rows)
+        nuclides (tuple): Nuclide names of the columns
+        time_steps (list): Time steps of the rows
+        elements_to_include (list, optional): Elements to report. Defaults to None (all elements).
+    
+    Returns:
+        dict: The time steps kept ("time_steps") and their rows ("rows"), the reported elements
+              ("elements") with their atom densities and mole percents as time step x element
+              arrays ("atom_density", "mole_percent"), the messages of the skipped time steps
+              ("skipped"), and the isotope data used by element_entries
+    """
+    elements, nuclide_elements = nuclide_element_index(nuclides)
+    element_densities, total_densities, mole_percents, contributions = aggregate_nuclides(
+        densities, nuclide_elements, len(elements))
+    
+    skipped = {}
+    rows = []
+    for step, time_step in enumerate(time_steps):
+        # Skip time steps where no elements were found
+        if not elements:
+            skipped[time_step] = f"Warning: Skipping time step {time_step} - no valid element data found"
+            continue
+        
+        # Skip if total atom density is zero to avoid division by zero
+        total_atom_density = float(total_densities[step])
+        if total_atom_density <= 0:
+            skipped[time_step] = (f"Warning: Skipping time step {time_step} - total atom density is "
+                                  f"zero or negative: {total_atom_density}")
+            continue
+        rows.append(step)
+    
+    # Only include in output if no filter is set, or if element is in the filter
+    columns = [index for index, element in enumerate(elements)
+               if elements_to_include is None or element in elements_to_include]
+    element_nuclides = [[] for _ in elements]
+    for column, element in enumerate(nuclide_elements):
+        element_nuclides[element].append(column)
+    
+    selection = np.ix_(np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp))
+    return {
+        "time_steps": [time_steps[step] for step in rows],
+        "rows": rows,
+        "elements": [elements[index] for index in columns],
+        "atom_density": element_densities[selection],
+        "mole_percent": mole_percents[selection],
+        "skipped": skipped,
+        "nuclides": nuclides,
+        "element_nuclides": [element_nuclides[index] for index in columns],
+        "densities": densities,
+        "contributions": contributions
+    }
+
+def element_entries(group, include_isotopes=True, rows=None):
+    """
+    Build the surrogate_vector and surrogate_percentages entries of aggregated time steps.
+    
+    Args:
+        group (dict): Result of aggregate_time_steps
+        include_isotopes (bool, optional): Whether to include isotopic contributions. Defaults to True.
+        rows (list, optional): Densities as given in the input, reported in the isotope
+            percentages. Defaults to None (the values of the array).
+    
+    Returns:
+        dict: For each time step kept, its surrogate_vector and surrogate_percentages entries
+    """
+    nuclides = group["nuclides"]
+    entries = {}
+    for step, (time_step, row) in enumerate(zip(group["time_steps"], group["rows"])):
+        step_densities = group["atom_density"][step].tolist()
+        step_mole_percents = group["mole_percent"][step].tolist()
+        processed_step_vector = {}
+        processed_step_percentages = {}
+        if include_isotopes:
+            step_contributions = group["contributions"][row].tolist()
+            step_reported = rows[row] if rows is not None else group["densities"][row].tolist()
+        for index, element in enumerate(group["elements"]):
+            processed_step_vector[element] = {
+                'atom_density': step_densities[index],
+                'mole_percent': step_mole_percents[index]
+            }
+            if include_isotopes:
+                # Densities are reported as given in the input
+                processed_step_percentages[element] = {
+                    nuclides[column]: {
+                        'atom_density': step_reported[column],
+                        'contribution_percentage': step_contributions[column]
+                    }
+                    for column in group["element_nuclides"][index]
+                }
+        entries[time_step] = (processed_step_vector, processed_step_percentages)
+    return entries
+
+def _process_densities(densities, nuclides, time_steps, elements_to_include, include_isotopes, rows=None):
+    """
+    Process a time step x nuclide array of atom densities.
+    
+    Args:
+        rows (list, optional): Densities as given in the input, reported in the isotope
+            percentages. Defaults to None (the values of the array).
+    
+    Returns:
+        dict: For each time step, its surrogate_vector and surrogate_percentages entries,
+              or the message explaining why it was skipped
+    """
+    group = aggregate_time_steps(densities, nuclides, time_steps, elements_to_include)
+    processed_steps = dict(group["skipped"])
+    processed_steps.update(element_entries(group, include_isotopes, rows))
+    return processed_steps
+
+def nuclide_cache_paths(input_file):
+    """
+    Paths of the binary sidecar of a nuclide density file.
+    
+    Returns:
+        tuple: The .npy time step x nuclide density matrix and its .index.json
+               (source signature, time steps and nuclide names)
+    """
+    return input_file + '.npy', input_file + '.index.json'
+
+def _source_signature(input_file, content=None):
+    """Size, modification time and SHA-256 of a file (of content, if given, as read from it)."""
+    stat = os.stat(input_file)
+    digest = hashlib.sha256()
+    if content is not None:
+        digest.update(content)
+    else:
+        with open(input_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+def load_nuclide_densities(input_file):
+    """
+    Memory-map the binary sidecar of a nuclide density file, if it is up to date.
+    
+    The sidecar is current if the size and SHA-256 of the input match the ones it was
+    built from; the hash is only recomputed when the modification time changed.
+    
+    Args:
+        input_file (str): Path to the nuclide density JSON file
+    
+    Returns:
+        tuple: Time steps, nuclide names and the read-only time step x nuclide density
+               matrix, or None if there is no current sidecar
+    """
+    matrix_file, index_file = nuclide_cache_paths(input_file)
+    try:
+        with open(index_file, 'r') as f:
+            index = json.load(f)
+        if index.get('format') != NUCLIDE_CACHE_FORMAT:
+            return None
+        source = index['source']
+        stat = os.stat(input_file)
+        if stat.st_size != source['size']:
+            return None
+        if stat.st_mtime_ns != source['mtime_ns']:
+            # Touched, possibly unchanged: compare the content
+            signature = _source_signature(input_file)
+            if signature['sha256'] != source['sha256']:
+                return None
+            index['source'] = signature
+            _write_atomic(index_file, lambda f: json.dump(index, f), 'w')
+        densities = np.load(matrix_file, mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+    
+    if densities.shape != (len(index['time_steps']), len(index['nuclides'])):
+        return None
+    return index['time_steps'], tuple(index['nuclides']), densities
+
+def build_nuclide_cache(input_file, data, content=None):
+    """
+    Write the binary sidecar of a nuclide density file.
+    
+    Only files in which every time step lists the same nuclides, all with floating point
+    densities, fit the time step x nuclide layout; for others no sidecar is written. A
+    sidecar that cannot be written (e.g. in a read-only directory) is skipped with a warning.
+    
+    Args:
+        input_file (str): Path to the nuclide density JSON file
+        data (dict): Its parsed content
+        content (bytes, optional): Its raw content, to hash instead of rereading it
+    
+    Returns:
+        bool: Whether the sidecar was written
+    """
+    time_steps = list(data)
+    if not time_steps or not all(data[time_step] and 'nuclide' in data[time_step] for time_step in time_steps):
+        return False
+    nuclides = tuple(data[time_steps[0]]['nuclide'])
+    rows = []
+    for time_step in time_steps:
+        nuclide_data = data[time_step]['nuclide']
+        if tuple(nuclide_data) != nuclides:
+            return False
+        row = list(nuclide_data.values())
+        # Integers would be reported as floats from the matrix
+        if not all(type(value) is float for value in row):
+            return False
+        rows.append(row)
+    
+    matrix_file, index_file = nuclide_cache_paths(input_file)
+    index = {
+        'format': NUCLIDE_CACHE_FORMAT,
+        'source': _source_signature(input_file, content),
+        'time_steps': time_steps,
+        'nuclides': list(nuclides)
+    }
+    try:
+        densities = np.array(rows, dtype=np.float64).reshape(len(time_steps), len(nuclides))
+        _write_atomic(matrix_file, lambda f: np.save(f, densities), 'wb')
+        # The index is written last, so it never describes a partial matrix
+        _write_atomic(index_file, lambda f: json.dump(index, f), 'w')
+    except OSError as e:
+        print(f"Warning: Could not write the nuclide density cache of {input_file}: {str(e)}")
+        return False
+    return True
+
+def _write_atomic(path, write, mode):
+    """Write a file under a temporary name and move it into place."""
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, mode) as f:
+            write(f)
+        os.replace(tmp_file, path)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
 def process_nuclide_data(input_file, output_file, elements_to_include=None, plot_type='stackplot', 
-                         include_isotopes=True):
+                         include_isotopes=True, stream=False, cache=True):
     """
     Process nuclide data from a JSON file to calculate element atom densities and mole percentages.
     Can optionally include isotopic contribution percentages.
     
+    Nuclide names are parsed once per distinct nuclide list, and the time steps sharing
+    it are aggregated as one time step x nuclide array (see aggregate_nuclides).
+    
     Args:
         input_file (str): Path to input JSON file
         output_file (str): Path to output JSON file
         elements_to_include (list, optional): List of element symbols to include. Defaults to None (all elements).
         plot_type (str, optional): Type of plot to generate ('stackplot', 'semilog', 'combined'). Defaults to 'stackplot'.
         include_isotopes (bool, optional): Whether to include isotopic contributions. Defaults to True.
+        stream (bool, optional): Read, process and write one time step at a time, so memory use is
+            bounded by one time step (see process_nuclide_data_streaming). Defaults to False.
+        cache (bool, optional): Read the densities from the binary sidecar of the input when it is
+            up to date, and build it otherwise (see load_nuclide_densities). Defaults to True.
     
     Returns:
-        dict: Processed nuclide data
+        dict: Processed nuclide data (in streaming mode the number of time steps written instead)
     """
-    print(f"Processing file: {input_file}")
+    if stream:
+        return process_nuclide_data_streaming(input_file, output_file, elements_to_include, include_isotopes,
+                                              cache)
     
-    # Read the input JSON file
-    with open(input_file, 'r') as f:
-        data = json.load(f)
+    print(f"Processing file: {input_file}")
     
     # Create a dictionary to store processed data with structure similar to surrogate_vector.json
     processed_data = {
@@ -33,101 +448,175 @@ def process_nuclide_data(input_file, output_file, elements_to_include=None, plot
         "surrogate_percentages": {}
     }
     
-    # Process each time step in the data
+    for time_step, processed_step_vector, processed_step_percentages in iter_element_time_steps(
+            input_file, elements_to_include, include_isotopes, cache):
+        processed_data["surrogate_vector"][time_step] = processed_step_vector
+        if include_isotopes:
+            processed_data["surrogate_percentages"][time_step] = processed_step_percentages
+    
+    # Check if we have any processed data
+    if not processed_data["surrogate_vector"]:
+        raise ValueError("No valid data was processed. Check input file format and content.")
+    
+    # Save processed data to a new JSON file
+    with open(output_file, 'w') as f:
+        json.dump(processed_data, f, indent=4)
+    
+    return processed_data
+
+def read_nuclide_groups(input_file, cache=True):
+    """
+    Read a nuclide density file as time step x nuclide arrays, one per distinct nuclide list.
+    
+    With cache, an up-to-date binary sidecar is memory-mapped instead of parsing the JSON,
+    and a missing or stale one is built (see load_nuclide_densities).
+    
+    Returns:
+        tuple: All time steps in input order; the groups as (nuclides, time steps, time step x
+               nuclide densities, densities as given or None); and the messages of the time
+               steps in no group by time step
+    """
+    columns = load_nuclide_densities(input_file) if cache else None
+    if columns is not None:
+        print(f"Using nuclide density cache {nuclide_cache_paths(input_file)[0]}")
+        time_steps, nuclides, densities = columns
+        # Every time step in the sidecar has nuclide data
+        return list(time_steps), [(nuclides, time_steps, densities, None)], {}
+    
+    # Read the input JSON file
+    with open(input_file, 'rb') as f:
+        content = f.read()
+    data = json.loads(content)
+    if cache and build_nuclide_cache(input_file, data, content):
+        print(f"Saved nuclide density cache {nuclide_cache_paths(input_file)[0]}")
+    
+    # Time steps listing the same nuclides in the same order are aggregated together
+    skipped = {}
+    group_steps = {}
     for time_step, time_data in data.items():
         # Skip empty time steps or those without nuclide data
         if not time_data or 'nuclide' not in time_data:
-            print(f"Warning: Skipping time step {time_step} - no nuclide data found")
+            skipped[time_step] = f"Warning: Skipping time step {time_step} - no nuclide data found"
+            continue
+        group_steps.setdefault(tuple(time_data['nuclide']), []).append(time_step)
+    
+    groups = []
+    for nuclides, time_steps in group_steps.items():
+        valid_steps, rows, densities, invalid = _group_densities(data, nuclides, time_steps)
+        skipped.update(invalid)
+        groups.append((nuclides, valid_steps, densities, rows))
+    return list(data), groups, skipped
+
+def iter_element_time_steps(input_file, elements_to_include=None, include_isotopes=True, cache=True):
+    """
+    Process a nuclide density file and yield its time steps in input order.
+    
+    The whole file is processed at once (see process_nuclide_data); the results are
+    handed out one time step at a time.
+    
+    Yields:
+        tuple: Time step, its surrogate_vector entry and its surrogate_percentages entry
+    """
+    time_steps, groups, processed_steps = read_nuclide_groups(input_file, cache)
+    for nuclides, group_steps, densities, rows in groups:
+        processed_steps.update(_process_densities(densities, nuclides, group_steps, elements_to_include,
+                                                  include_isotopes, rows))
+    
+    # Hand out the processed data in the order of the input
+    for time_step in time_steps:
+        result = processed_steps[time_step]
+        if isinstance(result, str):
+            print(result)
             continue
         
-        # Initialize dictionaries for total element atom densities and isotopic contributions
-        total_element_atom_densities = defaultdict(float)
-        isotope_contributions = defaultdict(dict)
-        
-        try:
-            # First, calculate total atom densities for ALL elements and track isotope contributions
-            for nuclide, atom_density in time_data['nuclide'].items():
-                # Handle nuclides in format "element-isotope"
-                parts = nuclide.split('-')
-                element = parts[0]
-                
-                # Add to total element atom density
-                total_element_atom_densities[element] += atom_density
-                
-                # Track isotope contribution if we're including isotopes
-                if include_isotopes:
-                    isotope_contributions[element][nuclide] = atom_density
-            
-            # Skip time steps where no elements were found
-            if not total_element_atom_densities:
-                print(f"Warning: Skipping time step {time_step} - no valid element data found")
+        yield time_step, result[0], result[1]
+
+def iter_processed_time_steps(input_file, elements_to_include=None, include_isotopes=True, cache=True):
+    """
+    Read and process the time steps of a nuclide density file one at a time.
+    
+    With cache, an up-to-date binary sidecar is read instead of the JSON (it is not built
+    here, as that needs the whole file in memory).
+    
+    Yields:
+        tuple: Time step, its surrogate_vector entry and its surrogate_percentages entry
+    """
+    columns = load_nuclide_densities(input_file) if cache else None
+    if columns is not None:
+        time_steps, nuclides, densities = columns
+        for step, time_step in enumerate(time_steps):
+            result = _process_densities(densities[step:step + 1], nuclides, [time_step],
+                                        elements_to_include, include_isotopes)[time_step]
+            if isinstance(result, str):
+                print(result)
                 continue
-                
-            # Calculate total atom density for mole percent
-            total_atom_density = sum(total_element_atom_densities.values())
-            
-            # Skip if total atom density is zero to avoid division by zero
-            if total_atom_density <= 0:
-                print(f"Warning: Skipping time step {time_step} - total atom density is zero or negative: {total_atom_density}")
+            yield time_step, result[0], result[1]
+        return
+    
+    with open(input_file, 'r') as f:
+        for time_step, time_data in iter_json_object(f):
+            # Skip empty time steps or those without nuclide data
+            if not time_data or 'nuclide' not in time_data:
+                print(f"Warning: Skipping time step {time_step} - no nuclide data found")
                 continue
             
-            # Prepare processed data for this time step
-            processed_step_vector = {}
-            processed_step_percentages = {}
-            
-            for element, total_density in total_element_atom_densities.items():
-                # Calculate mole percent using TOTAL atom density
-                mole_percent = (total_density / total_atom_density) * 100
-                
-                # Only include in output if no filter is set, or if element is in the filter
-                if elements_to_include is None or element in elements_to_include:
-                    # Add element to surrogate_vector
-                    processed_step_vector[element] = {
-                        'atom_density': total_density,
-                        'mole_percent': mole_percent
-                    }
-                    
-                    # Add isotopic contributions if requested
-                    if include_isotopes:
-                        isotope_data = {}
-                        # Check if total_density is zero to avoid division by zero
-                        if total_density > 0:
-                            for nuclide, density in isotope_contributions[element].items():
-                                # Calculate contribution percentage
-                                contribution_percentage = (density / total_density) * 100
-                                isotope_data[nuclide] = {
-                                    'atom_density': density,
-                                    'contribution_percentage': contribution_percentage
-                                }
-                        else:
-                            # Handle case where total_density is zero
-                            for nuclide, density in isotope_contributions[element].items():
-                                isotope_data[nuclide] = {
-                                    'atom_density': density,
-                                    'contribution_percentage': 0.0  # Set to zero if total density is zero
-                                }
-                        processed_step_percentages[element] = isotope_data
-            
-            # Add processed data to output structure
-            processed_data["surrogate_vector"][time_step] = processed_step_vector
-            if include_isotopes:
-                processed_data["surrogate_percentages"][time_step] = processed_step_percentages
-            
-        except Exception as e:
-            print(f"Error processing time step {time_step}: {str(e)}")
-            import traceback
-            traceback.print_exc()  # Print detailed error information
-            continue
+            result = _process_time_step_group({time_step: time_data}, tuple(time_data['nuclide']), [time_step],
+                                              elements_to_include, include_isotopes)[time_step]
+            if isinstance(result, str):
+                print(result)
+                continue
+            yield time_step, result[0], result[1]
+
+def process_nuclide_data_streaming(input_file, output_file, elements_to_include=None, include_isotopes=True,
+                                   cache=True):
+    """
+    Process a nuclide density file of any length with memory bounded by one time step.
     
-    # Check if we have any processed data
-    if not processed_data["surrogate_vector"]:
-        raise ValueError("No valid data was processed. Check input file format and content.")
+    Each time step is parsed, processed and written as soon as it has been read. The
+    isotopic contributions are spooled to a temporary file and appended once the element
+    data of the last time step is written, so the output file is the same as the one of
+    process_nuclide_data.
     
-    # Save processed data to a new JSON file
-    with open(output_file, 'w') as f:
-        json.dump(processed_data, f, indent=4)
+    Returns:
+        int: The number of time steps written; the processed data itself is only in
+             output_file
+    """
+    print(f"Processing file: {input_file} (streaming)")
     
-    return processed_data
+    count = 0
+    # Written under a temporary name, so a failed run leaves no partial output
+    tmp_file = output_file + '.tmp'
+    with open(tmp_file, 'w') as out, \
+            tempfile.TemporaryFile('w+', dir=os.path.dirname(os.path.abspath(output_file))) as percentages:
+        try:
+            out.write('{\n    "surrogate_vector": {')
+            for time_step, step_vector, step_percentages in iter_processed_time_steps(
+                    input_file, elements_to_include, include_isotopes, cache):
+                separator = ',\n' if count else '\n'
+                out.write(separator + _json_entry(time_step, step_vector, 2))
+                if include_isotopes:
+                    percentages.write(separator + _json_entry(time_step, step_percentages, 2))
+                count += 1
+            
+            # Check if we have any processed data
+            if not count:
+                raise ValueError("No valid data was processed. Check input file format and content.")
+            
+            out.write('\n    },\n    "surrogate_percentages": {')
+            if percentages.tell():
+                percentages.seek(0)
+                shutil.copyfileobj(percentages, out)
+                out.write('\n    }')
+            else:
+                out.write('}')
+            out.write('\n}')
+        except BaseException:
+            out.close()
+            os.remove(tmp_file)
+            raise
+    os.replace(tmp_file, output_file)
+    
+    return count
 
 def generate_plots(processed_data, plot_type='stackplot', output_prefix='elemental_abundance'):
     """
@@ -409,6 +898,11 @@ Examples:
     parser.add_argument('--plot-prefix', default='elemental_abundance', 
                         help='Prefix for plot filenames')
     parser.add_argument('--debug', action='store_true', help='Print debug information about the input file')
+    parser.add_argument('--stream', action='store_true',
+                        help='Process one time step at a time, with memory bounded by one time step')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Parse the JSON input even if its binary density cache is up to date, '
+                             'and do not write the cache')
     
     args = parser.parse_args()
     
@@ -424,11 +918,18 @@ Examples:
             args.output, 
             elements_to_include=args.elements,
             plot_type=args.plot,
-            include_isotopes=not args.no_isotopes
+            include_isotopes=not args.no_isotopes,
+            stream=args.stream,
+            cache=not args.no_cache
         )
         
         print(f"\nProcessing complete. Results saved to {args.output}")
         
+        # Streaming keeps nothing in memory, so reports and plots read the results back
+        if args.stream and (args.verify or args.verbose or args.plot != 'none'):
+            with open(args.output, 'r') as f:
+                processed_data = json.load(f)
+        
         # Optional: Verify total mole percent
         if args.verify:
             print("\nVerifying Total Mole Percent:")
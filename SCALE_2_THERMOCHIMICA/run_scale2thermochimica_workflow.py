@@ -4,74 +4,134 @@ Thermochimica Workflow Automation Script
 
 This script automates the execution of the Thermochimica analysis pipeline,
 running all modules in the correct sequence while handling dependencies.
+All stages run in-process through the WorkflowEngine; results are handed
+from stage to stage in memory and files are written only as artifacts.
+
+Stages whose inputs, parameters and code are unchanged since their last
+successful run are skipped (see workflow_manifest.json); use --force to rerun
+everything. Independent stages (the reports, the phase decoupling) run
+concurrently on --workers processes, while the Thermochimica time steps run
+as subprocesses of the main process (--tc-jobs at once, one per CPU by
+default). Each run
+writes a JSON performance profile to
+profiles/workflow_profile_<timestamp>.json; older profiles are kept.
+
+With several input files the script runs a campaign: all cases are scheduled
+on one shared worker pool, each in its own directory under --campaign-dir, and
+a single campaign_summary.json is written.
+
+Finished stages and Thermochimica time steps are recorded in
+workflow_journal.jsonl as they complete; after an interrupted run, --resume
+restarts at the first unfinished stage or time step.
+
+Thermochimica results are memoized in a content-addressed cache (tc_cache/,
+bounded by --tc-cache-size MB); identical equilibrium problems are restored
+instead of recomputed. Use --no-tc-cache to disable it. With --tc-batch-size N,
+N time steps share one Thermochimica process (and one parse of the data file).
+With --tc-warm-start the time steps run as one ordered chain per worker, each
+time step seeded with the solution of the previous one. --tc-adaptive STRIDE
+computes every STRIDE-th time step, bisects only where the stable phases or
+redox ratios change and interpolates the rest (marked as interpolated).
+--tc-dedup-rtol solves near-identical compositions once and copies the result,
+also across the cases of a campaign through the shared result cache.
+--tc-timeout kills a Thermochimica run that exceeds the given number of seconds
+(per calculation) and retries it up to --tc-retries times; time steps start
+longest-expected first, using the runtimes of earlier runs (tc_runtimes.json).
+With --tc-queue-dir DIR the time steps are not run on this host but published
+to a work queue in DIR, served by Thermochimica_Work_Queue.py workers on any
+host that mounts it.
+
+--tc-temperatures / --tc-pressures add a sweep: every time step is also solved
+at each temperature x pressure grid point (tc_inputs/T<T>_P<P>/), on the same
+worker pool, and the redox ratios of the grid are tabulated in
+output/redox_sweep.csv.
 
 Usage:
-    ./run_scale2thermochimica_workflow.py [input_file]
+    ./run_scale2thermochimica_workflow.py [input_file ...] [--force] [--resume] [--workers N] [--tc-jobs N] [--campaign-dir DIR]
     
     If input_file is not specified, it defaults to "ThEIRENE_FuelSalt_NuclideDensities.json"
 """
 
 import os
 import sys
-import subprocess
 import time
 import logging
+import json
 import argparse
 from datetime import datetime
 
-# Setup argument parser
-parser = argparse.ArgumentParser(description="Thermochimica Workflow Automation Script")
-parser.add_argument("input_file", nargs="?", default="ThEIRENE_FuelSalt_NuclideDensities.json",
-                    help="Input file for nuclide vector processing (default: ThEIRENE_FuelSalt_NuclideDensities.json)")
-args = parser.parse_args()
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f"thermochimica_workflow_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"),
-        logging.StreamHandler()
-    ]
-)
+from Workflow_Engine import WorkflowEngine
+from Workflow_Stages import build_workflow
+from Workflow_Campaign import build_campaign, ensure_case_directories, summarize_campaign, save_campaign_summary
 
 logger = logging.getLogger("Thermochimica-Workflow")
 
-def run_command(command, description, check=True):
-    """Execute a shell command and log its output."""
-    logger.info(f"Starting: {description}")
-    start_time = time.time()
-    
-    try:
-        result = subprocess.run(
-            command,
-            check=check,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        # Log stdout and stderr
-        if result.stdout:
-            for line in result.stdout.splitlines():
-                logger.info(f"STDOUT: {line}")
-        
-        if result.stderr:
-            for line in result.stderr.splitlines():
-                logger.warning(f"STDERR: {line}")
-        
-        elapsed_time = time.time() - start_time
-        logger.info(f"Completed: {description} in {elapsed_time:.2f} seconds")
-        return True
-    
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error in {description}: {e}")
-        logger.error(f"STDOUT: {e.stdout}")
-        logger.error(f"STDERR: {e.stderr}")
-        elapsed_time = time.time() - start_time
-        logger.error(f"Failed: {description} after {elapsed_time:.2f} seconds")
-        return False
+MANIFEST_FILE = "workflow_manifest.json"
+JOURNAL_FILE = "workflow_journal.jsonl"
+TC_CACHE_DIR = "tc_cache"
+PROFILE_DIR = "profiles"
+CAMPAIGN_SUMMARY_FILE = "campaign_summary.json"
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description="Thermochimica Workflow Automation Script")
+    parser.add_argument("input_files", nargs="*", default=["ThEIRENE_FuelSalt_NuclideDensities.json"],
+                        help="Input file(s) for nuclide vector processing; more than one runs a campaign "
+                             "(default: ThEIRENE_FuelSalt_NuclideDensities.json)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rerun every stage even if its inputs are unchanged")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run, skipping the stages and time steps it completed")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Maximum number of stages running at the same time (default: min(4, CPU count))")
+    parser.add_argument("--tc-jobs", type=int, default=0,
+                        help="Thermochimica processes run at once, shared by all cases and grid points "
+                             "(default: 0, one per CPU)")
+    parser.add_argument("--tc-cache-dir", default=None,
+                        help=f"Thermochimica result cache directory (default: {TC_CACHE_DIR} in the run or campaign directory)")
+    parser.add_argument("--tc-cache-size", type=int, default=1024,
+                        help="Size bound of the Thermochimica result cache in MB (default: 1024)")
+    parser.add_argument("--no-tc-cache", action="store_true",
+                        help="Always run Thermochimica instead of restoring cached results")
+    parser.add_argument("--tc-batch-size", type=int, default=0,
+                        help="Time steps solved per Thermochimica process with a calculation list deck "
+                             "(default: 0, one process per time step)")
+    parser.add_argument("--tc-warm-start", action="store_true",
+                        help="Run the time steps as one ordered chain per worker, seeding each time step "
+                             "with the previous solution")
+    parser.add_argument("--tc-adaptive", type=int, default=0, metavar="STRIDE",
+                        help="Adaptive sampling: compute every STRIDE-th time step, bisect where the phases or "
+                             "redox ratios change and interpolate the rest (default: 0, off)")
+    parser.add_argument("--tc-adaptive-rtol", type=float, default=0.05,
+                        help="Relative redox ratio change that triggers bisection in adaptive sampling (default: 0.05)")
+    parser.add_argument("--tc-dedup-rtol", type=float, default=0.0,
+                        help="Solve compositions agreeing within this relative tolerance per element only once "
+                             "(default: 0, off)")
+    parser.add_argument("--tc-timeout", type=float, default=None,
+                        help="Seconds after which a Thermochimica run is killed, per calculation (default: no limit)")
+    parser.add_argument("--tc-retries", type=int, default=0,
+                        help="Further attempts of a Thermochimica run that timed out (default: 0)")
+    parser.add_argument("--tc-queue-dir", default=None,
+                        help="Run Thermochimica on the Thermochimica_Work_Queue.py workers serving this shared "
+                             "directory (default: on this host)")
+    parser.add_argument("--tc-temperatures", nargs="+", default=None,
+                        help="Temperatures (K) of a sweep grid solved for every time step")
+    parser.add_argument("--tc-pressures", nargs="+", default=None,
+                        help="Pressures (atm) of a sweep grid solved for every time step (default: 1)")
+    parser.add_argument("--campaign-dir", default="campaign",
+                        help="Directory holding one output directory per case in campaign mode (default: campaign)")
+    return parser.parse_args(argv)
+
+def setup_logging(run_id):
+    """Log to a timestamped file and to the console."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(f"thermochimica_workflow_{run_id}.log"),
+            logging.StreamHandler()
+        ]
+    )
 
 def ensure_directories_exist():
     """Create necessary output directories if they don't exist."""
@@ -82,99 +142,95 @@ def ensure_directories_exist():
             os.makedirs(directory)
             logger.info(f"Created directory: {directory}")
 
-def main():
+def save_profile(engine, run_id, args, total_time, base_dir="."):
+    """Write the performance profile of this run next to those of earlier runs."""
+    critical_time, critical_stages = engine.critical_path()
+    profile = {
+        "run_id": run_id,
+        "input_files": args.input_files,
+        "workers": args.workers,
+        "tc_jobs": args.tc_jobs or os.cpu_count(),
+        "total_wall_time": round(total_time, 3),
+        "critical_path": {"time": round(critical_time, 3), "stages": critical_stages},
+        "stages": engine.profile()
+    }
+    
+    profile_dir = os.path.join(base_dir, PROFILE_DIR)
+    os.makedirs(profile_dir, exist_ok=True)
+    profile_path = os.path.join(profile_dir, f"workflow_profile_{run_id}.json")
+    with open(profile_path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    logger.info(f"Performance profile saved to {profile_path}")
+
+def main(argv=None):
     """Main workflow execution function."""
-    input_file = args.input_file
-    logger.info(f"Starting Thermochimica workflow automation with input file: {input_file}")
+    args = parse_args(argv)
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    setup_logging(run_id)
     
-    if not os.path.exists(input_file):
-        logger.error(f"Input file does not exist: {input_file}")
+    input_files = args.input_files
+    campaign = len(input_files) > 1
+    logger.info(f"Starting Thermochimica workflow automation with input file(s): {', '.join(input_files)}")
+    
+    missing = [input_file for input_file in input_files if not os.path.exists(input_file)]
+    if missing:
+        logger.error(f"Input file does not exist: {', '.join(missing)}")
         sys.exit(1)
         
     start_time = time.time()
     
-    # Make sure required directories exist
-    ensure_directories_exist()
+    # Define the workflow stages and make sure required directories exist
+    base_dir = args.campaign_dir if campaign else "."
+    tc_params = {"batch_size": args.tc_batch_size} if args.tc_batch_size > 0 else {}
+    if args.tc_warm_start:
+        tc_params.update(warm_start=True, chains=args.tc_jobs)
+    if args.tc_jobs > 0:
+        tc_params["jobs"] = args.tc_jobs
+    if args.tc_dedup_rtol > 0:
+        tc_params["dedup_rtol"] = args.tc_dedup_rtol
+    if args.tc_timeout:
+        tc_params.update(timeout=args.tc_timeout, retries=args.tc_retries)
+    if args.tc_queue_dir:
+        tc_params["queue_dir"] = os.path.abspath(args.tc_queue_dir)
+    if args.tc_adaptive > 0:
+        tc_params.update(adaptive_stride=args.tc_adaptive, adaptive_rtol=args.tc_adaptive_rtol)
+    if not args.no_tc_cache:
+        tc_params["cache_dir"] = os.path.abspath(args.tc_cache_dir or os.path.join(base_dir, TC_CACHE_DIR))
+        tc_params["cache_max_mb"] = args.tc_cache_size
     
-    # Define the workflow steps
-    workflow = [
-        {
-            "command": f"python nuclide_vector_processor_v2.py -i {input_file} -o Element_Vector.json",
-            "description": f"Process nuclide vector from {input_file}"
-        },
-        {
-            "command": "python Surogate_Processing.py",
-            "description": "Process surrogate vector"
-        },
-        {
-            "command": "python Input_Generator_and_Execution_Multi.py surrogate_vector.json --run",
-            "description": "Generate and execute Thermochimica inputs",
-            "check": False  # Some errors are expected and handled appropriately as noted in logs
-        },
-        {
-            "command": "python CondensedReportGenerator2.py .",
-            "description": "Generate condensed Thermochimica report"
-        },
-        {
-            "command": "python Phase_Analysis_and_Report_Gen2.py .",
-            "description": "Generate phase analysis report"
-        },
-        {
-            "command": "python MSFL_Phase_Report.py .",
-            "description": "Generate MSFL phase report"
-        },
-        {
-            "command": "python RedoxAnalyzer4.py output/Condensed_Thermochimica_Report.json",
-            "description": "Analyze redox ratios"
-        },
-        {
-            "command": "python Phase_Speceific_Data_Processor.py .",
-            "description": "Process phase-specific data"
-        },
-        {
-            "command": "python Decouple_Gas.py",
-            "description": "Decouple gas phase data"
-        },
-        {
-            "command": "python Decouple_Solids.py",
-            "description": "Decouple solids phase data"
-        },
-        {
-            "command": "python Decouple_Salt.py",
-            "description": "Decouple salt phase data"
-        },
-        {
-            "command": "python Salt_Nuclide_Decoupler.py",
-            "description": "Decouple salt nuclides"
-        },
-
-        {
-            "command": "python Decoupled_Species_Processor.py",
-            "description": "Decouple salt nuclides"
-        }
-    ]
+    sweep = None
+    if args.tc_temperatures or args.tc_pressures:
+        sweep = {"temperatures": args.tc_temperatures or ["900"], "pressures": args.tc_pressures or ["1"]}
+        logger.info(f"Sweeping {len(sweep['temperatures'])} temperatures x {len(sweep['pressures'])} pressures")
     
-    # Execute each step in the workflow
-    success_count = 0
-    failure_count = 0
+    if campaign:
+        stages, cases = build_campaign(input_files, base_dir, tc_params=tc_params, sweep=sweep)
+        ensure_case_directories(cases)
+        logger.info(f"Campaign with {len(cases)} cases in {base_dir}: {', '.join(cases)}")
+    else:
+        stages = build_workflow(input_files[0], tc_params=tc_params, sweep=sweep)
+        ensure_directories_exist()
     
-    for i, step in enumerate(workflow, 1):
-        logger.info(f"Step {i}/{len(workflow)}: {step['description']}")
-        
-        # Get check parameter (default to True if not specified)
-        check = step.get("check", True)
-        
-        # Run the command
-        if run_command(step["command"], step["description"], check):
-            success_count += 1
-        else:
-            failure_count += 1
-            logger.warning(f"Step {i} failed. Continuing with next step...")
+    # Execute the workflow stages
+    engine = WorkflowEngine(stages,
+                            manifest_path=os.path.join(base_dir, MANIFEST_FILE), force=args.force,
+                            journal_path=os.path.join(base_dir, JOURNAL_FILE), resume=args.resume)
+    results = engine.run(max_workers=args.workers, unit_workers=args.tc_jobs)
     
     # Summarize the results
+    success_count = sum(1 for result in results.values() if result.succeeded)
+    cached_count = sum(1 for result in results.values() if result.status == "cached")
+    failure_count = len(results) - success_count
+    
     total_time = time.time() - start_time
     logger.info(f"Workflow completed in {total_time:.2f} seconds")
-    logger.info(f"Summary: {success_count} steps succeeded, {failure_count} steps failed")
+    critical_time, critical_stages = engine.critical_path()
+    logger.info(f"Critical path: {critical_time:.2f} seconds ({' -> '.join(critical_stages)})")
+    save_profile(engine, run_id, args, total_time, base_dir)
+    if campaign:
+        save_campaign_summary(summarize_campaign(engine, cases, total_time),
+                              os.path.join(base_dir, CAMPAIGN_SUMMARY_FILE))
+    logger.info(f"Summary: {success_count} steps succeeded ({cached_count} up to date), {failure_count} steps failed")
     
     if failure_count == 0:
         logger.info("Thermochimica workflow completed successfully!")